@@ -0,0 +1,49 @@
+"""
+会话日志分析 - 统计吞吐、释放间隔抖动与暂停情况，或按原始节奏回放
+逐块读取，日志再大也不会整个载入内存
+
+用法:
+    python analyze_log.py logs/session_20240101_120000.aslog [更多文件...]
+    python analyze_log.py logs/session_20240101_120000.aslog --replay --speed 4
+"""
+import sys
+import os
+import argparse
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from core.session_log import analyze, format_report, replay, KIND_NAMES, CAST
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="会话日志分析")
+    parser.add_argument('files', nargs='+', help="会话日志文件（.aslog）")
+    parser.add_argument('--replay', action='store_true', help="逐条输出记录")
+    parser.add_argument('--speed', type=float, default=0.0,
+                        help="回放倍速，0 表示不等待（默认）")
+    args = parser.parse_args(argv)
+
+    status = 0
+    for path in args.files:
+        try:
+            if args.replay:
+                for record in replay(path, args.speed):
+                    line = f"{record.t:10.3f}s  {KIND_NAMES.get(record.kind, record.kind)}"
+                    if record.kind == CAST:
+                        line += (f"  点 {record.index + 1}  ({record.x}, {record.y})  {record.key}"
+                                 f"  准备 {record.prepare * 1000:.2f}ms  投递 {record.cast * 1000:.2f}ms")
+                    print(line)
+            else:
+                print(f"== {path}")
+                print(format_report(analyze(path)))
+        except (OSError, ValueError) as e:
+            print(f"读取会话日志失败: {path}: {e}")
+            status = 1
+        except KeyboardInterrupt:
+            return status
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,242 @@
+"""
+防误触策略 - 分析最近一小段时间的物理鼠标、键盘输入，判定用户是否在手动操作
+程序注入的输入（SendInput / mouse_event / keybd_event）不参与判定
+
+判定规则（满足任一即为手动操作）:
+    鼠标键按下、键盘按下（热键除外）
+    滑动窗口内净位移 >= distance、路径速度 >= speed，且净位移 >= straightness × 路径长度
+    （快速移动；来回抖动路径长而净位移小，不触发）
+    相对锚点的累计位移 >= drift（缓慢但持续的移动）；光标静止 dwell 秒后重新取锚点，
+    桌面轻微震动不会长时间累积
+
+判定为手动操作之后，空闲时长默认从最后一次物理输入算起（idle_ignores_jitter 时从最后一次手动操作算起）
+
+每个样本的处理为均摊 O(1)：样本只进出窗口各一次，路径长度增量维护
+"""
+import math
+import time
+from collections import deque
+
+from utils.input_hook import InputEvent, KeyEvent, EVENT_MOVE, EVENT_BUTTON
+from utils.hotkey_loop import VK_CODE
+
+
+# 检测到手动操作后的动作
+ACTION_PAUSE = 'pause'     # 暂停，等待手动继续
+ACTION_SKIP = 'skip'       # 不暂停，用户操作期间跳过释放，停止操作 idle 秒后自动恢复释放
+ACTION_RESUME = 'resume'   # 暂停，用户停止操作 idle 秒后自动继续
+
+ACTIONS = (ACTION_PAUSE, ACTION_SKIP, ACTION_RESUME)
+
+ACTION_NAMES = {ACTION_PAUSE: '暂停', ACTION_SKIP: '跳过释放', ACTION_RESUME: '空闲后继续'}
+
+# 功能键与 ESC 多用作热键（F6 继续等），按下不算手动操作
+HOTKEY_VKS = frozenset(vk for name, vk in VK_CODE.items() if name.startswith('F') or name == 'Escape')
+
+
+class AntiTouchPolicy:
+    """防误触策略参数"""
+
+    __slots__ = ('action', 'distance', 'speed', 'straightness', 'window', 'drift', 'dwell',
+                 'keyboard', 'idle', 'idle_ignores_jitter')
+
+    def __init__(self, action=ACTION_PAUSE, distance=8, speed=100.0, straightness=0.5, window=0.2,
+                 drift=40, dwell=1.0, keyboard=True, idle=5.0, idle_ignores_jitter=False):
+        """
+        :param action: 检测到手动操作后的动作，见 ACTIONS
+        :param distance: 滑动窗口内净位移阈值（像素）
+        :param speed: 滑动窗口内路径速度阈值（像素/秒）
+        :param straightness: 净位移与路径长度之比的下限，排除原地抖动
+        :param window: 滑动窗口长度（秒）
+        :param drift: 相对锚点的累计位移阈值（像素）
+        :param dwell: 光标静止多久后重新取锚点（秒）
+        :param keyboard: 是否把键盘按下算作手动操作
+        :param idle: 跳过释放 / 自动继续前需要的空闲时长（秒），从最后一次物理输入算起
+        :param idle_ignores_jitter: 空闲时长改为从最后一次判定为手动操作算起，
+            未达到阈值的移动（桌面震动）不再推后自动继续；缓慢移动鼠标的用户也会被视为空闲
+        """
+        if action not in ACTIONS:
+            raise ValueError(f"未知的防误触动作: {action}")
+        self.action = action
+        self.distance = distance
+        self.speed = speed
+        self.straightness = straightness
+        self.window = window
+        self.drift = drift
+        self.dwell = dwell
+        self.keyboard = keyboard
+        self.idle = idle
+        self.idle_ignores_jitter = idle_ignores_jitter
+
+    @classmethod
+    def from_config(cls, item):
+        """配置字典构建，缺省项使用默认值，None 时全部默认"""
+        return cls(**{k: v for k, v in (item or {}).items() if k in cls.__slots__})
+
+    def to_config(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class AntiTouchEngine:
+    """
+    防误触判定引擎 - 钩子线程调用 feed_*，执行线程查询空闲时间
+    暂停期间也持续输入事件，用于计算空闲时长；
+    窗口与锚点只由钩子线程修改，其他线程的 reset() 只设置标志，由下一个样本应用
+    """
+
+    def __init__(self, policy=None, clock=time.perf_counter, ignore_keys=HOTKEY_VKS):
+        """
+        :param clock: 时钟函数（按录制轨迹回放时注入录制时间）
+        :param ignore_keys: 不算作手动操作的虚拟键码
+        """
+        self.policy = policy or AntiTouchPolicy()
+        self.clock = clock
+        self.ignore_keys = frozenset(ignore_keys)
+        # 窗口内的样本 (时间, x, y, 与上一个样本的距离)
+        self._samples = deque()
+        self._path = 0.0
+        self._anchor = None
+        self._last_sample = None
+        self._reset_pending = False
+        # 最近一次判定为手动操作的时间、最近一次物理输入的时间
+        self.last_touch = None
+        self.last_physical = None
+        self.physical_count = 0
+        self.injected_count = 0
+        self.touch_count = 0
+
+    def reset(self):
+        """清空滑动窗口与锚点（继续执行时调用，可从任意线程调用），空闲计时不受影响"""
+        self._reset_pending = True
+
+    # ==================== 输入 ====================
+
+    def feed_mouse(self, event, now=None):
+        """
+        输入一个鼠标事件（InputEvent）
+        :return: 是否判定为手动操作
+        """
+        if event.injected:
+            self.injected_count += 1
+            return False
+        self.physical_count += 1
+        if now is None:
+            now = self.clock()
+        self.last_physical = now
+        if event.kind == EVENT_BUTTON:
+            return self._touch(now)
+        return self._feed_move(event.x, event.y, now)
+
+    def feed_key(self, event, now=None):
+        """
+        输入一个键盘事件（KeyEvent），只有按下计入
+        :return: 是否判定为手动操作
+        """
+        if event.injected:
+            self.injected_count += 1
+            return False
+        if event.vk in self.ignore_keys:
+            return False
+        self.physical_count += 1
+        if now is None:
+            now = self.clock()
+        self.last_physical = now
+        if not event.down or not self.policy.keyboard:
+            return False
+        return self._touch(now)
+
+    def _feed_move(self, x, y, now):
+        policy = self.policy
+        samples = self._samples
+
+        # 静止超过 dwell 或被 reset 后重新取锚点，窗口也从头开始
+        if self._reset_pending:
+            self._reset_pending = False
+            self._last_sample = None
+        if self._last_sample is None or now - self._last_sample >= policy.dwell:
+            samples.clear()
+            self._path = 0.0
+            self._anchor = (x, y)
+        self._last_sample = now
+
+        if samples:
+            _, px, py, _ = samples[-1]
+            segment = math.hypot(x - px, y - py)
+        else:
+            segment = 0.0
+        samples.append((now, x, y, segment))
+        self._path += segment
+
+        cutoff = now - policy.window
+        while samples[0][0] < cutoff:
+            self._path -= samples.popleft()[3]
+
+        # 快速移动：窗口内净位移、路径速度与直线度（首个样本的距离属于窗口外的线段）
+        first_t, fx, fy, first_segment = samples[0]
+        dx, dy = x - fx, y - fy
+        net_sq = dx * dx + dy * dy
+        if net_sq >= policy.distance * policy.distance:
+            path = self._path - first_segment
+            span = now - first_t
+            fast = span <= 0 or path / span >= policy.speed
+            if fast and net_sq >= (policy.straightness * path) ** 2:
+                return self._touch(now)
+
+        # 缓慢持续移动：相对锚点的累计位移
+        ax, ay = self._anchor
+        dx, dy = x - ax, y - ay
+        if dx * dx + dy * dy >= policy.drift * policy.drift:
+            return self._touch(now)
+        return False
+
+    def _touch(self, now):
+        self.last_touch = now
+        self.touch_count += 1
+        return True
+
+    # ==================== 查询 ====================
+
+    def idle_remaining(self, now=None):
+        """
+        距离满足空闲时长还剩多少秒（从未检测到手动操作时为 0）
+        默认从最后一次物理输入算起：判定为手动操作之后，任何未注入的输入都会推后空闲
+        """
+        if self.last_touch is None:
+            return 0.0
+        if now is None:
+            now = self.clock()
+        last = self.last_touch if self.policy.idle_ignores_jitter else self.last_physical
+        return max(last + self.policy.idle - now, 0.0)
+
+    def active(self, now=None):
+        """用户是否仍在操作（最近 idle 秒内检测到过手动操作）"""
+        return self.idle_remaining(now) > 0
+
+
+def evaluate_trace(path, policy=None):
+    """
+    用录制的输入宏（core.macro 格式）按录制时间回放给判定引擎，用于调整阈值
+    连续的手动操作（间隔小于 idle）只在开始时记录一次
+    :return: {'events', 'touches': [(时间, 类型), ...], 'engine'}
+    """
+    from core.macro import iter_events, MOVE, KEY_DOWN, KEY_UP, KEY_EXTENDED
+
+    engine = AntiTouchEngine(policy)
+    touches = []
+    count = 0
+    _, events = iter_events(path, raw=True)
+    for t, kind, code, x, y in events:
+        count += 1
+        previous = engine.last_touch
+        if kind == MOVE:
+            touched = engine.feed_mouse(InputEvent(EVENT_MOVE, x, y, False, 0), t)
+        elif kind in (KEY_DOWN, KEY_UP):
+            touched = engine.feed_key(KeyEvent(
+                code & 0xFF, kind == KEY_DOWN, False, bool(code & KEY_EXTENDED), 0
+            ), t)
+        else:
+            # 鼠标键、滚轮与钩子中一样视为按键事件
+            touched = engine.feed_mouse(InputEvent(EVENT_BUTTON, x, y, False, 0), t)
+        if touched and (previous is None or t - previous >= engine.policy.idle):
+            touches.append((t, kind))
+    return {'events': count, 'touches': touches, 'engine': engine}
\ No newline at end of file
@@ -1,18 +1,43 @@
 """
 坐标点记录器
 """
-from PyQt5.QtWidgets import QDialog, QWidget, QMenu, QAction
+from PyQt5.QtWidgets import QApplication, QDialog, QWidget, QMenu, QAction
 from PyQt5.QtCore import Qt, QPoint, QPointF
 from PyQt5.QtGui import QPainter, QPen, QColor, QBrush, QPainterPath
 
+from core.point_store import PointSet
+
+
+def native_to_logical(x, y):
+    """
+    物理像素坐标 -> Qt 逻辑坐标，返回 (x, y, 缩放比)
+    Qt5 开启高 DPI 缩放后，每个屏幕左上角保持物理坐标，屏幕内按缩放比换算
+    """
+    for screen in QApplication.screens():
+        geometry = screen.geometry()
+        ratio = screen.devicePixelRatio()
+        if (geometry.x() <= x < geometry.x() + geometry.width() * ratio
+                and geometry.y() <= y < geometry.y() + geometry.height() * ratio):
+            return (geometry.x() + (x - geometry.x()) / ratio,
+                    geometry.y() + (y - geometry.y()) / ratio, ratio)
+    return (x, y, 1.0)
+
 
 class PointRecorder(QDialog):
     """坐标点记录器 - 点击记录释放技能的位置"""
     
     def __init__(self, window_rect, existing_points=None, parent=None):
+        """
+        :param window_rect: 客户区 (x, y, w, h)，物理像素
+        :param existing_points: 已有坐标点（客户区物理像素，PointSet 或 [(x, y), ...]）
+        """
         super().__init__(parent)
         self.window_rect = window_rect
-        self.points = existing_points. copy() if existing_points else []
+        # 界面内按逻辑坐标编辑，取出时换算回物理像素
+        self.ratio = native_to_logical(window_rect[0], window_rect[1])[2]
+        self.points = PointSet.from_points(existing_points).transformed(
+            1 / self.ratio, 1 / self.ratio
+        ).copy()
         self.hover_point_index = -1
         self. dragging_point_index = -1
         
@@ -28,7 +53,8 @@ class PointRecorder(QDialog):
         self.setCursor(Qt.CrossCursor)
         
         win_x, win_y, win_w, win_h = self.window_rect
-        self.setGeometry(win_x, win_y, win_w, win_h)
+        x, y, ratio = native_to_logical(win_x, win_y)
+        self.setGeometry(int(x), int(y), int(win_w / ratio), int(win_h / ratio))
     
     def paintEvent(self, event):
         painter = QPainter(self)
@@ -192,14 +218,19 @@ class PointRecorder(QDialog):
             self.update()
     
     def get_points(self):
-        """获取所有坐标点"""
-        return self.points. copy() if self.points else None
+        """获取所有坐标点（客户区物理像素）"""
+        if not self.points:
+            return None
+        return self.points.transformed(self.ratio, self.ratio)
 
 
 class PointsPreview(QWidget):
     """坐标点预览窗口"""
     
     def __init__(self, points, window_offset=(0, 0), parent=None):
+        """
+        :param points: PointSet（逻辑坐标，相对 window_offset），直接引用不复制
+        """
         super().__init__(parent)
         self.points = points
         self.window_offset = window_offset
@@ -214,13 +245,12 @@ class PointsPreview(QWidget):
             self.max_x = self.max_y = 100
             return
         
-        xs = [p[0] for p in self.points]
-        ys = [p[1] for p in self.points]
+        min_x, min_y, max_x, max_y = self.points.bounds()
         
-        self.min_x = min(xs) - 30
-        self.min_y = min(ys) - 30
-        self.max_x = max(xs) + 30
-        self.max_y = max(ys) + 30
+        self.min_x = min_x - 30
+        self.min_y = min_y - 30
+        self.max_x = max_x + 30
+        self.max_y = max_y + 30
     
     def init_ui(self):
         self.setWindowFlags(
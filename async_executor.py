@@ -0,0 +1,447 @@
+"""
+异步技能执行核心 - 独立事件循环线程，多目标协程调度
+"""
+import time
+import asyncio
+import threading
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from core.input_backend import create_backend, INPUT_MODE_FOREGROUND
+from core.point_store import PointSet
+from core.coords import WindowTransform, POINT_ORIGIN_WINDOW
+from core.capture import create_capture_source, FrameCache, parse_probes, probes_region, probes_match
+from core.rotation import RotationScheduler, Skill
+from core import metrics
+from core.session_log import SessionLog, PAUSE, AUTO_PAUSE, RESUME, ROUND, STOP
+from core.anti_touch import AntiTouchPolicy, AntiTouchEngine, ACTION_SKIP, ACTION_RESUME
+from utils.input_hook import MouseHook, KeyboardHook
+
+
+class TargetError(Exception):
+    """目标窗口异常，直接作为错误信息提示"""
+
+
+class AsyncSkillExecutor(QObject):
+    """异步技能执行器 - 接口与 SkillExecutor 一致，可直接替换"""
+
+    # 信号
+    status_updated = pyqtSignal(int, tuple, float, int)
+    round_updated = pyqtSignal(int, float, bool, float)
+    mouse_moved_detected = pyqtSignal()
+    error_occurred = pyqtSignal(str)
+    auto_resumed = pyqtSignal()
+
+    def __init__(self, config, window_manager):
+        super().__init__()
+        self.config = config
+        self.window_manager = window_manager
+
+        self.running = False
+        self.is_paused = False
+        self.exec_count = 0
+        self.skipped_count = 0
+        self.start_time = 0
+
+        # 目标列表：未配置 targets 时以顶层配置作为唯一目标
+        self.targets = [self._make_target(t) for t in config.get('targets') or [config]]
+        self.round_interval = config.get('round_interval', 5.0)
+
+        # 主目标后端与技能循环（状态显示用）
+        self.backend = self.targets[0]['backend']
+        self.rotation = self.targets[0]['rotation']
+
+        # 防误触：只要有前台目标就需要
+        self.anti_touch = config.get('anti_touch', True) and any(
+            t['backend'].moves_cursor for t in self.targets
+        )
+        self.anti_touch_policy = AntiTouchPolicy.from_config(config.get('anti_touch_policy'))
+        self.anti_touch_engine = AntiTouchEngine(self.anti_touch_policy)
+        self.auto_resume = False
+        self._auto_resume_handle = None
+        self.mouse_hook = None
+        self.keyboard_hook = None
+
+        # 会话日志：每次执行一个文件，所有目标的释放写入同一日志
+        self.session_log = None
+
+        # 异步核心不支持的选项：启动时直接报错，不静默退回
+        self.config_error = self._unsupported_options()
+
+        self._thread = None
+        self._loop = None
+        self._tasks = []
+        self._resumed = None
+        self._paused = None
+        self._focus_lock = None
+
+    def _make_target(self, target):
+        """补全目标配置"""
+        hwnd = target.get('window_handle', self.config.get('window_handle'))
+        backend = create_backend(
+            target.get('input_mode', self.config.get('input_mode', INPUT_MODE_FOREGROUND)),
+            target.get('trajectory', self.config.get('trajectory', False))
+        )
+        probes = parse_probes(target.get('probes', self.config.get('probes')))
+        # 技能循环（多技能、冷却、优先级），未配置时使用单一 skill_key
+        skills = target.get('skills', self.config.get('skills')) or []
+        rotation = RotationScheduler([Skill.from_config(s) for s in skills]) if skills else None
+        all_probes = probes + [p for s in (rotation.skills if rotation else []) for p in s.probes]
+        return {
+            'window_handle': hwnd,
+            'points': PointSet.from_points(target.get('points', self.config.get('points', []))),
+            # 沿用顶层坐标点的目标接收 set_points 的更新
+            'shared_points': target is self.config or 'points' not in target,
+            'skill_key': target.get('skill_key', self.config.get('skill_key')),
+            'interval': target.get('interval', self.config.get('interval', 100)),
+            'backend': backend,
+            'transform': WindowTransform(
+                hwnd,
+                target.get('point_origin', self.config.get('point_origin', POINT_ORIGIN_WINDOW)),
+                target.get('point_dpi', self.config.get('point_dpi')),
+                target.get('point_resolution', self.config.get('point_resolution')),
+            ),
+            'probes': probes,
+            'templates': target.get('templates', self.config.get('templates')),
+            'rotation': rotation,
+            'capture': FrameCache(
+                create_capture_source(print_window=not backend.moves_cursor), hwnd, probes_region(all_probes)
+            ) if all_probes else None,
+        }
+
+    def _unsupported_options(self):
+        """返回不支持的配置的错误信息，全部支持时返回 None"""
+        for target in self.targets:
+            templates = target['templates'] or {}
+            if templates.get('dynamic') and templates.get('files'):
+                return "异步核心不支持模板识别动态坐标点，请关闭动态坐标点或异步核心"
+        if self.config.get('precise_timing'):
+            return "异步核心不支持精确计时，请关闭精确计时或异步核心"
+        return None
+
+    # ==================== 线程接口 ====================
+
+    def start(self):
+        """启动事件循环线程"""
+        if self.isRunning():
+            return
+        self.running = True
+        self._thread = threading.Thread(target=self._thread_main, daemon=True)
+        self._thread.start()
+
+    def isRunning(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _thread_main(self):
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._loop.run_until_complete(self._main())
+        finally:
+            self._loop.close()
+            self._loop = None
+            self.running = False
+
+    # ==================== 协程 ====================
+
+    async def _main(self):
+        """调度所有目标协程"""
+        if self.config_error:
+            self.error_occurred.emit(self.config_error)
+            return
+        if not all(t['points'] for t in self.targets):
+            self.error_occurred.emit("没有设置坐标点！")
+            return
+
+        self._resumed = asyncio.Event()
+        self._paused = asyncio.Event()
+        self._focus_lock = asyncio.Lock()
+        self._set_paused(self.is_paused)
+
+        self.exec_count = 0
+        self.skipped_count = 0
+        self.start_time = time.time()
+        for target in self.targets:
+            if target['rotation']:
+                target['rotation'].reset()
+
+        if self.config.get('session_log'):
+            try:
+                self.session_log = SessionLog(
+                    self.config['session_log'], self.targets[0]['interval'] / 1000.0, self.round_interval
+                )
+            except OSError as e:
+                print(f"创建会话日志失败: {e}")
+
+        if self.anti_touch:
+            self.anti_touch_engine.reset()
+            self.mouse_hook = MouseHook(self._on_input_event)
+            self.mouse_hook.start()
+            if self.anti_touch_policy.keyboard:
+                self.keyboard_hook = KeyboardHook(self._on_key_event)
+                self.keyboard_hook.start()
+
+        self._tasks = [asyncio.ensure_future(self._run_target(t)) for t in self.targets]
+        try:
+            await asyncio.gather(*self._tasks)
+        except asyncio.CancelledError:
+            pass
+        except TargetError as e:
+            self.error_occurred.emit(str(e))
+        except Exception as e:
+            self.error_occurred.emit(f"执行错误: {str(e)}")
+        finally:
+            for task in self._tasks:
+                task.cancel()
+            for target in self.targets:
+                if target['capture']:
+                    target['capture'].close()
+            if self.mouse_hook:
+                self.mouse_hook.stop()
+                self.mouse_hook = None
+            if self.keyboard_hook:
+                self.keyboard_hook.stop()
+                self.keyboard_hook = None
+            if self.session_log:
+                self.session_log.event(STOP)
+                self.session_log.close()
+                self.session_log = None
+
+    async def _run_target(self, target):
+        """单个目标的释放循环"""
+        hwnd = target['window_handle']
+        points = target['points']
+        backend = target['backend']
+        rotation = target['rotation']
+        interval = target['interval'] / 1000.0
+        current_round = 1
+        index = 0
+
+        while self.running:
+            await self._resumed.wait()
+            tick_start = time.perf_counter()
+
+            # 界面在运行中修改了坐标点，下次释放前接管
+            pending = target.pop('pending_points', None)
+            if pending is not None:
+                self._apply_points(target, *pending)
+                points = target['points']
+                if index >= len(points):
+                    index = 0
+
+            if not self.window_manager.is_window_valid(hwnd):
+                metrics.window_errors.inc()
+                raise TargetError("目标窗口已关闭！")
+            if not target['transform'].update():
+                metrics.window_errors.inc()
+                raise TargetError("无法获取窗口位置！")
+
+            # 画面条件不满足，本次不释放
+            if target['capture']:
+                target['capture'].next_tick()
+                if not probes_match(target['probes'], target['capture']):
+                    self.skipped_count += 1
+                    await self._sleep(interval)
+                    continue
+
+            # 技能循环：取条件满足的就绪技能，没有则等到最早就绪
+            skill = None
+            if rotation:
+                skill = self._pop_castable_skill(target)
+                if skill is None:
+                    await self._sleep(rotation.next_ready_time() - rotation.clock())
+                    continue
+
+            # 防误触（跳过释放）：用户操作期间前台目标不动光标
+            if (backend.moves_cursor and self.anti_touch
+                    and self.anti_touch_policy.action == ACTION_SKIP
+                    and self.anti_touch_engine.active()):
+                if skill:
+                    rotation.defer(skill, interval)
+                self.skipped_count += 1
+                metrics.anti_touch_skips.inc()
+                await self._sleep(interval)
+                continue
+
+            # 技能专属坐标点不推进全局轮次
+            uses_main_points = not (skill and skill.points)
+            rel_x, rel_y = points[index] if uses_main_points else skill.next_point()
+            screen_x, screen_y = target['transform'].to_screen(rel_x, rel_y)
+            key = skill.key if skill else target['skill_key']
+
+            cast_start = time.perf_counter()
+            if backend.moves_cursor:
+                # 前台模式共享焦点和光标，逐个执行且不阻塞事件循环
+                async with self._focus_lock:
+                    await self._loop.run_in_executor(
+                        None, backend.cast, hwnd, screen_x, screen_y, key
+                    )
+            else:
+                backend.cast(hwnd, screen_x, screen_y, key)
+            if self.session_log:
+                self.session_log.cast(
+                    index, screen_x, screen_y, key,
+                    cast_start - tick_start, time.perf_counter() - cast_start
+                )
+            if skill:
+                rotation.commit(skill)
+
+            self.exec_count += 1
+            self.status_updated.emit(
+                self.exec_count, (rel_x, rel_y),
+                time.time() - self.start_time, index + 1
+            )
+            self.round_updated.emit(current_round, (index + 1) / len(points) * 100, False, 0)
+
+            if uses_main_points:
+                index += 1
+            if index >= len(points):
+                if self.session_log:
+                    self.session_log.event(ROUND, current_round)
+                await self._wait_between_rounds(current_round)
+                current_round += 1
+                index = 0
+
+            slept_at = time.perf_counter()
+            if await self._sleep(interval):
+                metrics.period_error.observe(abs(time.perf_counter() - slept_at - interval))
+
+    def _apply_points(self, target, points, basis):
+        """
+        切换目标的坐标点（事件循环线程内）
+        :param basis: (原点, DPI, 参考分辨率)
+        """
+        transform = target['transform']
+        transform.origin, transform.point_dpi, resolution = basis
+        transform.point_resolution = tuple(resolution) if resolution else None
+        transform.window_rect = None  # 下次 update 时重新计算
+        target['points'] = points
+
+    def set_points(self, points, origin, dpi=None, resolution=None):
+        """运行中更新坐标点（任意线程调用），各目标协程在下次释放前接管，无需重启"""
+        if not points:
+            return
+        pending = (PointSet.from_points(points), (origin, dpi, resolution))
+        for target in self.targets:
+            if target['shared_points']:
+                target['pending_points'] = pending
+
+    def _pop_castable_skill(self, target):
+        """依次取出就绪技能，条件不满足的延后一个释放间隔再试"""
+        rotation = target['rotation']
+        while True:
+            skill = rotation.pop_ready()
+            if skill is None or probes_match(skill.probes, target['capture']):
+                return skill
+            self.skipped_count += 1
+            rotation.defer(skill, target['interval'] / 1000.0)
+
+    async def _sleep(self, delay):
+        """可被暂停立即打断的等待，返回是否完整等待"""
+        if delay <= 0:
+            return True
+        try:
+            await asyncio.wait_for(self._paused.wait(), timeout=delay)
+        except asyncio.TimeoutError:
+            return True
+        return False
+
+    async def _wait_between_rounds(self, current_round):
+        """轮次之间等待 - 与释放间隔共用同一计时器，被暂停打断时继续后等完剩余时间"""
+        deadline = time.perf_counter() + self.round_interval
+        while self.running:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                return
+            self.round_updated.emit(current_round, 100, True, remaining)
+            if not await self._sleep(min(remaining, 0.1)):
+                await self._resumed.wait()
+
+    # ==================== 控制 ====================
+
+    def _set_paused(self, paused):
+        """在事件循环线程内切换暂停状态"""
+        if paused:
+            self._resumed.clear()
+            self._paused.set()
+        else:
+            self._paused.clear()
+            self._resumed.set()
+
+    def _call_in_loop(self, func, *args):
+        loop = self._loop
+        if loop is not None and loop.is_running():
+            loop.call_soon_threadsafe(func, *args)
+
+    def _on_input_event(self, event):
+        """鼠标钩子回调（钩子线程）- 暂停期间也持续判定，用于空闲计时"""
+        if self.anti_touch_engine.feed_mouse(event):
+            self._on_touch()
+
+    def _on_key_event(self, event):
+        """键盘钩子回调（钩子线程）"""
+        if self.anti_touch_engine.feed_key(event):
+            self._on_touch()
+
+    def _on_touch(self):
+        """检测到手动操作（钩子线程）- 按策略立即暂停；跳过释放由目标协程处理"""
+        if self.is_paused or not self.running or self.anti_touch_policy.action == ACTION_SKIP:
+            return
+        self._pause()
+        self._log_event(AUTO_PAUSE)
+        self.auto_resume = self.anti_touch_policy.action == ACTION_RESUME
+        if self.auto_resume:
+            self._call_in_loop(self._check_auto_resume)
+        metrics.anti_touch_pauses.inc()
+        self.mouse_moved_detected.emit()
+
+    def _check_auto_resume(self):
+        """
+        事件循环线程：最后一次手动操作之后 idle 秒自动继续
+        期间有新操作时按新的截止时间重新登记，不轮询
+        """
+        self._auto_resume_handle = None
+        if not (self.auto_resume and self.is_paused and self.running):
+            return
+        remaining = self.anti_touch_engine.idle_remaining()
+        if remaining <= 0:
+            self.resume()
+            metrics.anti_touch_auto_resumes.inc()
+            self.auto_resumed.emit()
+        else:
+            self._auto_resume_handle = self._loop.call_later(remaining, self._check_auto_resume)
+
+    def auto_resume_remaining(self):
+        """距离自动继续还剩多少秒，不会自动继续时返回 None"""
+        if not (self.auto_resume and self.is_paused):
+            return None
+        return self.anti_touch_engine.idle_remaining()
+
+    def _log_event(self, kind):
+        session_log = self.session_log
+        if session_log and self.running:
+            session_log.event(kind)
+
+    def _pause(self):
+        self.auto_resume = False
+        self.is_paused = True
+        self._call_in_loop(self._set_paused, True)
+
+    def pause(self):
+        """暂停执行（手动暂停不会自动继续）"""
+        self._pause()
+        self._log_event(PAUSE)
+
+    def resume(self):
+        """继续执行"""
+        self.auto_resume = False
+        self.anti_touch_engine.reset()
+        self.is_paused = False
+        self._call_in_loop(self._set_paused, False)
+        self._log_event(RESUME)
+
+    def stop(self):
+        """停止执行 - 立即取消所有目标协程"""
+        self.running = False
+        for task in self._tasks:
+            self._call_in_loop(task.cancel)
+        if self._thread is not None:
+            self._thread.join()
\ No newline at end of file
@@ -0,0 +1,302 @@
+"""
+画面采集 - 可替换的采集源（GDI / 图片文件），每个节拍只截取一次
+坐标均相对窗口矩形左上角（GetWindowRect），与客户区原点的坐标点之间由 WindowTransform 换算
+"""
+import ctypes
+from ctypes import wintypes
+
+
+SRCCOPY = 0x00CC0020
+CAPTUREBLT = 0x40000000
+DIB_RGB_COLORS = 0
+BI_RGB = 0
+PW_RENDERFULLCONTENT = 0x00000002
+
+
+class BITMAPINFOHEADER(ctypes.Structure):
+    _fields_ = [
+        ('biSize', wintypes.DWORD),
+        ('biWidth', wintypes.LONG),
+        ('biHeight', wintypes.LONG),
+        ('biPlanes', wintypes.WORD),
+        ('biBitCount', wintypes.WORD),
+        ('biCompression', wintypes.DWORD),
+        ('biSizeImage', wintypes.DWORD),
+        ('biXPelsPerMeter', wintypes.LONG),
+        ('biYPelsPerMeter', wintypes.LONG),
+        ('biClrUsed', wintypes.DWORD),
+        ('biClrImportant', wintypes.DWORD),
+    ]
+
+
+class Frame:
+    """一帧画面（BGRA 逐行存储，可能只是窗口的一部分区域）"""
+
+    __slots__ = ('data', 'width', 'height', 'origin', 'stride')
+
+    def __init__(self, data, width, height, origin=(0, 0), stride=None):
+        """
+        :param data: BGRA 字节，自上而下逐行
+        :param width: 区域宽度
+        :param height: 区域高度
+        :param origin: 区域左上角在窗口中的坐标
+        :param stride: 每行字节数，缓冲区带行尾填充时大于 width * 4
+        """
+        self.data = memoryview(data).cast('B')
+        self.width = width
+        self.height = height
+        self.origin = origin
+        self.stride = stride or width * 4
+
+    def contains(self, x, y, w=1, h=1):
+        ox, oy = self.origin
+        return ox <= x and oy <= y and x + w <= ox + self.width and y + h <= oy + self.height
+
+    def pixel(self, x, y):
+        """窗口坐标处的颜色 (r, g, b)"""
+        if not self.contains(x, y):
+            raise IndexError(f"像素 ({x}, {y}) 不在采集区域内")
+        offset = (y - self.origin[1]) * self.stride + (x - self.origin[0]) * 4
+        b, g, r = self.data[offset:offset + 3]
+        return (r, g, b)
+
+    def region_mean(self, x, y, w, h):
+        """区域平均颜色 (r, g, b)"""
+        if not self.contains(x, y, w, h):
+            raise IndexError(f"区域 ({x}, {y}, {w}, {h}) 不在采集区域内")
+        total_r = total_g = total_b = 0
+        stride = self.stride
+        start = (y - self.origin[1]) * stride + (x - self.origin[0]) * 4
+        for row in range(h):
+            line = self.data[start + row * stride:start + row * stride + w * 4]
+            total_b += sum(line[0::4])
+            total_g += sum(line[1::4])
+            total_r += sum(line[2::4])
+        count = w * h
+        return (total_r / count, total_g / count, total_b / count)
+
+
+class CaptureSource:
+    """采集源基类"""
+
+    def grab(self, hwnd, region=None):
+        """
+        截取窗口画面
+        :param region: (x, y, w, h) 窗口坐标，为 None 时截取整个窗口
+        :return: Frame，失败时返回 None
+        """
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class GdiCaptureSource(CaptureSource):
+    """GDI 截图：BitBlt 只复制所需区域；print_window 时用 PrintWindow 以支持被遮挡的窗口"""
+
+    def __init__(self, print_window=False):
+        self.print_window = print_window
+        self.user32 = ctypes.windll.user32
+        self.gdi32 = ctypes.windll.gdi32
+
+    def _window_size(self, hwnd):
+        rect = wintypes.RECT()
+        if not self.user32.GetWindowRect(hwnd, ctypes.byref(rect)):
+            return None
+        return (rect.right - rect.left, rect.bottom - rect.top)
+
+    def grab(self, hwnd, region=None):
+        size = self._window_size(hwnd)
+        if not size:
+            return None
+
+        if self.print_window:
+            # PrintWindow 只能整窗绘制，截完整窗口后按区域读取
+            x, y, w, h = (0, 0) + size
+        else:
+            x, y, w, h = region or ((0, 0) + size)
+        if w <= 0 or h <= 0:
+            return None
+
+        window_dc = self.user32.GetWindowDC(hwnd)
+        if not window_dc:
+            return None
+        mem_dc = self.gdi32.CreateCompatibleDC(window_dc)
+        bitmap = self.gdi32.CreateCompatibleBitmap(window_dc, w, h)
+        old = self.gdi32.SelectObject(mem_dc, bitmap)
+        try:
+            if self.print_window:
+                ok = self.user32.PrintWindow(hwnd, mem_dc, PW_RENDERFULLCONTENT)
+            else:
+                ok = self.gdi32.BitBlt(mem_dc, 0, 0, w, h, window_dc, x, y, SRCCOPY | CAPTUREBLT)
+            if not ok:
+                return None
+
+            header = BITMAPINFOHEADER()
+            header.biSize = ctypes.sizeof(BITMAPINFOHEADER)
+            header.biWidth = w
+            header.biHeight = -h  # 负数表示自上而下
+            header.biPlanes = 1
+            header.biBitCount = 32
+            header.biCompression = BI_RGB
+            buffer = ctypes.create_string_buffer(w * h * 4)
+            if not self.gdi32.GetDIBits(mem_dc, bitmap, 0, h, buffer,
+                                        ctypes.byref(header), DIB_RGB_COLORS):
+                return None
+            return Frame(buffer, w, h, (x, y))
+        finally:
+            self.gdi32.SelectObject(mem_dc, old)
+            self.gdi32.DeleteObject(bitmap)
+            self.gdi32.DeleteDC(mem_dc)
+            self.user32.ReleaseDC(hwnd, window_dc)
+
+
+class ImageFileSource(CaptureSource):
+    """图片文件采集源（离线调试 / 测试用），多张图片时每次截取依次切换"""
+
+    def __init__(self, paths, loop=True):
+        """
+        :param paths: 图片路径或路径列表
+        :param loop: 播放完后是否从头循环
+        """
+        # Pillow 为可选依赖，只有使用图片采集时才需要
+        from PIL import Image
+
+        if isinstance(paths, str):
+            paths = [paths]
+        self.frames = []
+        for path in paths:
+            with Image.open(path) as image:
+                image = image.convert('RGBA')
+                # RGBA 转为与 GDI 一致的 BGRA
+                data = image.tobytes('raw', 'BGRA')
+                self.frames.append((data, image.width, image.height))
+        self.loop = loop
+        self.index = 0
+        self.grab_count = 0
+
+    def grab(self, hwnd, region=None):
+        if not self.frames:
+            return None
+        data, width, height = self.frames[min(self.index, len(self.frames) - 1)]
+        self.index += 1
+        if self.loop:
+            self.index %= len(self.frames)
+        self.grab_count += 1
+        return Frame(data, width, height)
+
+
+class FrameCache:
+    """
+    按节拍缓存画面：同一节拍内的所有探针共用一次截取
+    截取区域为所有探针的外接矩形
+    """
+
+    def __init__(self, source, hwnd, region=None):
+        self.source = source
+        self.hwnd = hwnd
+        self.region = region
+        self.grab_count = 0
+        self._frame = None
+        self._valid = False
+
+    def next_tick(self):
+        """进入新节拍，下次读取时重新截取"""
+        self._valid = False
+
+    def frame(self):
+        if not self._valid:
+            self._frame = self.source.grab(self.hwnd, self.region)
+            self._valid = True
+            self.grab_count += 1
+        return self._frame
+
+    def close(self):
+        self._frame = None
+        self.source.close()
+
+
+class PixelProbe:
+    """像素探针：采样点（或小区域平均色）与期望颜色比较"""
+
+    __slots__ = ('x', 'y', 'color', 'tolerance', 'size', 'expect')
+
+    def __init__(self, x, y, color, tolerance=16, size=1, expect=True):
+        """
+        :param x, y: 窗口坐标
+        :param color: 期望颜色 (r, g, b)
+        :param tolerance: 每个通道允许的误差
+        :param size: 采样区域边长，大于 1 时取区域平均色
+        :param expect: False 表示颜色不匹配时才满足条件
+        """
+        self.x = x
+        self.y = y
+        self.color = tuple(color)
+        self.tolerance = tolerance
+        self.size = size
+        self.expect = expect
+
+    @property
+    def bounds(self):
+        return (self.x, self.y, self.size, self.size)
+
+    def matches(self, frame):
+        """画面是否满足条件（截取失败时视为不满足）"""
+        if frame is None or not frame.contains(*self.bounds):
+            return False
+        if self.size > 1:
+            actual = frame.region_mean(*self.bounds)
+        else:
+            actual = frame.pixel(self.x, self.y)
+        close = all(abs(a - e) <= self.tolerance for a, e in zip(actual, self.color))
+        return close == self.expect
+
+    @classmethod
+    def from_config(cls, item):
+        return cls(
+            item['x'], item['y'], parse_color(item['color']),
+            item.get('tolerance', 16), item.get('size', 1), item.get('expect', True),
+        )
+
+
+def create_capture_source(print_window=False):
+    """有 numpy 时使用变化跟踪采集（常驻帧缓冲区，多个使用方共享），否则每次 GDI 截图"""
+    try:
+        from core.frame_buffer import ChangeTrackingCapture, DibBlitter
+    except ImportError:
+        return GdiCaptureSource(print_window)
+    return ChangeTrackingCapture(DibBlitter(print_window))
+
+
+def parse_color(value):
+    """'#RRGGBB' 或 [r, g, b]"""
+    if isinstance(value, str):
+        value = value.lstrip('#')
+        if len(value) != 6:
+            raise ValueError(f"颜色格式错误: {value}")
+        return tuple(int(value[i:i + 2], 16) for i in (0, 2, 4))
+    return tuple(int(c) for c in value)
+
+
+def parse_probes(items):
+    """配置列表转为 PixelProbe 列表"""
+    return [PixelProbe.from_config(item) for item in items or []]
+
+
+def probes_region(probes):
+    """所有探针的外接矩形 (x, y, w, h)，用于一次截取"""
+    if not probes:
+        return None
+    left = min(p.x for p in probes)
+    top = min(p.y for p in probes)
+    right = max(p.x + p.size for p in probes)
+    bottom = max(p.y + p.size for p in probes)
+    return (left, top, right - left, bottom - top)
+
+
+def probes_match(probes, cache):
+    """全部探针满足时返回 True（无探针时始终满足）"""
+    if not probes:
+        return True
+    frame = cache.frame()
+    return all(probe.matches(frame) for probe in probes)
\ No newline at end of file
@@ -1,34 +1,175 @@
 """
-配置管理
+配置管理 - 后台线程写入，合并短时间内的多次保存，临时文件 + 原子替换
 """
 import json
 import os
+import time
+import threading
 
 
 class ConfigManager:
     """配置管理器"""
-    
-    def __init__(self, config_file="config.json"):
+
+    def __init__(self, config_file="config.json", debounce=0.5, compact_threshold=500):
+        """
+        :param config_file: 配置文件路径
+        :param debounce: 合并窗口（秒），窗口内的多次保存只写一次
+        :param compact_threshold: 坐标点超过该数量时使用紧凑编码
+        """
         self.config_file = config_file
-    
+        self.debounce = debounce
+        self.compact_threshold = compact_threshold
+
+        # UI 线程看到的保存耗时（秒）
+        self.last_save_latency = 0.0
+        self.max_save_latency = 0.0
+        self.write_count = 0
+
+        self._cond = threading.Condition()
+        self._pending = None
+        self._deadline = 0.0
+        self._busy = False
+        self._closing = False
+        self._writer = None
+
     def save(self, config):
-        """保存配置"""
+        """保存配置（异步，立即返回）"""
+        start = time.perf_counter()
+        # 浅拷贝顶层列表，避免写入期间界面修改
+        snapshot = {k: list(v) if isinstance(v, list) else v for k, v in config.items()}
+
+        with self._cond:
+            if self._pending is None:
+                self._deadline = time.perf_counter() + self.debounce
+            self._pending = snapshot
+            self._ensure_writer()
+            self._cond.notify_all()
+
+        self.last_save_latency = time.perf_counter() - start
+        self.max_save_latency = max(self.max_save_latency, self.last_save_latency)
+        return True
+
+    def save_sync(self, config):
+        """同步保存配置"""
         try:
-            with open(self. config_file, 'w', encoding='utf-8') as f:
-                json.dump(config, f, indent=4, ensure_ascii=False)
+            self._write(config)
             return True
-        except Exception as e: 
+        except Exception as e:
             print(f"保存配置失败: {e}")
             return False
-    
+
+    def flush(self, timeout=None):
+        """立即写出待保存的配置并等待完成"""
+        with self._cond:
+            self._deadline = 0.0
+            self._cond.notify_all()
+            return self._cond.wait_for(
+                lambda: self._pending is None and not self._busy, timeout
+            )
+
+    def close(self):
+        """写出剩余配置并停止后台线程"""
+        self.flush()
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        if self._writer:
+            self._writer.join()
+            self._writer = None
+
     def load(self):
         """加载配置"""
         if not os.path.exists(self.config_file):
             return None
-        
+
         try:
             with open(self.config_file, 'r', encoding='utf-8') as f:
                 return json.load(f)
         except Exception as e:
             print(f"加载配置失败: {e}")
-            return None
\ No newline at end of file
+            return None
+
+    def _ensure_writer(self):
+        if self._writer is None or not self._writer.is_alive():
+            self._closing = False
+            self._writer = threading.Thread(target=self._writer_loop, daemon=True)
+            self._writer.start()
+
+    def _writer_loop(self):
+        """后台写入线程"""
+        while True:
+            with self._cond:
+                while self._pending is None and not self._closing:
+                    self._cond.wait()
+                if self._pending is None:
+                    return
+
+                # 合并窗口内的后续保存
+                while not self._closing:
+                    remaining = self._deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+
+                config = self._pending
+                self._pending = None
+                self._busy = True
+
+            try:
+                self._write(config)
+            except Exception as e:
+                print(f"保存配置失败: {e}")
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+    def _encode(self, config):
+        """大坐标集使用紧凑编码，否则保持可读缩进"""
+        points = config.get('skill_points') or []
+        if len(points) > self.compact_threshold:
+            return json.dumps(config, ensure_ascii=False, separators=(',', ':'), default=_to_json)
+        return json.dumps(config, indent=4, ensure_ascii=False, default=_to_json)
+
+    def _write(self, config):
+        """写临时文件 + fsync + 原子替换，崩溃时不会损坏原文件"""
+        data = self._encode(config)
+        tmp_file = f"{self.config_file}.tmp"
+
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.config_file)
+        self.write_count += 1
+
+
+def _to_json(obj):
+    """二进制点集等对象导出为 JSON"""
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    raise TypeError(f"无法序列化 {type(obj).__name__}")
+
+
+def measure_save_latency(config, repeats=20, config_file="config_bench.json"):
+    """
+    对比 UI 线程看到的保存耗时（毫秒）
+    :return: (异步保存平均耗时, 同步保存平均耗时)
+    """
+    manager = ConfigManager(config_file)
+    try:
+        start = time.perf_counter()
+        for _ in range(repeats):
+            manager.save(config)
+        async_ms = (time.perf_counter() - start) / repeats * 1000
+        manager.flush()
+
+        start = time.perf_counter()
+        for _ in range(repeats):
+            manager.save_sync(config)
+        sync_ms = (time.perf_counter() - start) / repeats * 1000
+    finally:
+        manager.close()
+        if os.path.exists(config_file):
+            os.remove(config_file)
+    return async_ms, sync_ms
\ No newline at end of file
@@ -0,0 +1,173 @@
+"""
+本地控制接口 - 127.0.0.1 上的 TCP 服务，每行一条 JSON 命令
+服务在独立线程的 asyncio 循环中运行，可同时处理大量客户端；
+命令放入无锁队列，由界面线程（或无界面模式的主线程）取出执行，执行线程不受影响
+
+协议:
+    -> {"id": 1, "cmd": "switch_profile", "name": "副本"}    也可只发送命令名，如: pause
+    <- {"id": 1, "ok": true, "result": {...}}
+    <- {"id": 1, "ok": false, "error": "..."}
+命令: start / stop / pause / resume / switch_profile / stats
+"""
+import json
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import Future
+
+
+DEFAULT_PORT = 47810
+
+COMMANDS = ('start', 'stop', 'pause', 'resume', 'switch_profile', 'stats')
+
+
+class Command:
+    """一条待执行的命令，执行结果通过 future 返回给客户端"""
+
+    __slots__ = ('name', 'args', 'future')
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+        self.future = Future()
+
+
+class ControlServer:
+    """本地控制服务"""
+
+    def __init__(self, port=DEFAULT_PORT, host='127.0.0.1', stats=None, notify=None, timeout=5.0):
+        """
+        :param port: 监听端口，0 表示由系统分配
+        :param stats: 返回统计信息的函数，只读，直接在服务线程中调用
+        :param notify: 有新命令入队时调用（服务线程中），用于唤醒消费者
+        :param timeout: 等待命令执行的最长时间（秒）
+        """
+        self.host = host
+        self.port = port
+        self.stats = stats
+        self.notify = notify
+        self.timeout = timeout
+
+        # deque 的 append / popleft 是原子操作，生产者与消费者之间无需加锁
+        self.commands = deque()
+        self.clients = 0
+        self.handled = 0
+
+        self._loop = None
+        self._stop_event = None
+        self._thread = None
+        self._ready = threading.Event()
+        self._error = None
+
+    # ==================== 服务线程 ====================
+
+    def start(self):
+        """启动服务线程，监听失败时抛出 OSError"""
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._error:
+            raise self._error
+        return self.port
+
+    def _run(self):
+        try:
+            asyncio.run(self._serve())
+        except OSError as e:
+            self._error = e
+            self._ready.set()
+
+    async def _serve(self):
+        self._loop = asyncio.get_running_loop()
+        self._stop_event = asyncio.Event()
+        server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        self.port = server.sockets[0].getsockname()[1]
+        self._ready.set()
+        async with server:
+            await self._stop_event.wait()
+
+    async def _handle_client(self, reader, writer):
+        self.clients += 1
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                reply = await self._dispatch(line)
+                writer.write((json.dumps(reply, ensure_ascii=False) + '\n').encode('utf-8'))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.clients -= 1
+            writer.close()
+
+    async def _dispatch(self, line):
+        """解析一行命令并等待执行结果"""
+        try:
+            text = line.decode('utf-8').strip()
+            request = json.loads(text) if text.startswith('{') else {'cmd': text}
+        except ValueError as e:
+            return {'ok': False, 'error': f"命令格式错误: {e}"}
+        if not isinstance(request, dict):
+            return {'ok': False, 'error': "命令格式错误: 应为 JSON 对象"}
+
+        reply = {'id': request.get('id')} if 'id' in request else {}
+        name = request.get('cmd')
+        if name not in COMMANDS:
+            return dict(reply, ok=False, error=f"未知命令: {name}")
+
+        try:
+            if name == 'stats' and self.stats:
+                # 统计只读，不经过队列
+                result = self.stats()
+            else:
+                args = {k: v for k, v in request.items() if k not in ('id', 'cmd')}
+                command = Command(name, args)
+                self.commands.append(command)
+                if self.notify:
+                    self.notify()
+                result = await asyncio.wait_for(asyncio.wrap_future(command.future), self.timeout)
+        except asyncio.TimeoutError:
+            return dict(reply, ok=False, error="执行超时")
+        except Exception as e:
+            return dict(reply, ok=False, error=str(e))
+        self.handled += 1
+        return dict(reply, ok=True, result=result)
+
+    # ==================== 消费者 ====================
+
+    def drain(self, handler):
+        """
+        取出并执行所有待执行命令（在消费者线程中调用）
+        :param handler: handler(name, args) -> 结果（可 JSON 序列化），出错时抛出异常
+        :return: 执行的命令数
+        """
+        count = 0
+        while True:
+            try:
+                command = self.commands.popleft()
+            except IndexError:
+                return count
+            # 客户端已超时放弃的命令不再执行
+            if not command.future.set_running_or_notify_cancel():
+                continue
+            try:
+                command.future.set_result(handler(command.name, command.args))
+            except Exception as e:
+                command.future.set_exception(e)
+            count += 1
+
+    def stop(self):
+        """停止服务，未执行的命令返回错误"""
+        if self._loop and self._stop_event:
+            self._loop.call_soon_threadsafe(self._stop_event.set)
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        while self.commands:
+            command = self.commands.popleft()
+            if command.future.set_running_or_notify_cancel():
+                command.future.set_exception(RuntimeError("控制服务已停止"))
\ No newline at end of file
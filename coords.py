@@ -0,0 +1,162 @@
+"""
+坐标变换 - 客户区坐标点 -> 虚拟桌面物理坐标 / mouse_event 绝对坐标
+支持多显示器与每显示器 DPI、窗口分辨率变化；按窗口位置预先计算系数，热路径只做一次乘加
+"""
+import time
+import ctypes
+from ctypes import wintypes
+
+
+user32 = ctypes.windll.user32
+
+# 虚拟桌面（所有显示器的外接矩形）
+SM_XVIRTUALSCREEN = 76
+SM_YVIRTUALSCREEN = 77
+SM_CXVIRTUALSCREEN = 78
+SM_CYVIRTUALSCREEN = 79
+
+MOUSEEVENTF_VIRTUALDESK = 0x4000
+
+USER_DEFAULT_SCREEN_DPI = 96
+DPI_AWARENESS_CONTEXT_PER_MONITOR_AWARE_V2 = -4
+
+# 坐标点原点
+POINT_ORIGIN_WINDOW = 'window'   # 旧版：相对窗口矩形（含边框、标题栏）
+POINT_ORIGIN_CLIENT = 'client'   # 相对客户区
+
+
+def enable_dpi_awareness():
+    """
+    声明每显示器 DPI 感知，使窗口矩形、光标、虚拟桌面均为物理像素
+    须在创建任何窗口之前调用；系统不支持时忽略
+    """
+    try:
+        return bool(user32.SetProcessDpiAwarenessContext(
+            ctypes.c_void_p(DPI_AWARENESS_CONTEXT_PER_MONITOR_AWARE_V2)
+        ))
+    except AttributeError:
+        return False
+
+
+def window_dpi(hwnd):
+    """窗口所在显示器的 DPI（Windows 10 1607 之前返回 96）"""
+    try:
+        return user32.GetDpiForWindow(hwnd) or USER_DEFAULT_SCREEN_DPI
+    except AttributeError:
+        return USER_DEFAULT_SCREEN_DPI
+
+
+class VirtualDesktop:
+    """虚拟桌面范围与归一化系数（mouse_event 绝对坐标 0~65535）"""
+
+    def __init__(self):
+        self.refresh()
+
+    def refresh(self):
+        self.x = user32.GetSystemMetrics(SM_XVIRTUALSCREEN)
+        self.y = user32.GetSystemMetrics(SM_YVIRTUALSCREEN)
+        self.width = max(user32.GetSystemMetrics(SM_CXVIRTUALSCREEN), 2)
+        self.height = max(user32.GetSystemMetrics(SM_CYVIRTUALSCREEN), 2)
+        self.kx = 65535.0 / (self.width - 1)
+        self.ky = 65535.0 / (self.height - 1)
+
+    def normalize(self, screen_x, screen_y):
+        """物理屏幕坐标 -> 绝对坐标（配合 MOUSEEVENTF_VIRTUALDESK）"""
+        return (int(round((screen_x - self.x) * self.kx)),
+                int(round((screen_y - self.y) * self.ky)))
+
+
+# 进程内共享，显示器布局变化时由 WindowTransform 刷新
+desktop = VirtualDesktop()
+
+
+class WindowTransform:
+    """
+    某个窗口的坐标点变换
+    屏幕坐标 = 原点 + 坐标点 * 缩放
+    坐标点带参考分辨率时，缩放 = 当前客户区尺寸 / 参考分辨率（两轴独立）；
+    否则缩放 = 当前 DPI / 记录坐标点时的 DPI
+    """
+
+    def __init__(self, hwnd, origin=POINT_ORIGIN_WINDOW, point_dpi=None,
+                 point_resolution=None, max_age=1.0):
+        """
+        :param origin: 坐标点原点，'window' 或 'client'
+        :param point_dpi: 记录坐标点时窗口的 DPI，为 None 时不缩放
+        :param point_resolution: 坐标点的参考分辨率（记录时的客户区宽高）
+        :param max_age: 窗口未移动时也定期完整刷新的间隔（秒），用于发现 DPI 变化
+        """
+        self.hwnd = hwnd
+        self.origin = origin
+        self.point_dpi = point_dpi
+        self.point_resolution = tuple(point_resolution) if point_resolution else None
+        self.max_age = max_age
+
+        self.window_rect = None
+        self.client_size = None
+        self.dpi = USER_DEFAULT_SCREEN_DPI
+        self.sx = self.sy = 1.0
+        # 缩放系数每变化一次加一，使用方据此重建预先缩放的坐标点
+        self.version = 0
+        # 坐标点原点在窗口矩形中的偏移（客户区原点时为边框宽度）
+        self.offset = (0, 0)
+        self.ox = self.oy = 0
+        self.refresh_count = 0
+        self._refreshed_at = 0.0
+
+    def update(self):
+        """
+        检查窗口位置，变化时重新计算系数
+        :return: 窗口是否可用
+        """
+        rect = wintypes.RECT()
+        if not user32.GetWindowRect(self.hwnd, ctypes.byref(rect)):
+            return False
+        window_rect = (rect.left, rect.top, rect.right, rect.bottom)
+        if (window_rect != self.window_rect
+                or time.perf_counter() - self._refreshed_at > self.max_age):
+            return self._refresh(window_rect)
+        return True
+
+    def _refresh(self, window_rect):
+        if self.origin == POINT_ORIGIN_CLIENT:
+            point = wintypes.POINT(0, 0)
+            if not user32.ClientToScreen(self.hwnd, ctypes.byref(point)):
+                return False
+            ox, oy = point.x, point.y
+        else:
+            ox, oy = window_rect[0], window_rect[1]
+
+        rect = wintypes.RECT()
+        if user32.GetClientRect(self.hwnd, ctypes.byref(rect)):
+            self.client_size = (rect.right, rect.bottom)
+
+        self.dpi = window_dpi(self.hwnd)
+        if self.point_resolution and self.client_size and all(self.client_size):
+            sx = self.client_size[0] / self.point_resolution[0]
+            sy = self.client_size[1] / self.point_resolution[1]
+        else:
+            sx = sy = self.dpi / self.point_dpi if self.point_dpi else 1.0
+        if (sx, sy) != (self.sx, self.sy):
+            self.sx, self.sy = sx, sy
+            self.version += 1
+        self.ox, self.oy = ox, oy
+        self.offset = (ox - window_rect[0], oy - window_rect[1])
+        self.window_rect = window_rect
+        desktop.refresh()
+        self.refresh_count += 1
+        self._refreshed_at = time.perf_counter()
+        return True
+
+    def to_screen(self, x, y):
+        """坐标点 -> 物理屏幕坐标"""
+        return (int(round(self.ox + x * self.sx)), int(round(self.oy + y * self.sy)))
+
+    def place(self, x, y):
+        """已按 sx/sy 批量缩放过的坐标点 -> 物理屏幕坐标（只需平移）"""
+        return (self.ox + x, self.oy + y)
+
+    def from_window(self, x, y):
+        """窗口矩形坐标（截图、模板识别结果）-> 坐标点"""
+        return (int(round((x - self.offset[0]) / self.sx)),
+                int(round((y - self.offset[1]) / self.sy)))
\ No newline at end of file
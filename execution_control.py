@@ -0,0 +1,74 @@
+"""
+执行控制通道 - 暂停/继续/停止立即唤醒等待中的执行线程
+"""
+import time
+import threading
+
+
+class ExecutionControl:
+    """基于条件变量的执行控制，替代标志位 + 轮询休眠"""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._running = False
+        self._paused = False
+
+    @property
+    def running(self):
+        return self._running
+
+    @property
+    def paused(self):
+        return self._paused
+
+    def start(self):
+        with self._cond:
+            self._running = True
+            self._cond.notify_all()
+
+    def pause(self):
+        with self._cond:
+            self._paused = True
+            self._cond.notify_all()
+
+    def resume(self):
+        with self._cond:
+            self._paused = False
+            self._cond.notify_all()
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+
+    def sleep(self, seconds):
+        """
+        等待指定时长，暂停或停止时立即返回
+        :return: 是否完整等待（期间未暂停、未停止）
+        """
+        deadline = time.perf_counter() + seconds
+        with self._cond:
+            while self._running and not self._paused:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    return True
+                self._cond.wait(remaining)
+            return False
+
+    def wait_while_paused(self, timeout=None):
+        """
+        暂停期间阻塞，继续或停止时立即返回
+        :param timeout: 最长等待时间（秒），超时返回时仍处于暂停状态
+        :return: 是否仍在运行
+        """
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        with self._cond:
+            while self._running and self._paused:
+                if deadline is None:
+                    self._cond.wait()
+                    continue
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            return self._running
\ No newline at end of file
@@ -0,0 +1,337 @@
+"""
+画面变化跟踪 - 每个窗口复用一块帧缓冲区，按图块比较找出变化区域
+GDI 无法预先得知哪些区域变化，每次仍截取整个请求区域；节省的是截取之后的处理：
+多个使用方共享同一次截取的零拷贝 numpy 视图，灰度转换与模板匹配只处理变化的图块
+依赖 numpy（可选依赖，不可用时 create_capture_source 退回 GdiCaptureSource）
+"""
+import time
+import ctypes
+from ctypes import wintypes
+
+import numpy as np
+
+from core.capture import (
+    CaptureSource, Frame, BITMAPINFOHEADER,
+    SRCCOPY, CAPTUREBLT, DIB_RGB_COLORS, BI_RGB, PW_RENDERFULLCONTENT,
+)
+
+
+def _padded(size, tile):
+    return (size + tile - 1) // tile * tile
+
+
+def _to_gray(pixels):
+    return (pixels[..., 0] * np.float32(0.114)
+            + pixels[..., 1] * np.float32(0.587)
+            + pixels[..., 2] * np.float32(0.299))
+
+
+class DibBlitter:
+    """
+    GDI 截图写入常驻 DIB 段：位图内存即 numpy 缓冲区，BitBlt 后无需 GetDIBits 复制
+    只请求部分区域时只复制该区域
+    """
+
+    def __init__(self, print_window=False):
+        self.print_window = print_window
+        self.user32 = ctypes.windll.user32
+        self.gdi32 = ctypes.windll.gdi32
+        self._mem_dc = None
+        self._bitmap = None
+        self._old = None
+        self._shape = None
+        self.pixels = None
+
+    def size(self, hwnd):
+        """窗口 (w, h)，失败时返回 None"""
+        rect = wintypes.RECT()
+        if not self.user32.GetWindowRect(hwnd, ctypes.byref(rect)):
+            return None
+        return (rect.right - rect.left, rect.bottom - rect.top)
+
+    def _ensure(self, window_dc, shape):
+        """按窗口尺寸（已按图块对齐）创建 DIB 段，尺寸不变时复用"""
+        if self._shape == shape:
+            return
+        self.close()
+        height, width = shape
+        header = BITMAPINFOHEADER()
+        header.biSize = ctypes.sizeof(BITMAPINFOHEADER)
+        header.biWidth = width
+        header.biHeight = -height  # 负数表示自上而下
+        header.biPlanes = 1
+        header.biBitCount = 32
+        header.biCompression = BI_RGB
+
+        bits = ctypes.c_void_p()
+        self._mem_dc = self.gdi32.CreateCompatibleDC(window_dc)
+        self._bitmap = self.gdi32.CreateDIBSection(
+            self._mem_dc, ctypes.byref(header), DIB_RGB_COLORS, ctypes.byref(bits), None, 0
+        )
+        if not self._bitmap or not bits.value:
+            self.close()
+            raise OSError("创建 DIB 段失败")
+        self._old = self.gdi32.SelectObject(self._mem_dc, self._bitmap)
+        buffer = (ctypes.c_uint8 * (width * height * 4)).from_address(bits.value)
+        self.pixels = np.ctypeslib.as_array(buffer).reshape(height, width, 4)
+        self._shape = shape
+
+    def blit(self, hwnd, size, shape, region):
+        """
+        截取到常驻缓冲区
+        :param size: 窗口 (w, h)
+        :param shape: 对齐后的缓冲区 (h, w)
+        :param region: (x, y, w, h)，为 None 时整窗
+        :return: 缓冲区数组，失败时返回 None
+        """
+        window_dc = self.user32.GetWindowDC(hwnd)
+        if not window_dc:
+            return None
+        try:
+            self._ensure(window_dc, shape)
+            if self.print_window:
+                ok = self.user32.PrintWindow(hwnd, self._mem_dc, PW_RENDERFULLCONTENT)
+            else:
+                x, y, w, h = region or ((0, 0) + size)
+                ok = self.gdi32.BitBlt(self._mem_dc, x, y, w, h, window_dc, x, y,
+                                       SRCCOPY | CAPTUREBLT)
+            # 确保 GDI 写入完成后再读取内存
+            self.gdi32.GdiFlush()
+            return self.pixels if ok else None
+        finally:
+            self.user32.ReleaseDC(hwnd, window_dc)
+
+    def close(self):
+        if self._mem_dc:
+            self.gdi32.SelectObject(self._mem_dc, self._old)
+            self.gdi32.DeleteObject(self._bitmap)
+            self.gdi32.DeleteDC(self._mem_dc)
+        self._mem_dc = self._bitmap = self._old = None
+        self._shape = None
+        self.pixels = None
+
+
+class ArrayBlitter:
+    """回放录制的帧序列（离线调试 / 基准测试），接口与 DibBlitter 一致"""
+
+    def __init__(self, frames, loop=True):
+        """
+        :param frames: (h, w, 4) uint8 BGRA 数组列表
+        """
+        self.frames = frames
+        self.loop = loop
+        self.index = 0
+        self.pixels = None
+
+    def size(self, hwnd):
+        height, width = self.frames[0].shape[:2]
+        return (width, height)
+
+    def blit(self, hwnd, size, shape, region):
+        if self.pixels is None or self.pixels.shape[:2] != shape:
+            self.pixels = np.zeros(shape + (4,), dtype=np.uint8)
+        frame = self.frames[min(self.index, len(self.frames) - 1)]
+        self.index += 1
+        if self.loop:
+            self.index %= len(self.frames)
+
+        x, y, w, h = region or ((0, 0) + size)
+        self.pixels[y:y + h, x:x + w] = frame[y:y + h, x:x + w]
+        return self.pixels
+
+    def close(self):
+        self.pixels = None
+
+
+class ChangeTrackingCapture(CaptureSource):
+    """
+    变化跟踪采集
+    缓冲区按图块对齐；每次截取请求区域后与上一帧逐图块比较，
+    记录每个图块最后变化的帧号，使用方据此只处理变化的区域（截取本身不减少）
+    """
+
+    def __init__(self, blitter=None, tile=32):
+        """
+        :param blitter: DibBlitter / ArrayBlitter，默认 DibBlitter
+        :param tile: 图块边长（像素）
+        """
+        self.blitter = blitter or DibBlitter()
+        self.tile = tile
+        self.frame_id = 0
+        self.size = None
+        self.pixels = None       # 当前帧（与 blitter 共享内存）
+        self._previous = None    # 上一帧副本，用于比较
+        self.tile_versions = None
+        self.dirty = None        # 本帧变化的图块
+        self._gray = None
+        self._gray_version = -1
+
+    def capture(self, hwnd, region=None):
+        """
+        截取并更新变化图块
+        :param region: 只截取并比较该区域 (x, y, w, h)，为 None 时整窗
+        :return: 变化区域列表 [(x, y, w, h), ...]，失败时返回 None
+        """
+        size = self.blitter.size(hwnd)
+        if not size or size[0] <= 0 or size[1] <= 0:
+            return None
+        shape = (_padded(size[1], self.tile), _padded(size[0], self.tile))
+
+        if size != self.size:
+            # 窗口尺寸变化：重新分配，整帧视为变化
+            self.size = size
+            self._previous = np.zeros(shape + (4,), dtype=np.uint8)
+            rows, cols = shape[0] // self.tile, shape[1] // self.tile
+            self.tile_versions = np.zeros((rows, cols), dtype=np.int64)
+            self._gray = None
+            region = None
+
+        if region is not None:
+            region = self._clip(region)
+        pixels = self.blitter.blit(hwnd, size, shape, region)
+        if pixels is None:
+            return None
+        self.pixels = pixels
+        self.frame_id += 1
+        self._diff(region)
+        return self.dirty_rects()
+
+    def grab(self, hwnd, region=None):
+        """CaptureSource 接口：返回共享缓冲区的零拷贝 Frame"""
+        if self.capture(hwnd, region) is None:
+            return None
+        return Frame(self.pixels, self.size[0], self.size[1], stride=self.pixels.shape[1] * 4)
+
+    def _clip(self, region):
+        x, y, w, h = region
+        left, top = max(x, 0), max(y, 0)
+        right, bottom = min(x + w, self.size[0]), min(y + h, self.size[1])
+        return (left, top, max(right - left, 0), max(bottom - top, 0))
+
+    def _tile_range(self, region):
+        """区域覆盖的图块行列范围"""
+        t = self.tile
+        if region is None:
+            rows, cols = self.tile_versions.shape
+            return 0, rows, 0, cols
+        x, y, w, h = region
+        return y // t, _padded(y + h, t) // t, x // t, _padded(x + w, t) // t
+
+    def _diff(self, region):
+        """逐图块比较当前帧与上一帧"""
+        t = self.tile
+        r0, r1, c0, c1 = self._tile_range(region)
+        current = self.pixels[r0 * t:r1 * t, c0 * t:c1 * t].view(np.uint32)[..., 0]
+        previous = self._previous[r0 * t:r1 * t, c0 * t:c1 * t].view(np.uint32)[..., 0]
+
+        changed = (current != previous).reshape(r1 - r0, t, c1 - c0, t).any(axis=(1, 3))
+        self.dirty = np.zeros_like(self.tile_versions, dtype=bool)
+        self.dirty[r0:r1, c0:c1] = changed
+        self.tile_versions[self.dirty] = self.frame_id
+
+        # 只把变化的图块写回上一帧副本
+        if changed.mean() > 0.5:
+            previous[...] = current
+        else:
+            for row, col in np.argwhere(changed):
+                rows = slice(row * t, (row + 1) * t)
+                cols = slice(col * t, (col + 1) * t)
+                previous[rows, cols] = current[rows, cols]
+
+    def dirty_rects(self):
+        """本帧变化区域，同一行相邻图块合并"""
+        t = self.tile
+        rects = []
+        for row, line in enumerate(self.dirty):
+            col = 0
+            cols = len(line)
+            while col < cols:
+                if not line[col]:
+                    col += 1
+                    continue
+                start = col
+                while col < cols and line[col]:
+                    col += 1
+                rects.append(self._clip((start * t, row * t, (col - start) * t, t)))
+        return rects
+
+    def changed_since(self, frame_id, region=None):
+        """区域内是否有图块在 frame_id 之后变化过"""
+        if self.tile_versions is None:
+            return True
+        r0, r1, c0, c1 = self._tile_range(self._clip(region) if region else None)
+        block = self.tile_versions[r0:r1, c0:c1]
+        return bool(block.size) and int(block.max()) > frame_id
+
+    def view(self, region=None):
+        """当前帧的零拷贝 BGRA 视图"""
+        width, height = self.size
+        x, y, w, h = self._clip(region) if region else (0, 0, width, height)
+        return self.pixels[y:y + h, x:x + w]
+
+    def gray(self):
+        """灰度图（只重新计算上次调用后变化的图块）"""
+        width, height = self.size
+        t = self.tile
+        stale = self.tile_versions > self._gray_version
+        if self._gray is None or stale.mean() > 0.5:
+            self._gray = _to_gray(self.pixels)
+        else:
+            for row, col in np.argwhere(stale):
+                rows = slice(row * t, (row + 1) * t)
+                cols = slice(col * t, (col + 1) * t)
+                self._gray[rows, cols] = _to_gray(self.pixels[rows, cols])
+        self._gray_version = self.frame_id
+        return self._gray[:height, :width]
+
+    def close(self):
+        self.blitter.close()
+        self.pixels = None
+
+
+def record_frames(hwnd, count, interval=0.05, print_window=False):
+    """录制窗口帧序列（用于 benchmark_capture 离线对比）"""
+    capture = ChangeTrackingCapture(DibBlitter(print_window))
+    frames = []
+    try:
+        for _ in range(count):
+            if capture.capture(hwnd) is not None:
+                frames.append(capture.view().copy())
+            time.sleep(interval)
+    finally:
+        capture.close()
+    return frames
+
+
+def benchmark_capture(frames, tile=32, repeats=3):
+    """
+    对比截取后的处理开销（毫秒/帧），两者都整帧读取画面
+    整帧：每帧新分配缓冲区、复制整帧并整帧转灰度
+    变化跟踪：常驻缓冲区，逐图块比较，只对变化图块转灰度
+    :param frames: 录制的 (h, w, 4) uint8 帧序列
+    :return: {'full_ms', 'tracked_ms', 'dirty_ratio', 'size'}
+    """
+    height, width = frames[0].shape[:2]
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for frame in frames:
+            _to_gray(np.array(frame, copy=True))
+    full_ms = (time.perf_counter() - start) / (repeats * len(frames)) * 1000
+
+    dirty = 0
+    start = time.perf_counter()
+    for _ in range(repeats):
+        capture = ChangeTrackingCapture(ArrayBlitter(frames, loop=False), tile)
+        for _ in frames:
+            capture.capture(None)
+            capture.gray()
+            dirty += float(capture.dirty.mean())
+    tracked_ms = (time.perf_counter() - start) / (repeats * len(frames)) * 1000
+
+    return {
+        'full_ms': full_ms,
+        'tracked_ms': tracked_ms,
+        'dirty_ratio': dirty / (repeats * len(frames)),
+        'size': (width, height),
+    }
\ No newline at end of file
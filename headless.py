@@ -0,0 +1,425 @@
+"""
+游戏技能自动释放工具 - 无界面模式入口
+不加载 Qt，读取配置后直接运行执行核心；F6 暂停/继续，F7 / ESC / Ctrl+C 停止
+可选开启本地控制接口，由脚本发送 start / stop / pause / resume / switch_profile / stats；
+控制接口的 stop 只停止当前执行，进程与控制接口保持运行，start 以当前配置档重新开始
+
+用法:
+    python headless.py --window 游戏窗口标题
+    python headless.py --profile 默认 --process game.exe --log run.log
+    python headless.py --window 游戏 --control-port 47810
+"""
+import time
+
+_START = time.perf_counter()
+
+import sys
+import os
+import ctypes
+import logging
+import argparse
+import threading
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from core.coords import enable_dpi_awareness, POINT_ORIGIN_WINDOW
+from core.window_manager import WindowManager
+from core.skill_runner import SkillRunner
+from core.point_store import PointSet
+from core.input_backend import INPUT_MODE_FOREGROUND
+from core.session_log import session_log_path
+from core.anti_touch import ACTIONS
+from utils.config import ConfigManager
+from utils.hotkey_loop import HotkeyLoop
+
+
+log = logging.getLogger('headless')
+
+
+class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+    _fields_ = [
+        ('cb', ctypes.c_ulong),
+        ('PageFaultCount', ctypes.c_ulong),
+        ('PeakWorkingSetSize', ctypes.c_size_t),
+        ('WorkingSetSize', ctypes.c_size_t),
+        ('QuotaPeakPagedPoolUsage', ctypes.c_size_t),
+        ('QuotaPagedPoolUsage', ctypes.c_size_t),
+        ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t),
+        ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+        ('PagefileUsage', ctypes.c_size_t),
+        ('PeakPagefileUsage', ctypes.c_size_t),
+    ]
+
+
+def working_set_mb():
+    """当前进程工作集（MB），获取失败时返回 None"""
+    counters = PROCESS_MEMORY_COUNTERS()
+    counters.cb = ctypes.sizeof(counters)
+    try:
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        if not ctypes.windll.psapi.GetProcessMemoryInfo(
+                process, ctypes.byref(counters), counters.cb):
+            return None
+    except (AttributeError, OSError):
+        return None
+    return counters.WorkingSetSize / (1024 * 1024)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="技能自动释放（无界面模式）")
+    parser.add_argument('--config', default='config.json', help="配置文件（默认 config.json）")
+    parser.add_argument('--profile', help="使用配置档（profiles 目录）代替配置文件")
+    parser.add_argument('--profiles-dir', default='profiles', help="配置档目录")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--window', help="目标窗口标题（部分匹配）")
+    target.add_argument('--process', help="目标进程名（部分匹配）")
+    parser.add_argument('--log', help="同时写入日志文件")
+    parser.add_argument('--status-interval', type=float, default=5.0,
+                        help="状态输出间隔（秒），0 表示只输出轮次与错误")
+    parser.add_argument('--no-hotkeys', action='store_true', help="不注册全局热键")
+    parser.add_argument('--control-port', type=int,
+                        help="在 127.0.0.1 上开启控制接口（见 utils.control_server）")
+    parser.add_argument('--metrics-port', type=int,
+                        help="在 127.0.0.1 上导出运行指标（/metrics、/metrics.json）")
+    parser.add_argument('--metrics-file', help="定期追加 JSON 指标快照的文件")
+    parser.add_argument('--metrics-interval', type=float, default=10.0, help="指标快照间隔（秒）")
+    parser.add_argument('--session-log-dir',
+                        help="会话日志目录，每次执行写一个二进制日志（用 analyze_log.py 分析）")
+    parser.add_argument('--anti-touch-action', choices=ACTIONS,
+                        help="检测到手动操作后的动作（覆盖配置）：pause 暂停、skip 跳过释放、"
+                             "resume 暂停并在空闲后自动继续")
+    return parser.parse_args(argv)
+
+
+def setup_logging(log_file=None):
+    handlers = [logging.StreamHandler(sys.stdout)]
+    if log_file:
+        handlers.append(logging.FileHandler(log_file, encoding='utf-8'))
+    logging.basicConfig(level=logging.INFO, handlers=handlers,
+                        format='%(asctime)s %(message)s', datefmt='%H:%M:%S')
+
+
+def load_profile(directory, name):
+    """读取配置档，不存在时返回 None"""
+    # 只有使用配置档时才导入（mmap 点集加载）
+    from utils.profiles import ProfileStore
+
+    store = ProfileStore(directory, read_only=True)
+    try:
+        return store.get(name)
+    finally:
+        store.close()
+
+
+def load_config(args):
+    """读取配置档或配置文件，失败时返回 None"""
+    if args.profile:
+        config = load_profile(args.profiles_dir, args.profile)
+        if config is None:
+            log.error(f"配置档不存在: {args.profile}")
+        return config
+
+    config = ConfigManager(args.config).load()
+    if config is None:
+        log.error(f"无法读取配置文件: {args.config}")
+    return config
+
+
+def find_window(window_manager, args):
+    if args.window:
+        return window_manager.find_window_by_title(args.window)
+    return window_manager.find_window_by_process(args.process)
+
+
+def executor_config(config, hwnd):
+    """与图形界面 start_execution 相同的执行配置"""
+    return {
+        'window_handle': hwnd,
+        'points': PointSet.from_points(config.get('skill_points', [])),
+        'point_origin': config.get('point_origin', POINT_ORIGIN_WINDOW),
+        'point_dpi': config.get('point_dpi'),
+        'point_resolution': config.get('point_resolution'),
+        'skill_key': config.get('skill_key', 'q'),
+        'interval': config.get('interval', 100),
+        'round_interval': config.get('round_interval', 5.0),
+        'anti_touch': config.get('anti_touch', True),
+        'anti_touch_policy': config.get('anti_touch_policy', {}),
+        'input_mode': config.get('input_mode', INPUT_MODE_FOREGROUND),
+        'precise_timing': config.get('precise_timing', False),
+        'trajectory': config.get('trajectory', False),
+        'skills': config.get('skills', []),
+        'probes': config.get('probes', []),
+        'templates': config.get('templates', {})
+    }
+
+
+class StatusLog:
+    """执行状态输出：回调只记录最新状态，由主线程按间隔输出，避免拖慢执行线程"""
+
+    def __init__(self, runner):
+        self.runner = runner
+        self.count = 0
+        self.runtime = 0.0
+        self.round = 0
+        self.errors = []
+        runner.status_updated.connect(self.on_status)
+        runner.round_updated.connect(self.on_round)
+        runner.mouse_moved_detected.connect(self.on_mouse_moved)
+        runner.error_occurred.connect(self.on_error)
+        runner.auto_resumed.connect(self.on_auto_resumed)
+
+    def on_status(self, count, pos, runtime, index):
+        self.count = count
+        self.runtime = runtime
+
+    def on_round(self, round_num, progress, waiting, remaining):
+        if waiting and round_num != self.round:
+            self.round = round_num
+            log.info(f"第 {round_num} 轮完成，等待 {remaining:.1f}s")
+
+    def on_mouse_moved(self):
+        remaining = self.runner.auto_resume_remaining()
+        if remaining is None:
+            log.info("检测到手动操作，已自动暂停（F6 继续）")
+        else:
+            log.info(f"检测到手动操作，已自动暂停，空闲 {remaining:.0f}s 后自动继续（F6 立即继续）")
+
+    def on_auto_resumed(self):
+        log.info(f"用户已空闲 {self.runner.anti_touch_policy.idle:.0f}s，自动继续")
+
+    def on_error(self, message):
+        self.errors.append(message)
+        log.error(message)
+
+    def report(self):
+        rate = self.count / self.runtime if self.runtime > 0 else 0.0
+        state = "已暂停" if self.runner.is_paused else "运行中"
+        remaining = self.runner.auto_resume_remaining()
+        if remaining is not None:
+            state += f"（{remaining:.0f}s 后自动继续）"
+        log.info(f"{state}  执行 {self.count} 次  运行 {self.runtime:.1f}s  "
+                 f"{rate:.1f} 次/秒  条件跳过 {self.runner.skipped_count}")
+
+
+class HeadlessApp:
+    """无界面运行：执行核心在工作线程，主线程输出状态并处理控制命令"""
+
+    def __init__(self, args, window_manager, hwnd):
+        self.args = args
+        self.window_manager = window_manager
+        self.hwnd = hwnd
+        self.profile = args.profile
+        self.config = None
+        self.runner = None
+        self.status = None
+        self.worker = None
+        self.errors = []
+        # 控制命令入队或需要立即处理时唤醒主线程
+        self.wake = threading.Event()
+        self.server = None
+        self._switch_to = None
+        # 控制接口停止后空闲等待 start；热键 / Ctrl+C 停止时退出进程
+        self.idle = False
+        self._keep_alive = False
+        self._start = False
+        self._exit = False
+
+    def launch(self, config):
+        self.config = config
+        self.idle = False
+        self._keep_alive = False
+        self._start = False
+        config = executor_config(config, self.hwnd)
+        if self.args.session_log_dir:
+            config['session_log'] = session_log_path(self.args.session_log_dir)
+        if self.args.anti_touch_action:
+            config['anti_touch_policy'] = dict(config['anti_touch_policy'],
+                                               action=self.args.anti_touch_action)
+        self.runner = SkillRunner(config, self.window_manager)
+        self.status = StatusLog(self.runner)
+        self.worker = threading.Thread(target=self.runner.run, daemon=True)
+        self.worker.start()
+
+    def toggle_pause(self):
+        if self.idle:
+            self._start = True
+            self.wake.set()
+            return
+        if self.runner.is_paused:
+            self.runner.resume()
+            log.info("继续执行")
+        else:
+            self.runner.pause()
+            log.info("已暂停")
+
+    def stop(self):
+        """停止并退出（热键）"""
+        self._keep_alive = False
+        self._exit = True
+        self.runner.stop()
+        self.wake.set()
+
+    # ==================== 控制接口 ====================
+
+    def start_control_server(self, port):
+        from utils.control_server import ControlServer
+
+        server = ControlServer(port, stats=self.control_stats, notify=self.wake.set)
+        try:
+            log.info(f"控制接口: 127.0.0.1:{server.start()}")
+        except OSError as e:
+            log.error(f"启动控制接口失败: {e}")
+            return
+        self.server = server
+
+    def handle_control_command(self, name, args):
+        """执行控制接口命令（主线程）"""
+        runner = self.runner
+        if name == 'start' and (self.idle or self._keep_alive):
+            # 已停止（或正在停止）：在主循环中以当前配置档重新启动
+            self._start = True
+        elif name in ('start', 'resume'):
+            if runner.is_paused and not self.idle:
+                self.toggle_pause()
+        elif name == 'pause':
+            if not runner.is_paused and not self.idle:
+                self.toggle_pause()
+        elif name == 'stop':
+            if not self.idle:
+                log.info("控制接口: 停止")
+                self._keep_alive = True
+                runner.stop()
+        elif name == 'switch_profile':
+            config = load_profile(self.args.profiles_dir, args.get('name'))
+            if config is None:
+                raise ValueError(f"配置档不存在: {args.get('name')}")
+            if self.idle:
+                # 已停止时只切换，start 后生效
+                self.profile, self.config = args['name'], config
+                log.info(f"切换配置档: {self.profile}")
+            else:
+                # 当前执行停止后在主循环中以新配置重新启动
+                self._switch_to = (args['name'], config)
+                runner.stop()
+        return self.control_stats()
+
+    def control_stats(self):
+        """当前状态（控制接口服务线程中调用，只读）"""
+        runner = self.runner
+        return {
+            'profile': self.profile,
+            'window': self.hwnd,
+            'running': runner.running and not self.idle,
+            'paused': runner.is_paused,
+            'exec_count': runner.exec_count,
+            'round': runner.current_round,
+            'runtime': time.time() - runner.start_time if runner.start_time else 0.0,
+            'skipped': runner.skipped_count,
+            'auto_resume_in': runner.auto_resume_remaining(),
+        }
+
+    # ==================== 主循环 ====================
+
+    def run(self, config):
+        self.launch(config)
+        next_report = time.perf_counter() + self.args.status_interval
+        try:
+            while True:
+                self.wake.wait(0.2)
+                self.wake.clear()
+                if self.server:
+                    self.server.drain(self.handle_control_command)
+                if self.idle:
+                    if self._exit:
+                        break
+                    if self._start:
+                        self._start = False
+                        log.info(f"重新开始: {self.profile or self.args.config}")
+                        self.launch(self.config)
+                        next_report = time.perf_counter() + self.args.status_interval
+                    continue
+                if self.args.status_interval > 0 and time.perf_counter() >= next_report:
+                    self.status.report()
+                    next_report += self.args.status_interval
+                if self.worker.is_alive():
+                    continue
+
+                self.worker.join()
+                self.status.report()
+                self.errors.extend(self.status.errors)
+                if self._exit:
+                    # 热键退出优先于尚未生效的切换配置档
+                    self._switch_to = None
+                    break
+                if self._switch_to is not None:
+                    self.profile, config = self._switch_to
+                    self._switch_to = None
+                    log.info(f"切换配置档: {self.profile}")
+                    self.launch(config)
+                elif self._keep_alive:
+                    self.idle = True
+                    log.info("已停止，等待控制接口 start 命令（F7 / ESC / Ctrl+C 退出）")
+                else:
+                    break
+        except KeyboardInterrupt:
+            log.info("收到中断，正在停止")
+            self.runner.stop()
+            self.worker.join()
+            self.status.report()
+        finally:
+            if self.server:
+                self.server.stop()
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    setup_logging(args.log)
+    enable_dpi_awareness()
+
+    config = load_config(args)
+    if config is None:
+        return 1
+
+    window_manager = WindowManager()
+    hwnd = find_window(window_manager, args)
+    if not hwnd:
+        log.error(f"未找到目标窗口: {args.window or args.process}")
+        return 1
+
+    app = HeadlessApp(args, window_manager, hwnd)
+
+    hotkeys = None
+    if not args.no_hotkeys:
+        hotkeys = HotkeyLoop()
+        hotkeys.register_hotkey('F6', app.toggle_pause)
+        hotkeys.register_hotkey('F7', app.stop)
+        hotkeys.register_hotkey('Escape', app.stop)
+        threading.Thread(target=hotkeys.run, daemon=True).start()
+    if args.control_port:
+        app.start_control_server(args.control_port)
+    exporters = []
+    if args.metrics_port or args.metrics_file:
+        from core.metrics import start_exporters
+        exporters = start_exporters(args.metrics_port, args.metrics_file, args.metrics_interval)
+
+    memory = working_set_mb()
+    log.info(f"启动完成: {(time.perf_counter() - _START) * 1000:.0f}ms"
+             + (f"  内存 {memory:.1f}MB" if memory is not None else ""))
+    log.info(f"目标窗口 0x{hwnd:X}，坐标点 {len(config.get('skill_points') or [])} 个；"
+             "F6 暂停/继续，F7 / ESC / Ctrl+C 停止")
+
+    try:
+        app.run(config)
+    finally:
+        if hotkeys:
+            hotkeys.stop()
+        for exporter in exporters:
+            exporter.stop()
+
+    log.info("已停止")
+    return 1 if app.errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
\ No newline at end of file
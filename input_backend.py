@@ -0,0 +1,284 @@
+"""
+输入投递后端 - 前台模拟 / 后台消息
+"""
+import time
+import ctypes
+from ctypes import wintypes
+
+from core.coords import desktop, MOUSEEVENTF_VIRTUALDESK
+from core import metrics
+
+
+# Windows API
+user32 = ctypes.windll.user32
+
+# 鼠标事件常量
+MOUSEEVENTF_MOVE = 0x0001
+MOUSEEVENTF_ABSOLUTE = 0x8000
+INPUT_MOUSE = 0
+
+# 键盘事件常量
+KEYEVENTF_KEYUP = 0x0002
+
+# 窗口消息
+WM_MOUSEMOVE = 0x0200
+WM_KEYDOWN = 0x0100
+WM_KEYUP = 0x0101
+MAPVK_VK_TO_VSC = 0
+
+# 虚拟键码映射
+VK_CODE = {
+    'a': 0x41, 'b': 0x42, 'c': 0x43, 'd': 0x44, 'e': 0x45,
+    'f': 0x46, 'g': 0x47, 'h': 0x48, 'i': 0x49, 'j': 0x4A,
+    'k': 0x4B, 'l': 0x4C, 'm': 0x4D, 'n': 0x4E, 'o': 0x4F,
+    'p': 0x50, 'q': 0x51, 'r': 0x52, 's': 0x53, 't': 0x54,
+    'u': 0x55, 'v': 0x56, 'w': 0x57, 'x': 0x58, 'y': 0x59,
+    'z': 0x5A,
+    '0': 0x30, '1': 0x31, '2': 0x32, '3': 0x33, '4': 0x34,
+    '5': 0x35, '6': 0x36, '7': 0x37, '8': 0x38, '9': 0x39,
+    'f1': 0x70, 'f2': 0x71, 'f3': 0x72, 'f4': 0x73, 'f5': 0x74,
+    'f6': 0x75, 'f7': 0x76, 'f8': 0x77, 'f9': 0x78, 'f10': 0x79,
+    'f11': 0x7A, 'f12': 0x7B,
+    'space': 0x20, 'enter': 0x0D, 'tab': 0x09, 'shift': 0x10,
+    'ctrl': 0x11, 'alt': 0x12, 'esc': 0x1B,
+}
+
+# 输入模式
+INPUT_MODE_FOREGROUND = 'foreground'
+INPUT_MODE_BACKGROUND = 'background'
+
+
+class MOUSEINPUT(ctypes.Structure):
+    _fields_ = [
+        ('dx', wintypes.LONG),
+        ('dy', wintypes.LONG),
+        ('mouseData', wintypes.DWORD),
+        ('dwFlags', wintypes.DWORD),
+        ('time', wintypes.DWORD),
+        ('dwExtraInfo', ctypes.c_size_t),
+    ]
+
+
+class KEYBDINPUT(ctypes.Structure):
+    _fields_ = [
+        ('wVk', wintypes.WORD),
+        ('wScan', wintypes.WORD),
+        ('dwFlags', wintypes.DWORD),
+        ('time', wintypes.DWORD),
+        ('dwExtraInfo', ctypes.c_size_t),
+    ]
+
+
+class HARDWAREINPUT(ctypes.Structure):
+    _fields_ = [
+        ('uMsg', wintypes.DWORD),
+        ('wParamL', wintypes.WORD),
+        ('wParamH', wintypes.WORD),
+    ]
+
+
+class _INPUTUNION(ctypes.Union):
+    _fields_ = [('mi', MOUSEINPUT), ('ki', KEYBDINPUT), ('hi', HARDWAREINPUT)]
+
+
+class INPUT(ctypes.Structure):
+    _anonymous_ = ('u',)
+    _fields_ = [('type', wintypes.DWORD), ('u', _INPUTUNION)]
+
+
+def send_mouse_path(points):
+    """
+    一次 SendInput 投递一段光标路径（屏幕坐标，按虚拟桌面归一化）
+    :return: 系统实际插入的事件数
+    """
+    count = len(points)
+    inputs = (INPUT * count)()
+    flags = MOUSEEVENTF_MOVE | MOUSEEVENTF_ABSOLUTE | MOUSEEVENTF_VIRTUALDESK
+    normalize = desktop.normalize
+    for item, (x, y) in zip(inputs, points):
+        item.type = INPUT_MOUSE
+        mi = item.mi
+        mi.dx, mi.dy = normalize(x, y)
+        mi.dwFlags = flags
+    return user32.SendInput(count, inputs, ctypes.sizeof(INPUT))
+
+
+def resolve_vk(key):
+    """键名转虚拟键码，无法识别时返回 None"""
+    key = key.lower()
+    if key in VK_CODE:
+        return VK_CODE[key]
+    return ord(key.upper()) if len(key) == 1 else None
+
+
+class BackendStats:
+    """投递统计 - 每次释放的耗时与送达情况"""
+
+    __slots__ = ('casts', 'delivered', 'total_time', 'last_time')
+
+    def __init__(self):
+        self.casts = 0
+        self.delivered = 0
+        self.total_time = 0.0
+        self.last_time = 0.0
+
+    def record(self, elapsed, ok):
+        self.casts += 1
+        if ok:
+            self.delivered += 1
+        self.total_time += elapsed
+        self.last_time = elapsed
+
+    @property
+    def avg_ms(self):
+        return self.total_time / self.casts * 1000 if self.casts else 0.0
+
+    @property
+    def delivery_rate(self):
+        return self.delivered / self.casts * 100 if self.casts else 0.0
+
+
+class InputBackend:
+    """输入后端基类"""
+
+    name = ''
+    # 是否移动真实光标（决定防误触是否有意义）
+    moves_cursor = True
+
+    def __init__(self):
+        self.stats = BackendStats()
+
+    def cast(self, hwnd, screen_x, screen_y, key):
+        """在屏幕坐标处释放一次技能，返回是否送达"""
+        start = time.perf_counter()
+        ok = False
+        try:
+            ok = self._cast(hwnd, screen_x, screen_y, key)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.stats.record(elapsed, ok)
+            metrics.casts.inc()
+            if not ok:
+                metrics.cast_failures.inc()
+            metrics.cast_latency.observe(elapsed)
+        return ok
+
+    def _cast(self, hwnd, screen_x, screen_y, key):
+        raise NotImplementedError
+
+
+class ForegroundBackend(InputBackend):
+    """前台模拟 - 激活窗口并移动真实光标"""
+
+    name = INPUT_MODE_FOREGROUND
+    moves_cursor = True
+
+    def __init__(self, trajectory=None):
+        """
+        :param trajectory: TrajectoryCache，设置时沿拟人轨迹移动光标，否则直接瞬移
+        """
+        super().__init__()
+        self.trajectory = trajectory
+
+    def _cast(self, hwnd, screen_x, screen_y, key):
+        # ★ 关键：先激活游戏窗口
+        self._activate_window(hwnd)
+        time.sleep(0.01)
+
+        self._move_mouse(screen_x, screen_y)
+        time.sleep(0.02)
+
+        return self._press_key(key)
+
+    def _activate_window(self, hwnd):
+        """激活窗口，使其获得焦点"""
+        # 检查窗口是否已经是前台窗口
+        if user32.GetForegroundWindow() == hwnd:
+            return
+        metrics.focus_reactivations.inc()
+
+        # 如果窗口最小化，先恢复
+        if user32.IsIconic(hwnd):
+            user32.ShowWindow(hwnd, 9)  # SW_RESTORE
+
+        user32.SetForegroundWindow(hwnd)
+
+    def _move_mouse(self, x, y):
+        """移动鼠标到指定位置（按虚拟桌面归一化，支持副显示器）"""
+        if self.trajectory:
+            # 从光标当前位置出发（手动移动过光标后也能衔接），分批按时间投递
+            cursor = wintypes.POINT()
+            if user32.GetCursorPos(ctypes.byref(cursor)):
+                self._send_path(self.trajectory.path(cursor.x, cursor.y, x, y))
+                return
+
+        abs_x, abs_y = desktop.normalize(x, y)
+
+        user32.mouse_event(
+            MOUSEEVENTF_MOVE | MOUSEEVENTF_ABSOLUTE | MOUSEEVENTF_VIRTUALDESK,
+            abs_x, abs_y, 0, 0
+        )
+
+    def _send_path(self, path):
+        """每批一次 SendInput，批间等待，保留缓动的时间分布"""
+        batches = self.trajectory.batches(path)
+        pause = self.trajectory.pause(batches)
+        for i, batch in enumerate(batches):
+            if i:
+                time.sleep(pause)
+            send_mouse_path(batch)
+
+    def _press_key(self, key):
+        """按下并释放键"""
+        vk = resolve_vk(key)
+        if not vk:
+            return False
+
+        user32.keybd_event(vk, 0, 0, 0)
+        time.sleep(0.01)
+        user32.keybd_event(vk, 0, KEYEVENTF_KEYUP, 0)
+        return True
+
+
+class BackgroundBackend(InputBackend):
+    """后台消息 - 直接投递到目标窗口消息队列，不抢焦点、不动光标"""
+
+    name = INPUT_MODE_BACKGROUND
+    moves_cursor = False
+
+    def _cast(self, hwnd, screen_x, screen_y, key):
+        vk = resolve_vk(key)
+        if not vk:
+            return False
+
+        # 屏幕坐标 -> 客户区坐标
+        point = wintypes.POINT(screen_x, screen_y)
+        user32.ScreenToClient(hwnd, ctypes.byref(point))
+        pos = ((point.y & 0xFFFF) << 16) | (point.x & 0xFFFF)
+
+        scan = user32.MapVirtualKeyW(vk, MAPVK_VK_TO_VSC)
+        down = 1 | (scan << 16)
+        up = down | (1 << 30) | (1 << 31)
+
+        ok = bool(self._post(hwnd, WM_MOUSEMOVE, 0, pos))
+        ok = bool(self._post(hwnd, WM_KEYDOWN, vk, down)) and ok
+        ok = bool(self._post(hwnd, WM_KEYUP, vk, up)) and ok
+        return ok
+
+    def _post(self, hwnd, msg, wparam, lparam):
+        return user32.PostMessageW(
+            hwnd, msg, wintypes.WPARAM(wparam), wintypes.LPARAM(lparam)
+        )
+
+
+def create_backend(mode, trajectory=False):
+    """
+    按模式名创建输入后端
+    :param trajectory: 前台模拟时沿拟人轨迹移动光标
+    """
+    if mode == INPUT_MODE_BACKGROUND:
+        return BackgroundBackend()
+    if trajectory:
+        from core.trajectory import TrajectoryCache
+        return ForegroundBackend(TrajectoryCache())
+    return ForegroundBackend()
\ No newline at end of file
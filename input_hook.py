@@ -0,0 +1,153 @@
+"""
+低级输入钩子 - 区分程序注入与物理输入
+"""
+import ctypes
+import threading
+from collections import namedtuple
+from ctypes import wintypes
+
+
+# 独立的 user32 实例，设置 argtypes 不影响其他模块
+user32 = ctypes.WinDLL('user32', use_last_error=True)
+kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+
+WH_KEYBOARD_LL = 13
+WH_MOUSE_LL = 14
+WM_QUIT = 0x0012
+WM_MOUSEMOVE = 0x0200
+LLMHF_INJECTED = 0x00000001
+LLKHF_EXTENDED = 0x00000001
+LLKHF_INJECTED = 0x00000010
+LLKHF_UP = 0x00000080
+
+# 输入事件类型
+EVENT_MOVE = 'move'
+EVENT_BUTTON = 'button'
+
+LRESULT = ctypes.c_ssize_t
+HOOKPROC = ctypes.WINFUNCTYPE(LRESULT, ctypes.c_int, wintypes.WPARAM, wintypes.LPARAM)
+
+
+class MSLLHOOKSTRUCT(ctypes.Structure):
+    _fields_ = [
+        ("pt", wintypes.POINT),
+        ("mouseData", wintypes.DWORD),
+        ("flags", wintypes.DWORD),
+        ("time", wintypes.DWORD),
+        ("dwExtraInfo", ctypes.c_size_t),
+    ]
+
+
+class KBDLLHOOKSTRUCT(ctypes.Structure):
+    _fields_ = [
+        ("vkCode", wintypes.DWORD),
+        ("scanCode", wintypes.DWORD),
+        ("flags", wintypes.DWORD),
+        ("time", wintypes.DWORD),
+        ("dwExtraInfo", ctypes.c_size_t),
+    ]
+
+
+user32.SetWindowsHookExW.argtypes = [ctypes.c_int, HOOKPROC, wintypes.HINSTANCE, wintypes.DWORD]
+user32.SetWindowsHookExW.restype = wintypes.HHOOK
+user32.CallNextHookEx.argtypes = [wintypes.HHOOK, ctypes.c_int, wintypes.WPARAM, wintypes.LPARAM]
+user32.CallNextHookEx.restype = LRESULT
+user32.UnhookWindowsHookEx.argtypes = [wintypes.HHOOK]
+user32.PostThreadMessageW.argtypes = [wintypes.DWORD, wintypes.UINT, wintypes.WPARAM, wintypes.LPARAM]
+kernel32.GetModuleHandleW.restype = wintypes.HMODULE
+
+
+# 输入事件: kind 类型, x/y 屏幕坐标, injected 是否程序注入, time 毫秒时间戳,
+# message 原始鼠标消息（WM_LBUTTONDOWN 等）, data mouseData（滚轮增量、X 键序号在高 16 位）
+InputEvent = namedtuple('InputEvent', ['kind', 'x', 'y', 'injected', 'time', 'message', 'data'],
+                        defaults=(0, 0))
+
+# 键盘事件: vk 虚拟键码, down 按下/抬起, injected 是否程序注入, extended 扩展键, time 毫秒时间戳
+KeyEvent = namedtuple('KeyEvent', ['vk', 'down', 'injected', 'extended', 'time'])
+
+
+class LowLevelHook(threading.Thread):
+    """低级输入钩子线程（子类指定钩子类型并把原始结构转为事件）"""
+
+    hook_type = None
+    name_text = ''
+
+    def __init__(self, callback):
+        """
+        :param callback: 回调函数，在钩子线程中调用，需尽快返回
+        """
+        super().__init__(daemon=True)
+        self.callback = callback
+        self.installed = threading.Event()
+        self._thread_id = None
+        self._hook = None
+        # 保持引用，防止回调被回收
+        self._proc = HOOKPROC(self._hook_proc)
+
+    def _event(self, w_param, l_param):
+        raise NotImplementedError
+
+    def _hook_proc(self, n_code, w_param, l_param):
+        if n_code >= 0:
+            try:
+                self.callback(self._event(w_param, l_param))
+            except Exception as e:
+                print(f"{self.name_text}钩子回调错误: {e}")
+        return user32.CallNextHookEx(self._hook, n_code, w_param, l_param)
+
+    def run(self):
+        """安装钩子并运行消息循环"""
+        self._thread_id = kernel32.GetCurrentThreadId()
+        self._hook = user32.SetWindowsHookExW(
+            self.hook_type, self._proc, kernel32.GetModuleHandleW(None), 0
+        )
+        if not self._hook:
+            print(f"安装{self.name_text}钩子失败")
+            self.installed.set()
+            return
+        self.installed.set()
+
+        msg = wintypes.MSG()
+        while user32.GetMessageW(ctypes.byref(msg), None, 0, 0) > 0:
+            pass
+
+        user32.UnhookWindowsHookEx(self._hook)
+        self._hook = None
+
+    def stop(self):
+        """卸载钩子并结束线程"""
+        self.installed.wait(1.0)
+        if self._thread_id is not None and self.is_alive():
+            user32.PostThreadMessageW(self._thread_id, WM_QUIT, 0, 0)
+            self.join()
+
+
+class MouseHook(LowLevelHook):
+    """低级鼠标钩子线程，回调参数为 InputEvent"""
+
+    hook_type = WH_MOUSE_LL
+    name_text = '鼠标'
+
+    def _event(self, w_param, l_param):
+        info = ctypes.cast(l_param, ctypes.POINTER(MSLLHOOKSTRUCT)).contents
+        kind = EVENT_MOVE if w_param == WM_MOUSEMOVE else EVENT_BUTTON
+        return InputEvent(
+            kind, info.pt.x, info.pt.y,
+            bool(info.flags & LLMHF_INJECTED), info.time,
+            w_param, info.mouseData
+        )
+
+
+class KeyboardHook(LowLevelHook):
+    """低级键盘钩子线程，回调参数为 KeyEvent"""
+
+    hook_type = WH_KEYBOARD_LL
+    name_text = '键盘'
+
+    def _event(self, w_param, l_param):
+        info = ctypes.cast(l_param, ctypes.POINTER(KBDLLHOOKSTRUCT)).contents
+        return KeyEvent(
+            info.vkCode, not info.flags & LLKHF_UP,
+            bool(info.flags & LLKHF_INJECTED), bool(info.flags & LLKHF_EXTENDED),
+            info.time
+        )
\ No newline at end of file
@@ -0,0 +1,466 @@
+"""
+输入宏 - 录制鼠标移动、鼠标键、滚轮与键盘按下/抬起，按原始时间戳高精度回放
+录制时钩子线程只打包入队，由后台线程批量写入；回放逐块读取文件，
+事件再多也不会整个载入内存，每个事件按截止时间调度并统计与录制时间的误差
+
+文件格式（小端）:
+    文件头  magic 'AMCR' | 版本 u16 | 标志 u16 | 开始时间 f64（time.time）
+    事件    时间 f64（相对开始，秒）| 类型 u8 | 参数 i16 | x i32 | y i32
+            参数为鼠标键序号 / 滚轮增量 / 虚拟键码（扩展键加 KEY_EXTENDED）
+标志含 RELATIVE 时坐标相对目标窗口客户区原点，回放时按窗口当前位置平移
+"""
+import os
+import time
+import ctypes
+import struct
+import threading
+from collections import deque, namedtuple
+
+from core.coords import desktop, WindowTransform, POINT_ORIGIN_CLIENT, MOUSEEVENTF_VIRTUALDESK
+from core.execution_control import ExecutionControl
+from core.input_backend import (
+    MOUSEEVENTF_MOVE, MOUSEEVENTF_ABSOLUTE, KEYEVENTF_KEYUP, MAPVK_VK_TO_VSC
+)
+from core.timing import PreciseTimer, PeriodHistogram
+from utils.input_hook import MouseHook, KeyboardHook, EVENT_MOVE
+
+
+# Windows API
+user32 = ctypes.windll.user32
+
+MAGIC = b'AMCR'
+VERSION = 1
+HEADER = struct.Struct('<4sHHd')
+EVENT = struct.Struct('<dBhii')
+
+# 文件头标志
+RELATIVE = 0x0001
+
+# 事件类型
+MOVE = 1
+BUTTON_DOWN = 2
+BUTTON_UP = 3
+WHEEL = 4
+HWHEEL = 5
+KEY_DOWN = 6
+KEY_UP = 7
+
+KIND_NAMES = {
+    MOVE: '移动', BUTTON_DOWN: '鼠标按下', BUTTON_UP: '鼠标抬起',
+    WHEEL: '滚轮', HWHEEL: '水平滚轮', KEY_DOWN: '按键按下', KEY_UP: '按键抬起',
+}
+
+# 鼠标键序号
+LEFT = 1
+RIGHT = 2
+MIDDLE = 3
+X1 = 4
+X2 = 5
+
+# 虚拟键码参数中的扩展键标志
+KEY_EXTENDED = 0x100
+
+# 低级鼠标钩子消息 -> (事件类型, 鼠标键)；X 键与滚轮的参数在 mouseData 高 16 位
+MOUSE_MESSAGES = {
+    0x0201: (BUTTON_DOWN, LEFT), 0x0202: (BUTTON_UP, LEFT),
+    0x0204: (BUTTON_DOWN, RIGHT), 0x0205: (BUTTON_UP, RIGHT),
+    0x0207: (BUTTON_DOWN, MIDDLE), 0x0208: (BUTTON_UP, MIDDLE),
+    0x020B: (BUTTON_DOWN, None), 0x020C: (BUTTON_UP, None),
+    0x020A: (WHEEL, None), 0x020E: (HWHEEL, None),
+}
+
+# mouse_event 标志
+MOUSEEVENTF_WHEEL = 0x0800
+MOUSEEVENTF_HWHEEL = 0x1000
+KEYEVENTF_EXTENDEDKEY = 0x0001
+
+# 鼠标键 -> (按下标志, 抬起标志)
+BUTTON_FLAGS = {
+    LEFT: (0x0002, 0x0004),
+    RIGHT: (0x0008, 0x0010),
+    MIDDLE: (0x0020, 0x0040),
+    X1: (0x0080, 0x0100),
+    X2: (0x0080, 0x0100),
+}
+
+Header = namedtuple('Header', 'start_time relative')
+Event = namedtuple('Event', 't kind code x y')
+
+
+def _high_word(data):
+    """mouseData 高 16 位（有符号）"""
+    return ctypes.c_short((data >> 16) & 0xFFFF).value
+
+
+# ==================== 录制 ====================
+
+class MacroRecorder:
+    """宏录制器（钩子回调只打包入队，不做磁盘 I/O；程序注入的输入不录制）"""
+
+    def __init__(self, path, hwnd=None, ignore_keys=(), flush_interval=0.5,
+                 buffer_size=64 * 1024):
+        """
+        :param hwnd: 目标窗口，设置时坐标记录为相对其客户区原点
+        :param ignore_keys: 不录制的虚拟键码（如控制录制的热键）
+        :param flush_interval: 后台线程写入间隔（秒）
+        """
+        self.path = path
+        self.hwnd = hwnd
+        self.ignore_keys = set(ignore_keys)
+        self.flush_interval = flush_interval
+        self.buffer_size = buffer_size
+        self.origin = None
+        self.ox = self.oy = 0
+        self.count = 0
+
+        # deque 的 append / popleft 为原子操作，两个钩子线程入队无需加锁
+        self._queue = deque()
+        self._stop = threading.Event()
+        self._file = None
+        self._thread = None
+        self._hooks = []
+
+    def start(self):
+        """
+        写入文件头并安装钩子
+        目标窗口位置获取失败时抛出 ValueError，文件无法创建时抛出 OSError
+        """
+        flags = 0
+        if self.hwnd:
+            transform = WindowTransform(self.hwnd, POINT_ORIGIN_CLIENT)
+            if not transform.update():
+                raise ValueError("无法获取目标窗口位置")
+            self.ox, self.oy = transform.ox, transform.oy
+            flags |= RELATIVE
+
+        self._file = open(self.path, 'wb', buffering=self.buffer_size)
+        self._file.write(HEADER.pack(MAGIC, VERSION, flags, time.time()))
+        self._thread = threading.Thread(target=self._writer_loop, daemon=True)
+        self._thread.start()
+
+        self.origin = time.perf_counter()
+        self._hooks = [MouseHook(self._on_mouse), KeyboardHook(self._on_key)]
+        for hook in self._hooks:
+            hook.start()
+        for hook in self._hooks:
+            hook.installed.wait(1.0)
+
+    def _on_mouse(self, event):
+        """鼠标钩子回调（钩子线程）"""
+        if event.injected:
+            return
+        t = time.perf_counter() - self.origin
+        if event.kind == EVENT_MOVE:
+            kind, code = MOVE, 0
+        else:
+            kind, code = MOUSE_MESSAGES.get(event.message, (None, None))
+            if kind is None:
+                return
+            if kind in (WHEEL, HWHEEL):
+                code = _high_word(event.data)
+            elif code is None:
+                # XBUTTON1 = 1, XBUTTON2 = 2
+                code = X1 + _high_word(event.data) - 1
+        self._queue.append(EVENT.pack(t, kind, code, event.x - self.ox, event.y - self.oy))
+        self.count += 1
+
+    def _on_key(self, event):
+        """键盘钩子回调（钩子线程）"""
+        if event.injected or event.vk in self.ignore_keys:
+            return
+        code = event.vk | (KEY_EXTENDED if event.extended else 0)
+        self._queue.append(EVENT.pack(
+            time.perf_counter() - self.origin, KEY_DOWN if event.down else KEY_UP, code, 0, 0
+        ))
+        self.count += 1
+
+    def _writer_loop(self):
+        """后台写入线程"""
+        while not self._stop.wait(self.flush_interval):
+            self._drain()
+            self._file.flush()
+        self._drain()
+
+    def _drain(self):
+        chunks = []
+        queue = self._queue
+        while queue:
+            chunks.append(queue.popleft())
+        if chunks:
+            try:
+                self._file.write(b''.join(chunks))
+            except OSError as e:
+                print(f"写入宏文件失败: {e}")
+
+    def stop(self):
+        """
+        卸载钩子，写出剩余事件并关闭文件
+        :return: 录制的事件数
+        """
+        for hook in self._hooks:
+            hook.stop()
+        self._hooks = []
+        if self._thread:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+            self._file.close()
+        return self.count
+
+
+# ==================== 读取 ====================
+
+def read_header(f):
+    data = f.read(HEADER.size)
+    if len(data) < HEADER.size:
+        raise ValueError("宏文件不完整")
+    magic, version, flags, start_time = HEADER.unpack(data)
+    if magic != MAGIC:
+        raise ValueError("不是宏文件")
+    if version != VERSION:
+        raise ValueError(f"不支持的宏文件版本: {version}")
+    return Header(start_time, bool(flags & RELATIVE))
+
+
+def event_count(path):
+    """按文件大小计算事件数（不读取内容）"""
+    return max(os.path.getsize(path) - HEADER.size, 0) // EVENT.size
+
+
+def iter_events(path, chunk_events=4096, raw=False):
+    """
+    逐块读取事件（内存占用与文件大小无关）
+    录制中断导致的不完整尾部事件会被忽略
+    :param raw: 直接返回解包的元组，回放时更快
+    :return: (Header, Event 迭代器)
+    """
+    f = open(path, 'rb')
+    try:
+        header = read_header(f)
+    except ValueError:
+        f.close()
+        raise
+
+    def events():
+        size = EVENT.size
+        with f:
+            while True:
+                data = f.read(size * chunk_events)
+                usable = len(data) - len(data) % size
+                if raw:
+                    yield from EVENT.iter_unpack(data[:usable])
+                else:
+                    for values in EVENT.iter_unpack(data[:usable]):
+                        yield Event(*values)
+                if usable < size * chunk_events:
+                    return
+
+    return header, events()
+
+
+def summarize(path):
+    """
+    流式统计宏文件
+    :return: {'header', 'events', 'duration', 'kinds': {类型: 数量}}
+    """
+    header, events = iter_events(path, raw=True)
+    kinds = {}
+    count = 0
+    last = 0.0
+    for t, kind, _, _, _ in events:
+        kinds[kind] = kinds.get(kind, 0) + 1
+        count += 1
+        last = t
+    return {'header': header, 'events': count, 'duration': last, 'kinds': kinds}
+
+
+# ==================== 回放 ====================
+
+class MacroPlayer:
+    """
+    宏回放器：逐块读取事件，每个事件按 开始时间 + 录制时间 / 倍速 的截止时间投递
+    截止时间用粗睡眠 + 自旋等待（PreciseTimer），投递误差计入直方图
+    暂停时松开回放中按下的键，继续后顺延时间基准，不补发积压事件
+    """
+
+    def __init__(self, path, hwnd=None, speed=1.0):
+        """
+        :param hwnd: 目标窗口，回放相对窗口录制的宏时必需
+        :param speed: 倍速，0 表示不等待、尽快投递
+        """
+        self.path = path
+        self.hwnd = hwnd
+        self.speed = speed
+        self.control = ExecutionControl()
+        self.timer = PreciseTimer(self.control)
+        # 投递时间误差（实际 - 截止时间，毫秒）
+        self.histogram = PeriodHistogram()
+        self.transform = None
+        self.played = 0
+        self.recorded = 0.0
+        self.duration = 0.0
+        self.paused_time = 0.0
+        self._base = 0.0
+        self._keys = set()
+        self._buttons = set()
+
+    @property
+    def running(self):
+        return self.control.running
+
+    @property
+    def is_paused(self):
+        return self.control.paused
+
+    def pause(self):
+        self.control.pause()
+
+    def resume(self):
+        self.control.resume()
+
+    def stop(self):
+        """请求停止（不等待回放线程结束）"""
+        self.control.stop()
+
+    def run(self):
+        """
+        阻塞回放到结束或停止
+        文件无效或缺少目标窗口时抛出 ValueError
+        :return: stats()
+        """
+        header, events = iter_events(self.path, raw=True)
+        if header.relative:
+            if not self.hwnd:
+                events.close()
+                raise ValueError("宏按窗口相对坐标录制，回放需要指定目标窗口")
+            self.transform = WindowTransform(self.hwnd, POINT_ORIGIN_CLIENT)
+            if not self.transform.update():
+                events.close()
+                raise ValueError("无法获取目标窗口位置")
+
+        self.control.start()
+        self.timer.start()
+        self.histogram.reset()
+        self.played = 0
+        self.paused_time = 0.0
+        speed = self.speed
+        start = self._base = time.perf_counter()
+        previous = 0.0
+        try:
+            for t, kind, code, x, y in events:
+                if speed > 0:
+                    deadline = self._wait(t / speed, (t - previous) / speed)
+                    if deadline is None:
+                        break
+                else:
+                    if not self.control.running:
+                        break
+                    deadline = time.perf_counter()
+                self.histogram.record((time.perf_counter() - deadline) * 1000)
+                self._inject(kind, code, x, y)
+                self.played += 1
+                previous = self.recorded = t
+        finally:
+            events.close()
+            self._release_all()
+            self.timer.close()
+            self.duration = time.perf_counter() - start - self.paused_time
+            self.control.stop()
+        return self.stats()
+
+    def _wait(self, offset, gap):
+        """
+        等待到 基准 + offset，期间暂停则阻塞到继续并顺延基准
+        :return: 截止时间，已停止时返回 None
+        """
+        control = self.control
+        while True:
+            deadline = self._base + offset
+            if self.timer.sleep_until(deadline, gap) and control.running and not control.paused:
+                return deadline
+            if not control.running:
+                return None
+            paused_at = time.perf_counter()
+            self._release_all()
+            if not control.wait_while_paused():
+                return None
+            paused = time.perf_counter() - paused_at
+            self._base += paused
+            self.paused_time += paused
+            if self.transform:
+                self.transform.update()
+
+    def _inject(self, kind, code, x, y):
+        if kind == KEY_DOWN or kind == KEY_UP:
+            vk = code & 0xFF
+            flags = KEYEVENTF_EXTENDEDKEY if code & KEY_EXTENDED else 0
+            if kind == KEY_UP:
+                flags |= KEYEVENTF_KEYUP
+                self._keys.discard(code)
+            else:
+                self._keys.add(code)
+            user32.keybd_event(vk, user32.MapVirtualKeyW(vk, MAPVK_VK_TO_VSC), flags, 0)
+            return
+
+        if self.transform:
+            self.transform.update()
+            x, y = self.transform.place(x, y)
+        abs_x, abs_y = desktop.normalize(x, y)
+        flags = MOUSEEVENTF_MOVE | MOUSEEVENTF_ABSOLUTE | MOUSEEVENTF_VIRTUALDESK
+        data = 0
+        if kind == BUTTON_DOWN or kind == BUTTON_UP:
+            if code not in BUTTON_FLAGS:
+                return
+            flags |= BUTTON_FLAGS[code][kind == BUTTON_UP]
+            if code >= X1:
+                data = code - X1 + 1
+            if kind == BUTTON_DOWN:
+                self._buttons.add(code)
+            else:
+                self._buttons.discard(code)
+        elif kind == WHEEL:
+            flags |= MOUSEEVENTF_WHEEL
+            data = code
+        elif kind == HWHEEL:
+            flags |= MOUSEEVENTF_HWHEEL
+            data = code
+        user32.mouse_event(flags, abs_x, abs_y, data, 0)
+
+    def _release_all(self):
+        """松开回放中按下未抬起的键与鼠标键，避免停止或暂停后卡键"""
+        for code in self._keys:
+            vk = code & 0xFF
+            flags = KEYEVENTF_KEYUP | (KEYEVENTF_EXTENDEDKEY if code & KEY_EXTENDED else 0)
+            user32.keybd_event(vk, user32.MapVirtualKeyW(vk, MAPVK_VK_TO_VSC), flags, 0)
+        for button in self._buttons:
+            user32.mouse_event(BUTTON_FLAGS[button][1], 0, 0, button - X1 + 1 if button >= X1 else 0, 0)
+        self._keys.clear()
+        self._buttons.clear()
+
+    def stats(self):
+        """
+        :return: {'played', 'recorded', 'duration', 'drift', 'error'}
+                 recorded 为最后投递事件的录制时间（已按倍速换算），
+                 drift 为实际时长（不含暂停）与其之差，error 为投递误差直方图（毫秒）
+        """
+        recorded = self.recorded / self.speed if self.speed > 0 else 0.0
+        return {
+            'played': self.played,
+            'recorded': recorded,
+            'duration': self.duration,
+            'drift': self.duration - recorded,
+            'error': self.histogram,
+        }
+
+
+def format_stats(stats):
+    """回放统计转为可读文本"""
+    error = stats['error']
+    lines = [
+        f"回放: {stats['played']} 个事件  录制时长 {stats['recorded']:.3f}s  "
+        f"实际 {stats['duration']:.3f}s  偏差 {stats['drift'] * 1000:+.2f}ms"
+    ]
+    if error.count:
+        lines.append(f"投递误差: 平均 {error.mean:.3f}ms  p50≤{error.percentile(0.5):.2f}ms "
+                     f"p99≤{error.percentile(0.99):.2f}ms max {error.max:.2f}ms")
+    return '\n'.join(lines)
\ No newline at end of file
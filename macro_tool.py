@@ -0,0 +1,153 @@
+"""
+输入宏工具 - 录制、回放与查看宏文件
+录制时 F7 停止；回放时 F6 暂停/继续，F7 停止，结束后输出与录制时间的误差统计
+touch 按录制时间把宏回放给防误触判定引擎（不发送输入），用于调整防误触阈值
+
+用法:
+    python macro_tool.py record macros/farm.amcr --window 游戏窗口标题
+    python macro_tool.py play macros/farm.amcr --window 游戏 --speed 1 --loop 3
+    python macro_tool.py info macros/farm.amcr
+    python macro_tool.py touch macros/shake.amcr --drift 60
+"""
+import sys
+import os
+import argparse
+import threading
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from core.coords import enable_dpi_awareness
+from core.macro import (
+    MacroRecorder, MacroPlayer, summarize, format_stats, KIND_NAMES
+)
+from utils.hotkey_loop import HotkeyLoop, VK_CODE
+
+
+def find_window(args):
+    """按标题或进程名查找目标窗口，未指定时返回 None"""
+    if not (args.window or args.process):
+        return None
+    from core.window_manager import WindowManager
+
+    window_manager = WindowManager()
+    if args.window:
+        return window_manager.find_window_by_title(args.window)
+    return window_manager.find_window_by_process(args.process)
+
+
+def start_hotkeys(bindings):
+    hotkeys = HotkeyLoop()
+    for key, callback in bindings.items():
+        hotkeys.register_hotkey(key, callback)
+    threading.Thread(target=hotkeys.run, daemon=True).start()
+    return hotkeys
+
+
+def record(args, hwnd):
+    recorder = MacroRecorder(args.file, hwnd, ignore_keys=[VK_CODE['F7']])
+    done = threading.Event()
+    hotkeys = start_hotkeys({'F7': done.set})
+    try:
+        recorder.start()
+        print("开始录制，F7 或 Ctrl+C 停止")
+        while not done.wait(0.2):
+            pass
+    except KeyboardInterrupt:
+        pass
+    finally:
+        hotkeys.stop()
+        count = recorder.stop()
+    print(f"已录制 {count} 个事件: {args.file}")
+    return 0
+
+
+def play(args, hwnd):
+    player = MacroPlayer(args.file, hwnd, args.speed)
+    stopped = threading.Event()
+
+    def toggle_pause():
+        if player.is_paused:
+            player.resume()
+        else:
+            player.pause()
+
+    def stop():
+        stopped.set()
+        player.stop()
+
+    hotkeys = start_hotkeys({'F6': toggle_pause, 'F7': stop})
+    try:
+        for i in range(args.loop):
+            if stopped.is_set():
+                break
+            if args.loop > 1:
+                print(f"第 {i + 1}/{args.loop} 次")
+            print(format_stats(player.run()))
+    except KeyboardInterrupt:
+        player.stop()
+    finally:
+        hotkeys.stop()
+    return 0
+
+
+def info(args):
+    stats = summarize(args.file)
+    print(f"事件: {stats['events']}  时长 {stats['duration']:.3f}s  "
+          f"坐标: {'相对窗口客户区' if stats['header'].relative else '屏幕'}")
+    for kind, count in sorted(stats['kinds'].items()):
+        print(f"  {KIND_NAMES.get(kind, kind)}: {count}")
+    return 0
+
+
+def touch(args):
+    from core.anti_touch import AntiTouchPolicy, evaluate_trace
+
+    policy = AntiTouchPolicy(distance=args.distance, speed=args.move_speed, drift=args.drift)
+    result = evaluate_trace(args.file, policy)
+    touches = result['touches']
+    engine = result['engine']
+    print(f"事件: {result['events']}  物理输入 {engine.physical_count}  "
+          f"判定为手动操作 {len(touches)} 次")
+    for t, kind in touches[:20]:
+        print(f"  {t:9.3f}s  {KIND_NAMES.get(kind, kind)}")
+    if len(touches) > 20:
+        print(f"  ... 共 {len(touches)} 次")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="输入宏录制与回放")
+    parser.add_argument('action', choices=('record', 'play', 'info', 'touch'))
+    parser.add_argument('file', help="宏文件（.amcr）")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument('--window', help="目标窗口标题（部分匹配），坐标相对其客户区")
+    target.add_argument('--process', help="目标进程名（部分匹配）")
+    parser.add_argument('--speed', type=float, default=1.0, help="回放倍速，0 表示不等待")
+    parser.add_argument('--loop', type=int, default=1, help="回放次数")
+    parser.add_argument('--distance', type=int, default=8, help="touch: 快速移动净位移阈值（像素）")
+    parser.add_argument('--move-speed', type=float, default=100.0, help="touch: 快速移动速度阈值（像素/秒）")
+    parser.add_argument('--drift', type=int, default=40, help="touch: 缓慢移动累计位移阈值（像素）")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.action == 'info':
+            return info(args)
+        if args.action == 'touch':
+            return touch(args)
+
+        enable_dpi_awareness()
+        hwnd = find_window(args)
+        if (args.window or args.process) and not hwnd:
+            print(f"未找到目标窗口: {args.window or args.process}")
+            return 1
+        if args.action == 'record':
+            return record(args, hwnd)
+        return play(args, hwnd)
+    except (OSError, ValueError) as e:
+        print(f"宏{'录制' if args.action == 'record' else '读取'}失败: {e}")
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
\ No newline at end of file
@@ -7,12 +7,19 @@ import os
 # 添加项目根目录到路径
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+from utils import startup
 from PyQt5.QtWidgets import QApplication
 from PyQt5.QtCore import Qt
 from gui.main_window import MainWindow
+from core.coords import enable_dpi_awareness
+
+startup.mark("导入")
 
 
 def main():
+    # 物理像素坐标：多显示器、混合 DPI 下窗口矩形与光标坐标一致
+    enable_dpi_awareness()
+    
     # 启用高DPI支持
     QApplication. setAttribute(Qt.AA_EnableHighDpiScaling, True)
     QApplication.setAttribute(Qt.AA_UseHighDpiPixmaps, True)
@@ -84,6 +91,7 @@ def main():
     """)
     
     window = MainWindow()
+    startup.mark("界面")
     window.show()
     
     sys.exit(app.exec_())
@@ -1,44 +1,94 @@
 """
 主窗口界面 - 精美布局版 v3.4 (修复搜索功能)
 """
+import time
+
 from PyQt5.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
     QGroupBox, QLabel, QComboBox, QPushButton, QSpinBox,
     QLineEdit, QMessageBox, QDoubleSpinBox, QCheckBox,
-    QListWidget, QListWidgetItem, QGridLayout
+    QListWidget, QListWidgetItem, QGridLayout, QInputDialog, QFileDialog
 )
-from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtCore import Qt, QTimer, pyqtSignal
 from PyQt5.QtGui import QFont
 
 from core.window_manager import WindowManager
-from core.skill_executor import SkillExecutor
+from core.input_backend import INPUT_MODE_FOREGROUND, INPUT_MODE_BACKGROUND
+from core.point_store import PointSet
+from core.coords import WindowTransform, window_dpi, POINT_ORIGIN_WINDOW, POINT_ORIGIN_CLIENT
+from core.rotation import parse_skills, format_skills, merge_skill_points
+from core.anti_touch import AntiTouchPolicy, ACTIONS, ACTION_NAMES, ACTION_PAUSE
 from utils.config import ConfigManager
+from utils.profiles import ProfileStore
 from utils.hotkey import HotkeyManager
-from gui.area_selector import PointRecorder, PointsPreview
+from utils import startup
+
+# 程序级设置：本地控制接口、指标导出、会话日志目录
+APP_SETTINGS = ('control_port', 'metrics_port', 'metrics_snapshot', 'metrics_interval',
+                'session_log_dir')
+
+# 执行引擎（asyncio、输入钩子、时间轮等）、坐标点录制/预览、画面采集只在首次使用时导入，
+# 不影响启动时间
 
 
 class MainWindow(QMainWindow):
     """主窗口"""
     
+    # 控制接口有新命令（服务线程发出，在界面线程处理）
+    control_requested = pyqtSignal()
+    # F8 切换配置档（热键线程发出，在界面线程处理）
+    next_profile_requested = pyqtSignal()
+    
     def __init__(self):
         super().__init__()
         self.window_manager = WindowManager()
         self.config_manager = ConfigManager()
+        self.profile_store = ProfileStore()
         self.skill_executor = None
         self. hotkey_manager = None
         self.selected_window_handle = None
-        self.skill_points = []
+        self.skill_points = PointSet()
+        # 坐标点原点与记录时的 DPI（旧配置为窗口原点、不缩放）
+        self.point_origin = POINT_ORIGIN_WINDOW
+        self.point_dpi = None
+        self.point_resolution = None  # 参考分辨率：记录坐标点时的客户区宽高
+        self.skills = []
+        self.probes = []  # 像素探针（仅配置文件中设置）
+        self.templates = {}  # 模板识别 {'files', 'dynamic', ...}
+        self.anti_touch_policy = {}  # 防误触策略 {'action', 'distance', ...}
         self.preview = None
+        self.control_server = None
+        self.exporters = []
+        # 程序级设置（只在 config.json 中设置，不随配置档切换）
+        self.app_settings = {}
+        
+        self._painted = False
         
         self.init_ui()
         self.load_config()
+    
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        # 枚举窗口、注册热键等放到首次绘制之后，先让界面显示出来
+        if not self._painted:
+            self._painted = True
+            startup.mark("首次绘制")
+            QTimer.singleShot(0, self.finish_startup)
+    
+    def finish_startup(self):
+        """首次绘制之后完成剩余初始化"""
+        self.refresh_windows()
         self.setup_hotkeys()
+        self.setup_control_server()
+        self.setup_metrics()
         self.setup_status_timer()
+        startup.mark("可交互")
+        print(f"启动耗时: {startup.report()}")
         
     def init_ui(self):
         """初始化界面"""
         self.setWindowTitle("🎮 技能自动释放工具 v3.4")
-        self.setFixedSize(500, 680)
+        self.setFixedSize(500, 796)
         self.setWindowFlags(self.windowFlags() | Qt.WindowStaysOnTopHint)
         
         central_widget = QWidget()
@@ -107,8 +157,8 @@ class MainWindow(QMainWindow):
         self.window_info_label. setStyleSheet("color: #888; font-size: 11px;")
         layout.addWidget(self.window_info_label)
         
+        self.window_combo.addItem("正在加载窗口列表...", None)
         group.setLayout(layout)
-        self.refresh_windows()
         return group
     
     def create_points_group(self):
@@ -133,6 +183,12 @@ class MainWindow(QMainWindow):
         preview_btn.clicked.connect(self.preview_points)
         btn_row.addWidget(preview_btn)
         
+        match_btn = QPushButton("识别")
+        match_btn.setFixedSize(50, 32)
+        match_btn.setToolTip("选择目标模板图片，在窗口画面中自动识别坐标点")
+        match_btn.clicked.connect(self.match_points)
+        btn_row.addWidget(match_btn)
+        
         clear_btn = QPushButton("清除")
         clear_btn.setFixedSize(50, 32)
         clear_btn.setStyleSheet("background-color: #c62828;")
@@ -165,6 +221,10 @@ class MainWindow(QMainWindow):
         
         info_row.addStretch()
         
+        self.dynamic_points_check = QCheckBox("🔍 动态识别")
+        self.dynamic_points_check.setToolTip("每轮开始时按模板重新识别坐标点（需先点击识别选择模板）")
+        info_row.addWidget(self.dynamic_points_check)
+        
         del_btn = QPushButton("删除选中")
         del_btn.setFixedHeight(24)
         del_btn.clicked.connect(self.delete_selected_point)
@@ -212,9 +272,73 @@ class MainWindow(QMainWindow):
         self.anti_touch_check = QCheckBox("🛡️ 防误触")
         self.anti_touch_check.setChecked(True)
         self.anti_touch_check.setStyleSheet("color: #81c784;")
-        self.anti_touch_check.setToolTip("检测到鼠标手动移动时自动暂停")
+        self.anti_touch_check.setToolTip("检测到鼠标、键盘手动操作时按防误触动作处理")
         layout.addWidget(self.anti_touch_check, 1, 2, 1, 2)
         
+        # 第三行：防误触动作 + 空闲时长
+        layout.addWidget(QLabel("误触动作:"), 2, 0)
+        self.anti_touch_action_combo = QComboBox()
+        for action in ACTIONS:
+            self.anti_touch_action_combo.addItem(ACTION_NAMES[action], action)
+        self.anti_touch_action_combo.setFixedHeight(26)
+        self.anti_touch_action_combo.setToolTip(
+            "暂停: 等待 F6 继续\n跳过释放: 不暂停，用户操作期间不释放\n空闲后继续: 暂停，用户空闲后自动继续")
+        self.anti_touch_action_combo.currentIndexChanged.connect(self.on_anti_touch_action_changed)
+        layout.addWidget(self.anti_touch_action_combo, 2, 1)
+        
+        layout.addWidget(QLabel("空闲时长:"), 2, 2)
+        self.anti_touch_idle = QDoubleSpinBox()
+        self.anti_touch_idle.setRange(1, 3600)
+        self.anti_touch_idle.setValue(AntiTouchPolicy().idle)
+        self.anti_touch_idle.setSingleStep(1)
+        self.anti_touch_idle.setDecimals(1)
+        self.anti_touch_idle.setSuffix(" 秒")
+        self.anti_touch_idle.setFixedSize(80, 26)
+        self.anti_touch_idle.setToolTip("最后一次手动操作之后多久恢复释放 / 自动继续")
+        self.anti_touch_idle.setEnabled(False)
+        layout.addWidget(self.anti_touch_idle, 2, 3)
+        
+        # 第四行：输入模式
+        layout.addWidget(QLabel("输入模式:"), 3, 0)
+        self.input_mode_combo = QComboBox()
+        self.input_mode_combo.addItem("前台模拟", INPUT_MODE_FOREGROUND)
+        self.input_mode_combo.addItem("后台消息", INPUT_MODE_BACKGROUND)
+        self.input_mode_combo.setFixedHeight(26)
+        self.input_mode_combo.setToolTip("后台消息: 直接投递到窗口，不抢焦点、不移动光标")
+        layout.addWidget(self.input_mode_combo, 3, 1)
+        
+        self.async_core_check = QCheckBox("⚡ 异步核心")
+        self.async_core_check.setToolTip("使用 asyncio 执行核心，暂停/停止立即生效（不支持精确计时与模板动态坐标点）")
+        layout.addWidget(self.async_core_check, 3, 2, 1, 2)
+        
+        # 第五行：精确计时
+        self.precise_timing_check = QCheckBox("⏱️ 精确计时")
+        self.precise_timing_check.setToolTip("固定频率节拍，粗睡眠 + 自旋，适合 5~20 ms 的短间隔")
+        layout.addWidget(self.precise_timing_check, 4, 0)
+        
+        self.trajectory_check = QCheckBox("〰️ 轨迹")
+        self.trajectory_check.setToolTip("前台模拟时光标沿弯曲、缓动的轨迹移动到坐标点（分批投递，约 30 ms），而不是瞬移")
+        layout.addWidget(self.trajectory_check, 4, 1)
+        
+        self.skills_input = QLineEdit()
+        self.skills_input.setFixedHeight(26)
+        self.skills_input.setPlaceholderText("技能循环 q:1000:1, w:5000:3")
+        self.skills_input.setToolTip("按键:冷却ms:优先级，逗号分隔；留空则只按技能按键")
+        layout.addWidget(self.skills_input, 4, 2, 1, 2)
+        
+        # 第六行：配置档
+        layout.addWidget(QLabel("配置档:"), 5, 0)
+        self.profile_combo = QComboBox()
+        self.profile_combo.setFixedHeight(26)
+        self.profile_combo.setToolTip("按游戏/角色/地图保存的配置，F8 循环切换")
+        self.profile_combo.currentIndexChanged.connect(self.on_profile_selected)
+        layout.addWidget(self.profile_combo, 5, 1, 1, 2)
+        
+        save_as_btn = QPushButton("另存")
+        save_as_btn.setFixedHeight(26)
+        save_as_btn.clicked.connect(self.save_profile_as)
+        layout.addWidget(save_as_btn, 5, 3)
+        
         group.setLayout(layout)
         return group
     
@@ -318,14 +442,22 @@ class MainWindow(QMainWindow):
         data_row.addStretch()
         layout.addLayout(data_row)
         
+        # 投递统计
+        self.perf_label = QLabel("")
+        self.perf_label.setStyleSheet("color: #90a4ae; font-size: 11px;")
+        layout.addWidget(self.perf_label)
+        
         # 提示
         self.anti_touch_status = QLabel("")
         self.anti_touch_status.setStyleSheet("color: #ff9800; font-size: 11px;")
         self.anti_touch_status.setWordWrap(True)
         layout.addWidget(self.anti_touch_status)
+        # 自动继续倒计时刷新，只在等待自动继续时运行
+        self.auto_resume_timer = QTimer()
+        self.auto_resume_timer.timeout.connect(self.update_auto_resume_countdown)
         
         # 热键提示
-        hotkey_hint = QLabel("热键: F6 开始/暂停  |  F7 停止  |  ESC 紧急停止")
+        hotkey_hint = QLabel("热键: F6 开始/暂停  |  F7 停止  |  F8 切换配置  |  ESC 紧急停止")
         hotkey_hint.setStyleSheet("color: #666; font-size: 10px;")
         hotkey_hint.setAlignment(Qt.AlignCenter)
         layout.addWidget(hotkey_hint)
@@ -419,22 +551,84 @@ class MainWindow(QMainWindow):
         if not self.selected_window_handle:
             QMessageBox.warning(self, "提示", "请先选择目标窗口！")
             return
-        rect = self.window_manager.get_window_rect(self.selected_window_handle)
-        if not rect:
+        hwnd = self.selected_window_handle
+        rect = self.window_manager.get_client_rect(hwnd)
+        transform = WindowTransform(hwnd, self.point_origin, self.point_dpi, self.point_resolution)
+        if not rect or not transform.update():
             QMessageBox.warning(self, "提示", "无法获取窗口位置！")
             return
         
+        # 已有坐标点统一换算为客户区物理像素后再编辑（批量变换，不展开为元组列表）
+        existing = self.skill_points.transformed(
+            transform.sx, transform.sy, transform.ox - rect[0], transform.oy - rect[1]
+        )
+        
+        from gui.area_selector import PointRecorder
+        
         self.hide()
         try:
-            recorder = PointRecorder(rect, self.skill_points)
+            recorder = PointRecorder(rect, existing)
             if recorder.exec_():
                 points = recorder.get_points()
                 if points:
                     self.skill_points = points
+                    self.point_origin = POINT_ORIGIN_CLIENT
+                    self.point_dpi = window_dpi(hwnd)
+                    self.point_resolution = (rect[2], rect[3])
                     self.update_points_display()
+                    self.push_points()
         finally:
             self.show()
     
+    def match_points(self):
+        """按模板图片识别坐标点"""
+        if not self.selected_window_handle:
+            QMessageBox.warning(self, "提示", "请先选择目标窗口！")
+            return
+        files, _ = QFileDialog.getOpenFileNames(
+            self, "选择模板图片", "", "图片 (*.png *.bmp *.jpg)"
+        )
+        if not files:
+            return
+        
+        templates = dict(self.templates, files=files)
+        try:
+            from core.template_match import TemplateLocator
+            from core.capture import create_capture_source
+            source = create_capture_source()
+            try:
+                locator = TemplateLocator.from_config(templates, source)
+                points = locator.points(self.selected_window_handle)
+            finally:
+                source.close()
+        except (ImportError, OSError) as e:
+            QMessageBox.warning(self, "提示", f"模板识别不可用: {e}")
+            return
+        
+        self.templates = templates
+        transform = WindowTransform(self.selected_window_handle, POINT_ORIGIN_CLIENT)
+        if not points or not transform.update():
+            QMessageBox.information(self, "提示", "未识别到目标")
+            return
+        # 识别结果为窗口矩形坐标，转为客户区坐标
+        self.skill_points = PointSet.from_points([transform.from_window(x, y) for x, y in points])
+        self.point_origin = POINT_ORIGIN_CLIENT
+        self.point_dpi = transform.dpi
+        self.point_resolution = transform.client_size
+        self.update_points_display()
+        self.push_points()
+    
+    def push_points(self):
+        """运行中修改坐标点时直接交给执行器，不必重启"""
+        set_points = getattr(self.skill_executor, 'set_points', None)
+        if set_points:
+            set_points(self.skill_points, self.point_origin, self.point_dpi, self.point_resolution)
+    
+    def collect_templates(self):
+        if not self.templates:
+            return {}
+        return dict(self.templates, dynamic=self.dynamic_points_check.isChecked())
+    
     def update_points_display(self):
         self.points_list.clear()
         if self.skill_points:
@@ -449,13 +643,14 @@ class MainWindow(QMainWindow):
     def delete_selected_point(self):
         row = self.points_list.currentRow()
         if 0 <= row < len(self.skill_points):
-            self.skill_points.pop(row)
+            self.skill_points = self.skill_points.removed(row)
             self.update_points_display()
+            self.push_points()
     
     def clear_points(self):
         if self.skill_points:
             if QMessageBox.question(self, "确认", "清除所有坐标点？") == QMessageBox.Yes:
-                self.skill_points = []
+                self.skill_points = PointSet()
                 self.update_points_display()
     
     def preview_points(self):
@@ -465,9 +660,15 @@ class MainWindow(QMainWindow):
         if not self.selected_window_handle:
             QMessageBox.warning(self, "提示", "请先选择窗口！")
             return
-        rect = self.window_manager.get_window_rect(self.selected_window_handle)
-        if rect:
-            self.preview = PointsPreview(self.skill_points, (rect[0], rect[1]))
+        transform = WindowTransform(
+            self.selected_window_handle, self.point_origin, self.point_dpi, self.point_resolution
+        )
+        if transform.update():
+            from gui.area_selector import PointsPreview, native_to_logical
+            
+            x, y, ratio = native_to_logical(transform.ox, transform.oy)
+            points = self.skill_points.transformed(transform.sx / ratio, transform.sy / ratio)
+            self.preview = PointsPreview(points, (x, y))
             self.preview.show()
             QTimer.singleShot(3000, self.preview.close)
 
@@ -481,24 +682,47 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "提示", "窗口已关闭！")
             self.refresh_windows()
             return
-        if not self.skill_points:
+        if not self.skill_points and not self.collect_templates().get('dynamic'):
             QMessageBox.warning(self, "提示", "请先记录坐标点！")
             return
+        try:
+            self.skills = merge_skill_points(parse_skills(self.skills_input.text()), self.skills)
+        except ValueError as e:
+            QMessageBox.warning(self, "提示", str(e))
+            return
         
         config = {
             'window_handle': self.selected_window_handle,
             'points': self.skill_points,
+            'point_origin': self.point_origin,
+            'point_dpi': self.point_dpi,
+            'point_resolution': self.point_resolution,
             'skill_key': self.skill_key.text(),
             'interval': self.skill_interval.value(),
             'round_interval': self.round_interval.value(),
-            'anti_touch': self.anti_touch_check.isChecked()
+            'anti_touch': self.anti_touch_check.isChecked(),
+            'anti_touch_policy': self.collect_anti_touch_policy(),
+            'input_mode': self.input_mode_combo.currentData(),
+            'precise_timing': self.precise_timing_check.isChecked(),
+            'trajectory': self.trajectory_check.isChecked(),
+            'skills': self.skills,
+            'probes': self.probes,
+            'templates': self.collect_templates()
         }
+        if self.app_settings.get('session_log_dir'):
+            from core.session_log import session_log_path
+            config['session_log'] = session_log_path(self.app_settings['session_log_dir'])
         
-        self.skill_executor = SkillExecutor(config, self.window_manager)
+        if self.async_core_check.isChecked():
+            from core.async_executor import AsyncSkillExecutor as executor_cls
+        else:
+            from core.skill_executor import SkillExecutor as executor_cls
+        self.skill_executor = executor_cls(config, self.window_manager)
         self.skill_executor.status_updated.connect(self.update_status)
         self.skill_executor.round_updated.connect(self.update_round_status)
         self.skill_executor.mouse_moved_detected.connect(self.on_mouse_moved)
         self.skill_executor.error_occurred.connect(self.on_error)
+        self.skill_executor.auto_resumed.connect(self.on_auto_resumed)
         self.skill_executor.start()
         
         self.start_btn.setEnabled(False)
@@ -513,10 +737,7 @@ class MainWindow(QMainWindow):
         if self.skill_executor: 
             if self.skill_executor.is_paused: 
                 self.skill_executor. resume()
-                self.pause_btn.setText("⏸  暂停")
-                self.status_label.setText("● 运行中")
-                self.status_label.setStyleSheet("font-size: 14px; font-weight: bold; color: #4caf50;")
-                self.anti_touch_status. setText("")
+                self.on_auto_resumed()
             else:
                 self. skill_executor.pause()
                 self.pause_btn.setText("▶  继续")
@@ -534,19 +755,54 @@ class MainWindow(QMainWindow):
         self.status_label.setText("● 已停止")
         self.status_label.setStyleSheet("font-size: 14px; font-weight: bold; color:  #f44336;")
         self.round_wait_label.setText("")
+        self.auto_resume_timer.stop()
         self.anti_touch_status.setText("")
+        self.perf_label.setText("")
     
     def on_mouse_moved(self):
         self.pause_btn.setText("▶  继续")
         self.status_label.setText("● 已暂停")
         self.status_label.setStyleSheet("font-size: 14px; font-weight: bold; color: #ff9800;")
-        self.anti_touch_status. setText("🛡️ 检测到鼠标移动，已暂停。按 F6 或点击继续")
+        self.anti_touch_status. setText("🛡️ 检测到手动操作，已暂停。按 F6 或点击继续")
+        # 空闲后自动继续：执行核心按钩子事件计时，这里只刷新倒计时显示
+        if self.skill_executor and self.skill_executor.auto_resume_remaining() is not None:
+            self.update_auto_resume_countdown()
+            self.auto_resume_timer.start(200)
+    
+    def update_auto_resume_countdown(self):
+        remaining = self.skill_executor.auto_resume_remaining() if self.skill_executor else None
+        if remaining is None:
+            self.auto_resume_timer.stop()
+            return
+        self.anti_touch_status.setText(
+            f"🛡️ 检测到手动操作，已暂停。{remaining:.0f} 秒无操作后自动继续，按 F6 立即继续")
+    
+    def on_auto_resumed(self):
+        """继续执行（手动或空闲自动继续）后恢复运行状态显示"""
+        self.auto_resume_timer.stop()
+        self.pause_btn.setText("⏸  暂停")
+        self.status_label.setText("● 运行中")
+        self.status_label.setStyleSheet("font-size: 14px; font-weight: bold; color: #4caf50;")
+        self.anti_touch_status.setText("")
     
     def update_status(self, count, pos, runtime, point_idx):
         self.exec_count_label.setText(f"执行: {count}")
         self.point_label.setText(f"点: {point_idx}/{len(self.skill_points)}")
         h, m, s = int(runtime//3600), int(runtime%3600//60), int(runtime%60)
         self.runtime_label.setText(f"时间:  {h:02d}:{m:02d}:{s:02d}")
+        if self.skill_executor:
+            stats = self.skill_executor.backend.stats
+            text = f"投递: {stats.avg_ms:.1f} ms/次  送达: {stats.delivery_rate:.0f}%"
+            timer = getattr(self.skill_executor, 'timer', None)
+            if timer:
+                text += f"  |  {timer.histogram.summary()}"
+            rotation = getattr(self.skill_executor, 'rotation', None)
+            if rotation:
+                text += f"  |  冷却利用 {rotation.summary()}"
+            skipped = getattr(self.skill_executor, 'skipped_count', 0)
+            if skipped:
+                text += f"  |  条件跳过 {skipped}"
+            self.perf_label.setText(text)
     
     def update_round_status(self, round_num, progress, waiting, remain):
         self.round_label.setText(f"轮次: {round_num}")
@@ -571,6 +827,9 @@ class MainWindow(QMainWindow):
         self.hotkey_manager.register_hotkey('F6', self.toggle_execution)
         self.hotkey_manager.register_hotkey('F7', self.stop_execution)
         self.hotkey_manager.register_hotkey('Escape', self.stop_execution)
+        # 切换配置档会改动界面控件并启停执行器，必须回到界面线程执行
+        self.next_profile_requested.connect(self.next_profile)
+        self.hotkey_manager.register_hotkey('F8', self.next_profile_requested.emit)
         self.hotkey_manager.start()
     
     def toggle_execution(self):
@@ -591,30 +850,240 @@ class MainWindow(QMainWindow):
                     self. stop_execution()
                     QMessageBox.warning(self, "警告", "窗口已关闭！")
 
+    # ==================== 控制接口 ====================
+    
+    def setup_control_server(self):
+        port = self.app_settings.get('control_port')
+        if not port:
+            return
+        from utils.control_server import ControlServer
+        
+        server = ControlServer(port, stats=self.control_stats,
+                               notify=self.control_requested.emit)
+        try:
+            server.start()
+        except OSError as e:
+            print(f"启动控制接口失败: {e}")
+            return
+        self.control_server = server
+        self.control_requested.connect(self.process_control_commands)
+    
+    def process_control_commands(self):
+        if self.control_server:
+            self.control_server.drain(self.handle_control_command)
+    
+    def handle_control_command(self, name, args):
+        """执行控制接口命令（界面线程），出错时抛出异常返回给客户端"""
+        executor = self.skill_executor
+        running = bool(executor and executor.isRunning())
+        if name == 'start':
+            if running:
+                if executor.is_paused:
+                    self.pause_execution()
+            else:
+                # 提前检查，避免弹出对话框阻塞界面线程
+                if not self.selected_window_handle or \
+                        not self.window_manager.is_window_valid(self.selected_window_handle):
+                    raise ValueError("未选择目标窗口或窗口已关闭")
+                if not self.skill_points and not self.collect_templates().get('dynamic'):
+                    raise ValueError("没有设置坐标点")
+                self.start_execution()
+        elif name == 'stop':
+            self.stop_execution()
+        elif name == 'pause':
+            if running and not executor.is_paused:
+                self.pause_execution()
+        elif name == 'resume':
+            if running and executor.is_paused:
+                self.pause_execution()
+        elif name == 'switch_profile':
+            index = self.profile_combo.findData(args.get('name'))
+            if index < 0:
+                raise ValueError(f"配置档不存在: {args.get('name')}")
+            self.profile_combo.setCurrentIndex(index)
+        return self.control_stats()
+    
+    def control_stats(self):
+        """当前状态（控制接口服务线程中调用，只读）"""
+        executor = self.skill_executor
+        stats = {
+            'profile': self.profile_store.active,
+            'window': self.selected_window_handle,
+            'running': False,
+            'paused': False,
+        }
+        if executor:
+            stats.update(
+                running=bool(executor.isRunning()),
+                paused=executor.is_paused,
+                exec_count=executor.exec_count,
+                round=getattr(executor, 'current_round', None),
+                runtime=time.time() - executor.start_time if executor.start_time else 0.0,
+                skipped=getattr(executor, 'skipped_count', 0),
+                auto_resume_in=executor.auto_resume_remaining(),
+            )
+        return stats
+
+    # ==================== 运行指标 ====================
+    
+    def setup_metrics(self):
+        """按 config.json 中的 metrics_port / metrics_snapshot 启动指标导出"""
+        settings = self.app_settings
+        if settings.get('metrics_port') or settings.get('metrics_snapshot'):
+            from core.metrics import start_exporters
+            
+            self.exporters = start_exporters(
+                settings.get('metrics_port'), settings.get('metrics_snapshot'),
+                settings.get('metrics_interval', 10.0)
+            )
+
     # ==================== 配置 ====================
     
-    def save_config(self):
-        self.config_manager.save({
+    def collect_config(self):
+        """当前界面上的配置"""
+        return {
             'skill_points': self.skill_points,
+            'point_origin': self.point_origin,
+            'point_dpi': self.point_dpi,
+            'point_resolution': self.point_resolution,
             'skill_key': self.skill_key.text(),
             'interval':  self.skill_interval.value(),
             'round_interval': self.round_interval.value(),
-            'anti_touch': self. anti_touch_check.isChecked()
-        })
+            'anti_touch': self. anti_touch_check.isChecked(),
+            'anti_touch_policy': self.collect_anti_touch_policy(),
+            'input_mode': self.input_mode_combo.currentData(),
+            'async_core': self.async_core_check.isChecked(),
+            'precise_timing': self.precise_timing_check.isChecked(),
+            'trajectory': self.trajectory_check.isChecked(),
+            'skills': self.collect_skills(),
+            'probes': self.probes,
+            'templates': self.collect_templates(),
+            **self.app_settings
+        }
+    
+    def collect_skills(self):
+        """界面上的技能循环，格式错误时保留原配置"""
+        try:
+            return merge_skill_points(parse_skills(self.skills_input.text()), self.skills)
+        except ValueError:
+            return self.skills
+    
+    def collect_anti_touch_policy(self):
+        """界面上的防误触动作与空闲时长，其余阈值保留配置文件中的值"""
+        return dict(self.anti_touch_policy,
+                    action=self.anti_touch_action_combo.currentData(),
+                    idle=self.anti_touch_idle.value())
+    
+    def on_anti_touch_action_changed(self, index):
+        # 空闲时长只对跳过释放与空闲后继续有效
+        self.anti_touch_idle.setEnabled(self.anti_touch_action_combo.currentData() != ACTION_PAUSE)
+    
+    def apply_config(self, config):
+        """把配置应用到界面"""
+        self.skill_points = PointSet.from_points(config. get('skill_points', []))
+        self.point_origin = config.get('point_origin', POINT_ORIGIN_WINDOW)
+        self.point_dpi = config.get('point_dpi')
+        self.point_resolution = config.get('point_resolution')
+        self.skill_key. setText(config.get('skill_key', 'q'))
+        self.skill_interval.setValue(config.get('interval', 100))
+        self.round_interval.setValue(config.get('round_interval', 5.0))
+        self.anti_touch_check.setChecked(config.get('anti_touch', True))
+        index = self.input_mode_combo.findData(config.get('input_mode', INPUT_MODE_FOREGROUND))
+        self.input_mode_combo.setCurrentIndex(max(index, 0))
+        self.async_core_check.setChecked(config.get('async_core', False))
+        self.precise_timing_check.setChecked(config.get('precise_timing', False))
+        self.trajectory_check.setChecked(config.get('trajectory', False))
+        self.skills = config.get('skills', [])
+        self.probes = config.get('probes', [])
+        self.templates = config.get('templates', {})
+        self.anti_touch_policy = config.get('anti_touch_policy', {})
+        index = self.anti_touch_action_combo.findData(self.anti_touch_policy.get('action', ACTION_PAUSE))
+        self.anti_touch_action_combo.setCurrentIndex(max(index, 0))
+        self.anti_touch_idle.setValue(self.anti_touch_policy.get('idle', AntiTouchPolicy().idle))
+        self.dynamic_points_check.setChecked(self.templates.get('dynamic', False))
+        self.skills_input.setText(format_skills(self.skills))
+        self.update_points_display()
+    
+    def save_config(self):
+        config = self.collect_config()
+        self.config_manager.save(config)
+        if self.profile_store.active:
+            self.profile_store.save(self.profile_store.active, config)
     
     def load_config(self):
         config = self.config_manager.load()
+        self.app_settings = {k: v for k, v in (config or {}).items() if k in APP_SETTINGS}
+        # 首次使用时把 config.json 迁移为默认配置档
+        if not len(self.profile_store):
+            self.profile_store.import_config("默认", config)
+        if self.profile_store.active:
+            config = self.profile_store.get(self.profile_store.active) or config
         if config:
-            self.skill_points = config. get('skill_points', [])
-            self.skill_key. setText(config.get('skill_key', 'q'))
-            self.skill_interval.setValue(config.get('interval', 100))
-            self.round_interval.setValue(config.get('round_interval', 5.0))
-            self.anti_touch_check.setChecked(config.get('anti_touch', True))
-            self.update_points_display()
+            self.apply_config(config)
+        self.refresh_profiles()
+    
+    # ==================== 配置档 ====================
+    
+    def refresh_profiles(self):
+        """刷新配置档下拉列表"""
+        self.profile_combo.blockSignals(True)
+        self.profile_combo.clear()
+        for name in self.profile_store.names():
+            meta = self.profile_store.metadata(name)
+            self.profile_combo.addItem(f"{name} ({meta.get('points', 0)} 点)", name)
+        index = self.profile_combo.findData(self.profile_store.active)
+        self.profile_combo.setCurrentIndex(max(index, 0))
+        self.profile_combo.blockSignals(False)
+    
+    def on_profile_selected(self, index):
+        name = self.profile_combo.itemData(index)
+        if not name or name == self.profile_store.active:
+            return
+        
+        # 先保存当前配置档（写入缓存，磁盘写入在后台合并）
+        if self.profile_store.active:
+            self.profile_store.save(self.profile_store.active, self.collect_config())
+        
+        was_running = bool(self.skill_executor and self.skill_executor.isRunning())
+        if was_running:
+            self.stop_execution()
+        
+        config = self.profile_store.switch(name)
+        if config is not None:
+            self.apply_config(config)
+        
+        if was_running:
+            self.start_execution()
+    
+    def save_profile_as(self):
+        name, ok = QInputDialog.getText(self, "另存配置档", "配置档名称:")
+        name = name.strip()
+        if not ok or not name:
+            return
+        if name in self.profile_store and QMessageBox.question(
+                self, "确认", f"覆盖配置档 \"{name}\"？") != QMessageBox.Yes:
+            return
+        
+        self.profile_store.save(name, self.collect_config())
+        self.profile_store.switch(name)
+        self.refresh_profiles()
+    
+    def next_profile(self):
+        """F8：循环切换配置档"""
+        name = self.profile_store.next_name(self.profile_store.active)
+        index = self.profile_combo.findData(name)
+        if index >= 0:
+            self.profile_combo.setCurrentIndex(index)
     
     def closeEvent(self, event):
         self.stop_execution()
         if self.hotkey_manager:
             self. hotkey_manager.stop()
+        if self.control_server:
+            self.control_server.stop()
+        for exporter in self.exporters:
+            exporter.stop()
         self.save_config()
+        self.config_manager.close()
+        self.profile_store.close()
         event.accept()
\ No newline at end of file
@@ -0,0 +1,269 @@
+"""
+运行指标 - 计数器与直方图，Prometheus 文本格式 / JSON 快照导出
+热路径上每次更新只是一次加锁的整数加法（直方图多一次二分查找）
+"""
+import os
+import json
+import time
+import threading
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+PREFIX = 'autoskill_'
+
+
+class Counter:
+    """单调递增计数器"""
+
+    kind = 'counter'
+
+    __slots__ = ('name', 'help', '_value', '_lock')
+
+    def __init__(self, name, help=''):
+        self.name = name
+        self.help = help
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self):
+        return self._value
+
+    def snapshot(self):
+        return self._value
+
+    def reset(self):
+        with self._lock:
+            self._value = 0
+
+    def prometheus(self):
+        return [f"{self.name} {self._value}"]
+
+
+class Histogram:
+    """固定分桶直方图（桶为上界，导出时累加为 Prometheus 的 le 桶）"""
+
+    kind = 'histogram'
+
+    __slots__ = ('name', 'help', 'bounds', '_counts', '_sum', '_count', '_lock')
+
+    def __init__(self, name, bounds, help=''):
+        self.name = name
+        self.help = help
+        self.bounds = tuple(bounds)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def observe(self, value):
+        index = bisect_left(self.bounds, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    def reset(self):
+        with self._lock:
+            # 最后一格为超出所有上界的 +Inf 桶
+            self._counts = [0] * (len(self.bounds) + 1)
+            self._sum = 0.0
+            self._count = 0
+
+    def snapshot(self):
+        """{'count', 'sum', 'buckets': [[上界, 累计次数], ...]}（一致的副本）"""
+        with self._lock:
+            counts = list(self._counts)
+            total, count = self._sum, self._count
+        buckets = []
+        seen = 0
+        for bound, n in zip(self.bounds + (float('inf'),), counts):
+            seen += n
+            buckets.append([bound if bound != float('inf') else '+Inf', seen])
+        return {'count': count, 'sum': total, 'buckets': buckets}
+
+    def prometheus(self):
+        data = self.snapshot()
+        lines = [f'{self.name}_bucket{{le="{bound}"}} {n}' for bound, n in data['buckets']]
+        lines.append(f"{self.name}_sum {data['sum']}")
+        lines.append(f"{self.name}_count {data['count']}")
+        return lines
+
+
+class MetricsRegistry:
+    """指标注册表（同名指标只创建一次）"""
+
+    def __init__(self, prefix=PREFIX):
+        self.prefix = prefix
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get(self, name, factory):
+        name = self.prefix + name
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = factory(name)
+            return metric
+
+    def counter(self, name, help=''):
+        return self._get(name, lambda full: Counter(full, help))
+
+    def histogram(self, name, bounds, help=''):
+        return self._get(name, lambda full: Histogram(full, bounds, help))
+
+    def metrics(self):
+        with self._lock:
+            return list(self._metrics.values())
+
+    def reset(self):
+        for metric in self.metrics():
+            metric.reset()
+
+    def snapshot(self):
+        """{'time': 时间戳, 指标名: 值或直方图快照}"""
+        data = {'time': time.time()}
+        for metric in self.metrics():
+            data[metric.name] = metric.snapshot()
+        return data
+
+    def prometheus(self):
+        """Prometheus 文本格式（0.0.4）"""
+        lines = []
+        for metric in self.metrics():
+            if metric.help:
+                lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.prometheus())
+        return '\n'.join(lines) + '\n'
+
+
+# 进程内共享的注册表
+registry = MetricsRegistry()
+
+LATENCY_BOUNDS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+PERIOD_ERROR_BOUNDS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05)
+
+casts = registry.counter('casts_total', "技能释放次数")
+cast_failures = registry.counter('cast_failures_total', "未送达的释放次数")
+anti_touch_pauses = registry.counter('anti_touch_pauses_total', "防误触自动暂停次数")
+anti_touch_skips = registry.counter('anti_touch_skips_total', "用户操作期间跳过的释放次数")
+anti_touch_auto_resumes = registry.counter('anti_touch_auto_resumes_total', "防误触暂停后空闲自动继续次数")
+focus_reactivations = registry.counter('focus_reactivations_total', "释放前重新激活目标窗口的次数")
+window_errors = registry.counter('window_errors_total', "目标窗口关闭或无法获取位置的次数")
+cast_latency = registry.histogram('cast_latency_seconds', LATENCY_BOUNDS, "单次释放的投递耗时（秒）")
+period_error = registry.histogram('period_error_seconds', PERIOD_ERROR_BOUNDS, "释放间隔的绝对误差（秒）")
+
+
+# ==================== 导出 ====================
+
+class MetricsServer:
+    """
+    本地 HTTP 导出：GET /metrics 为 Prometheus 文本，GET /metrics.json 为 JSON 快照
+    只监听 127.0.0.1，在独立线程中处理请求
+    """
+
+    def __init__(self, port, registry=registry, host='127.0.0.1'):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        """启动导出线程，监听失败时抛出 OSError"""
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path.split('?', 1)[0]
+                if path == '/metrics':
+                    body = registry.prometheus().encode('utf-8')
+                    content_type = 'text/plain; version=0.0.4; charset=utf-8'
+                elif path == '/metrics.json':
+                    body = json.dumps(registry.snapshot(), ensure_ascii=False).encode('utf-8')
+                    content_type = 'application/json'
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self.port
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+
+class SnapshotWriter:
+    """定期把 JSON 快照追加到文件（每行一个快照）"""
+
+    def __init__(self, path, interval=10.0, registry=registry):
+        self.path = path
+        self.interval = interval
+        self.registry = registry
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            self.write()
+
+    def write(self):
+        try:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(self.registry.snapshot(), ensure_ascii=False) + '\n')
+        except OSError as e:
+            print(f"写入指标快照失败: {e}")
+
+    def stop(self):
+        """停止并写出最后一个快照"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+            self.write()
+
+
+def start_exporters(port=None, snapshot_path=None, interval=10.0):
+    """
+    按配置启动导出（未设置的不启动），失败时打印错误并跳过
+    :return: 已启动的导出器列表（退出时逐个 stop）
+    """
+    exporters = []
+    if port:
+        server = MetricsServer(port)
+        try:
+            server.start()
+            exporters.append(server)
+        except OSError as e:
+            print(f"启动指标导出失败: {e}")
+    if snapshot_path:
+        writer = SnapshotWriter(os.path.abspath(snapshot_path), interval)
+        writer.start()
+        exporters.append(writer)
+    return exporters
\ No newline at end of file
@@ -3,6 +3,9 @@
 """
 import random
 import math
+from array import array
+
+from core.point_store import PointSet
 
 
 class MousePattern:
@@ -35,6 +38,27 @@ def point_in_polygon(point, polygon):
     return inside
 
 
+def polygon_mask(xs, ys, polygon):
+    """
+    point_in_polygon 的 numpy 向量化版本（同为射线法，逐条边对所有点一次计算）
+    :param xs, ys: 同形状的坐标数组
+    :return: 布尔数组，点在多边形内为 True
+    """
+    import numpy as np
+
+    inside = np.zeros(xs.shape, dtype=bool)
+    j = len(polygon) - 1
+    for i in range(len(polygon)):
+        xi, yi = polygon[i]
+        xj, yj = polygon[j]
+        # 水平边不会与射线相交（也避免除零）
+        if yi != yj:
+            crosses = (yi > ys) != (yj > ys)
+            inside ^= crosses & (xs < (xj - xi) * (ys - yi) / (yj - yi) + xi)
+        j = i
+    return inside
+
+
 def get_polygon_bounds(polygon):
     """获取多边形边界矩形"""
     xs = [p[0] for p in polygon]
@@ -45,6 +69,12 @@ def get_polygon_bounds(polygon):
 class PatternGenerator:
     """移动模式生成器 - 支持多边形"""
     
+    __slots__ = (
+        'area_x', 'area_y', 'area_w', 'area_h', 'step_size', 'pattern', 'polygon',
+        'grid_x', 'grid_y', 'direction',
+        'spiral_angle', 'spiral_radius', 'center_x', 'center_y', 'max_radius',
+    )
+    
     def __init__(self, area, step_size, pattern, polygon=None):
         """
         初始化
@@ -194,6 +224,8 @@ class PatternGenerator:
 class PolygonPatternGenerator(PatternGenerator):
     """专门用于多边形的模式生成器"""
     
+    __slots__ = ('valid_points',)
+    
     def __init__(self, polygon, step_size, pattern):
         """
         初始化
@@ -212,21 +244,33 @@ class PolygonPatternGenerator(PatternGenerator):
         self._pregenerate_valid_points()
     
     def _pregenerate_valid_points(self):
-        """预生成多边形内的有效点"""
-        self.valid_points = []
-        
+        """预生成多边形内的有效点（PointSet 扁平存储，大区域可达数十万点）"""
         step = max(self.step_size // 2, 5)
+        x_range = range(int(self.area_x), int(self.area_x + self.area_w), step)
+        y_range = range(int(self.area_y), int(self.area_y + self.area_h), step)
         
-        for y in range(int(self.area_y), int(self.area_y + self.area_h), step):
-            for x in range(int(self.area_x), int(self.area_x + self.area_w), step):
-                if point_in_polygon((x, y), self.polygon):
-                    self.valid_points.append((x, y))
+        try:
+            import numpy as np
+        except ImportError:
+            flat = array('i')
+            for y in y_range:
+                for x in x_range:
+                    if point_in_polygon((x, y), self.polygon):
+                        flat.append(x)
+                        flat.append(y)
+        else:
+            # 与上面的逐点循环顺序相同（逐行，行内 x 递增）
+            xs, ys = np.meshgrid(np.array(x_range, dtype=np.int32), np.array(y_range, dtype=np.int32))
+            inside = polygon_mask(xs, ys, self.polygon)
+            flat = array('i')
+            flat.frombytes(np.column_stack((xs[inside], ys[inside])).astype(np.int32).tobytes())
+        self.valid_points = PointSet.from_flat(flat)
         
         if not self.valid_points:
             # 如果没有找到有效点，使用多边形中心
             cx = sum(p[0] for p in self.polygon) / len(self.polygon)
             cy = sum(p[1] for p in self.polygon) / len(self.polygon)
-            self.valid_points. append((int(cx), int(cy)))
+            self.valid_points.append((int(cx), int(cy)))
     
     def _next_random_point(self):
         """随机模式 - 从预生成的点中选择"""
@@ -0,0 +1,279 @@
+"""
+坐标点集 - 紧凑二进制格式（int16/int32 坐标对 + 文件头），mmap 零拷贝加载
+"""
+import os
+import gc
+import mmap
+import time
+import random
+import struct
+import tracemalloc
+from array import array
+
+
+# 文件头: 魔数, 版本, 类型码(b'h'/b'i'), 填充, 点数（小端）
+MAGIC = b'SKPT'
+VERSION = 1
+HEADER = struct.Struct('<4sHcxQ')
+
+INT16_MIN, INT16_MAX = -32768, 32767
+
+
+class PointSet:
+    """
+    坐标点集 - 扁平存储 [x0, y0, x1, y1, ...]
+    记录器、预览、执行器之间直接传递同一个点集，不复制为元组列表
+    """
+
+    __slots__ = ('_data', '_mmap')
+
+    def __init__(self, values=None, typecode='h'):
+        """
+        :param values: 扁平坐标序列
+        :param typecode: 'h' (int16) 或 'i' (int32)
+        """
+        self._data = array(typecode, values or [])
+        self._mmap = None
+
+    @classmethod
+    def from_points(cls, points):
+        """从 [(x, y), ...] / [[x, y], ...] 构建，已是 PointSet 时原样返回"""
+        if isinstance(points, cls):
+            return points
+
+        flat = array('i')
+        for point in points or []:
+            flat.append(int(point[0]))
+            flat.append(int(point[1]))
+        return cls.from_flat(flat)
+
+    @classmethod
+    def from_flat(cls, flat):
+        """
+        由 int32 扁平数组 array('i') 构建（接管该数组，不复制），
+        坐标都在 int16 范围内时压缩为 int16
+        """
+        point_set = cls()
+        if flat and not (INT16_MIN <= min(flat) and max(flat) <= INT16_MAX):
+            point_set._data = flat
+        else:
+            point_set._data = array('h', flat)
+        return point_set
+
+    @property
+    def typecode(self):
+        return self._data.format if self._mmap else self._data.typecode
+
+    @property
+    def mapped(self):
+        """是否为 mmap 只读视图"""
+        return self._mmap is not None
+
+    # ==================== 序列接口 ====================
+
+    def __len__(self):
+        return len(self._data) // 2
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("点索引越界")
+        return (self._data[2 * index], self._data[2 * index + 1])
+
+    def __iter__(self):
+        data = self._data
+        for i in range(0, len(data), 2):
+            yield (data[i], data[i + 1])
+
+    def __setitem__(self, index, point):
+        self._make_writable(point)
+        if index < 0:
+            index += len(self)
+        self._data[2 * index] = int(point[0])
+        self._data[2 * index + 1] = int(point[1])
+
+    def append(self, point):
+        self._make_writable(point)
+        self._data.append(int(point[0]))
+        self._data.append(int(point[1]))
+
+    def pop(self, index=-1):
+        self._make_writable()
+        point = self[index]
+        if index < 0:
+            index += len(self)
+        del self._data[2 * index:2 * index + 2]
+        return point
+
+    def copy(self):
+        """复制为可写的数组存储"""
+        return PointSet(self._data, self.typecode)
+
+    def scaled(self, sx, sy):
+        """
+        按比例缩放所有点，返回新点集（批量向量化，有 numpy 时一次完成）
+        """
+        return self.transformed(sx, sy)
+
+    def transformed(self, sx, sy, dx=0, dy=0):
+        """
+        (x * sx + dx, y * sy + dy) 四舍五入，返回新点集；恒等变换时返回自身（共享，不复制）
+        """
+        if sx == 1.0 and sy == 1.0 and dx == 0 and dy == 0:
+            return self
+        try:
+            import numpy as np
+        except ImportError:
+            flat = array('i')
+            for x, y in self:
+                flat.append(int(round(x * sx + dx)))
+                flat.append(int(round(y * sy + dy)))
+        else:
+            values = np.frombuffer(self._data, dtype=np.dtype(self.typecode)).reshape(-1, 2)
+            values = np.rint(values * (sx, sy) + (dx, dy))
+            # 范围检查也在 numpy 中完成，避免逐个元素求 min / max
+            typecode = 'h' if not values.size or (
+                values.min() >= INT16_MIN and values.max() <= INT16_MAX) else 'i'
+            point_set = PointSet(typecode=typecode)
+            point_set._data.frombytes(values.astype(np.dtype(typecode)).tobytes())
+            return point_set
+        return self.from_flat(flat)
+
+    def bounds(self):
+        """(最小 x, 最小 y, 最大 x, 最大 y)，空点集返回 None"""
+        if not len(self):
+            return None
+        xs = self._data[0::2]
+        ys = self._data[1::2]
+        return (min(xs), min(ys), max(xs), max(ys))
+
+    def removed(self, index):
+        """返回删除指定点后的新点集（原点集不变）"""
+        point_set = self.copy()
+        point_set.pop(index)
+        return point_set
+
+    def tolist(self):
+        """JSON 导出用 [[x, y], ...]"""
+        return [[x, y] for x, y in self]
+
+    def _make_writable(self, point=None):
+        """mmap 视图写时复制；坐标超出 int16 时升级为 int32"""
+        if self._mmap is not None:
+            data = array(self._data.format)
+            data.frombytes(self._data.tobytes())
+            self.close()
+            self._data = data
+        if point is not None and self._data.typecode == 'h' and not (
+                INT16_MIN <= point[0] <= INT16_MAX and INT16_MIN <= point[1] <= INT16_MAX):
+            self._data = array('i', self._data)
+
+    # ==================== 文件 ====================
+
+    def save(self, path):
+        """写入二进制文件（临时文件 + 原子替换）"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, self.typecode.encode(), len(self)))
+            f.write(self._data.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """mmap 加载，坐标直接从映射内存读取，不复制"""
+        with open(path, 'rb') as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            magic, version, typecode, count = HEADER.unpack_from(mm, 0)
+            typecode = typecode.decode()
+            if magic != MAGIC or version != VERSION or typecode not in ('h', 'i'):
+                raise ValueError(f"无效的坐标点文件: {path}")
+
+            size = count * 2 * array(typecode).itemsize
+            view = memoryview(mm)[HEADER.size:HEADER.size + size].cast(typecode)
+        except Exception:
+            mm.close()
+            raise
+
+        point_set = cls()
+        point_set._data = view
+        point_set._mmap = mm
+        return point_set
+
+    def close(self):
+        """释放 mmap"""
+        if self._mmap is not None:
+            self._data.release()
+            self._mmap.close()
+            self._mmap = None
+            self._data = array('h')
+
+
+def _footprint(build):
+    """build() 返回的对象占用的内存（tracemalloc 统计的净增量，字节）"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = build()
+        size = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    del result
+    return size
+
+
+def benchmark(n=1000000, width=2560, height=1440, seed=0):
+    """
+    坐标点存储的内存基准测试（换算为每百万点的占用）
+    坐标取 0~width / 0~height 的随机值，与窗口内的实际坐标点量级相同
+    :return: {'tuples_mb', 'lists_mb', 'int16_mb', 'int32_mb', 'share_mb', 'scale_ms'}
+             tuples / lists 为元组列表、JSON 式列表的占用；share 为 numpy 视图的额外占用（零拷贝）
+    """
+    rng = random.Random(seed)
+    flat = array('i')
+    for _ in range(n):
+        flat.append(rng.randrange(width))
+        flat.append(rng.randrange(height))
+    per_million = 1000000 / n / (1024 * 1024)
+
+    def points(make):
+        return lambda: [make(flat[i], flat[i + 1]) for i in range(0, len(flat), 2)]
+
+    result = {
+        'tuples_mb': _footprint(points(lambda x, y: (x, y))) * per_million,
+        'lists_mb': _footprint(points(lambda x, y: [x, y])) * per_million,
+        'int16_mb': _footprint(lambda: PointSet.from_flat(array('i', flat))) * per_million,
+        'int32_mb': _footprint(lambda: array('i', flat)) * per_million,
+    }
+
+    point_set = PointSet.from_flat(array('i', flat))
+    try:
+        import numpy as np
+    except ImportError:
+        result['share_mb'] = None
+    else:
+        result['share_mb'] = _footprint(
+            lambda: np.frombuffer(point_set._data, dtype=np.int16).reshape(-1, 2)
+        ) * per_million
+
+    start = time.perf_counter()
+    point_set.scaled(1.25, 1.25)
+    result['scale_ms'] = (time.perf_counter() - start) * 1000
+    return result
+
+
+if __name__ == '__main__':
+    stats = benchmark()
+    print("每百万点内存占用:")
+    print(f"  元组列表 [(x, y), ...]      {stats['tuples_mb']:.1f} MB")
+    print(f"  列表列表 [[x, y], ...]      {stats['lists_mb']:.1f} MB")
+    print(f"  PointSet int16              {stats['int16_mb']:.1f} MB")
+    print(f"  array('i') int32            {stats['int32_mb']:.1f} MB")
+    if stats['share_mb'] is not None:
+        print(f"  numpy 视图（共享缓冲区）    {stats['share_mb']:.3f} MB")
+    print(f"批量缩放 100 万点: {stats['scale_ms']:.1f} ms")
\ No newline at end of file
@@ -0,0 +1,201 @@
+"""
+多配置档管理 - 元数据索引 + 懒加载 + LRU 缓存
+配置正文存 JSON，坐标点存二进制点集文件（mmap 加载）
+"""
+import os
+import time
+from collections import OrderedDict
+
+from utils.config import ConfigManager
+from core.point_store import PointSet
+
+
+class ProfileStore:
+    """配置档仓库"""
+
+    INDEX_FILE = "index.json"
+
+    def __init__(self, directory="profiles", cache_size=8, read_only=False):
+        """
+        :param directory: 配置档目录
+        :param cache_size: 常驻内存的最近使用配置档数量
+        :param read_only: 只读取不保存（不清理文件，其他运行中的实例可能仍在使用）
+        """
+        self.directory = directory
+        self.cache_size = cache_size
+        os.makedirs(directory, exist_ok=True)
+
+        self._index_manager = ConfigManager(os.path.join(directory, self.INDEX_FILE))
+        index = self._index_manager.load() or {}
+        self.active = index.get('active')
+        # {名称: {'file', 'skill_key', 'points', 'updated'}}，保持插入顺序
+        self._meta = index.get('profiles', {})
+        self._next_id = index.get('next_id', len(self._meta) + 1)
+
+        self._cache = OrderedDict()
+        self._managers = {}
+        if not read_only:
+            self._remove_orphan_points()
+
+    # ==================== 索引 ====================
+
+    def names(self):
+        return list(self._meta)
+
+    def metadata(self, name):
+        return self._meta.get(name)
+
+    def __contains__(self, name):
+        return name in self._meta
+
+    def __len__(self):
+        return len(self._meta)
+
+    def next_name(self, name, step=1):
+        """循环切换时的下一个配置档"""
+        names = self.names()
+        if not names:
+            return None
+        if name not in self._meta:
+            return names[0]
+        return names[(names.index(name) + step) % len(names)]
+
+    def _save_index(self):
+        self._index_manager.save({
+            'active': self.active,
+            'next_id': self._next_id,
+            # 拷贝一份，后台写入期间索引可能被修改
+            'profiles': {name: dict(meta) for name, meta in self._meta.items()},
+        })
+
+    # ==================== 读写 ====================
+
+    def get(self, name):
+        """读取配置档（命中缓存时无磁盘 I/O）"""
+        if name in self._cache:
+            self._cache.move_to_end(name)
+            return self._cache[name]
+
+        meta = self._meta.get(name)
+        if meta is None:
+            return None
+
+        config = self._manager(meta['file']).load() or {}
+        points_file = meta.get('points_file')
+        if points_file:
+            try:
+                config['skill_points'] = PointSet.load(os.path.join(self.directory, points_file))
+            except (OSError, ValueError) as e:
+                print(f"加载坐标点失败: {e}")
+                config['skill_points'] = PointSet()
+        else:
+            # 旧版配置档：坐标点仍在 JSON 中
+            config['skill_points'] = PointSet.from_points(config.get('skill_points', []))
+
+        self._remember(name, config)
+        return config
+
+    def switch(self, name):
+        """切换当前配置档"""
+        config = self.get(name)
+        if config is not None and name != self.active:
+            self.active = name
+            self._save_index()
+        return config
+
+    def save(self, name, config):
+        """保存配置档（写入在后台合并执行）"""
+        meta = self._meta.get(name)
+        if meta is None:
+            meta = {'file': f"profile_{self._next_id}.json"}
+            self._next_id += 1
+            self._meta[name] = meta
+
+        points = PointSet.from_points(config.get('skill_points'))
+        cached = self._cache.get(name)
+        if cached is None or cached.get('skill_points') is not points or 'points_file' not in meta:
+            self._save_points(meta, points)
+
+        meta['skill_key'] = config.get('skill_key', '')
+        meta['points'] = len(points)
+        meta['updated'] = time.time()
+
+        config = dict(config, skill_points=points)
+        self._remember(name, config)
+        self._manager(meta['file']).save(
+            {k: v for k, v in config.items() if k != 'skill_points'}
+        )
+        self._save_index()
+
+    def delete(self, name):
+        meta = self._meta.pop(name, None)
+        if meta is None:
+            return False
+
+        self._cache.pop(name, None)
+        manager = self._managers.pop(meta['file'], None)
+        if manager:
+            manager.close()
+        self._remove_file(meta['file'])
+        if meta.get('points_file'):
+            self._remove_file(meta['points_file'])
+
+        if self.active == name:
+            self.active = next(iter(self._meta), None)
+        self._save_index()
+        return True
+
+    def import_config(self, name, config):
+        """从旧版单文件配置导入（首次使用时迁移 config.json）"""
+        if config and name not in self._meta:
+            self.save(name, config)
+            if self.active is None:
+                self.active = name
+                self._save_index()
+
+    def close(self):
+        """写出所有待保存内容"""
+        for manager in self._managers.values():
+            manager.close()
+        self._index_manager.close()
+
+    def _manager(self, file_name):
+        manager = self._managers.get(file_name)
+        if manager is None:
+            manager = ConfigManager(os.path.join(self.directory, file_name))
+            self._managers[file_name] = manager
+        return manager
+
+    def _save_points(self, meta, points):
+        """
+        写入新一代点集文件再切换索引
+        旧文件可能仍被执行器 mmap 映射，不覆盖；磁盘上的索引在后台写入前仍引用旧文件，
+        因此这里不删除，留给下次启动时的 _remove_orphan_points 清理
+        """
+        generation = meta.get('points_generation', 0) + 1
+        stem = os.path.splitext(meta['file'])[0]
+        points_file = f"{stem}.{generation}.pts"
+        points.save(os.path.join(self.directory, points_file))
+
+        meta['points_file'] = points_file
+        meta['points_generation'] = generation
+
+    def _remove_file(self, file_name):
+        try:
+            os.remove(os.path.join(self.directory, file_name))
+        except OSError:
+            pass
+
+    def _remove_orphan_points(self):
+        """清理索引中已不引用的点集文件"""
+        used = {meta.get('points_file') for meta in self._meta.values()}
+        for file_name in os.listdir(self.directory):
+            if file_name.endswith('.pts') and file_name not in used:
+                self._remove_file(file_name)
+
+    def _remember(self, name, config):
+        """放入 LRU 缓存"""
+        self._cache[name] = config
+        self._cache.move_to_end(name)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
\ No newline at end of file
@@ -0,0 +1,192 @@
+"""
+技能循环调度 - 多技能按冷却与优先级轮转
+"""
+import time
+import heapq
+import itertools
+
+from core.point_store import PointSet
+
+
+class Skill:
+    """单个技能"""
+
+    __slots__ = ('key', 'cooldown', 'priority', 'points', 'probes', 'point_index', 'casts', 'last_cast')
+
+    def __init__(self, key, cooldown, priority=0, points=None, probes=None):
+        """
+        :param key: 按键
+        :param cooldown: 冷却时间（秒）
+        :param priority: 优先级，越大越优先
+        :param points: 专属坐标点集，为 None 时使用全局坐标点
+        :param probes: 释放前需满足的 PixelProbe 列表
+        """
+        self.key = key
+        self.cooldown = cooldown
+        self.priority = priority
+        self.points = PointSet.from_points(points) if points else None
+        self.probes = probes or []
+        self.point_index = 0
+        self.casts = 0
+        self.last_cast = None
+
+    def next_point(self):
+        """专属坐标点轮转"""
+        point = self.points[self.point_index]
+        self.point_index = (self.point_index + 1) % len(self.points)
+        return point
+
+    @classmethod
+    def from_config(cls, item):
+        # 画面采集只在执行时需要，界面导入 parse_skills 等不加载
+        from core.capture import parse_probes
+
+        return cls(
+            item['key'],
+            item.get('cooldown', 0) / 1000.0,
+            item.get('priority', 0),
+            item.get('points'),
+            parse_probes(item.get('probes')),
+        )
+
+
+def parse_skills(text):
+    """
+    解析技能循环文本 "q:1000:1, w:5000:3"（按键:冷却ms:优先级）
+    :return: 配置列表 [{'key', 'cooldown', 'priority'}, ...]
+    """
+    skills = []
+    for part in text.replace('，', ',').split(','):
+        fields = [f.strip() for f in part.split(':')]
+        if not fields[0]:
+            continue
+        try:
+            cooldown = int(fields[1]) if len(fields) > 1 and fields[1] else 0
+            priority = int(fields[2]) if len(fields) > 2 and fields[2] else 0
+        except ValueError:
+            raise ValueError(f"技能格式错误: {part.strip()}")
+        skills.append({'key': fields[0], 'cooldown': cooldown, 'priority': priority})
+    return skills
+
+
+def merge_skill_points(skills, previous):
+    """界面文本不含专属坐标点和探针，按按键沿用原配置中的设置"""
+    extras = {
+        s['key']: {k: s[k] for k in ('points', 'probes') if s.get(k)}
+        for s in previous or []
+    }
+    for skill in skills:
+        skill.update(extras.get(skill['key'], {}))
+    return skills
+
+
+def format_skills(skills):
+    """parse_skills 的逆操作"""
+    return ', '.join(f"{s['key']}:{s.get('cooldown', 0)}:{s.get('priority', 0)}" for s in skills)
+
+
+class RotationScheduler:
+    """
+    循环调度器
+    冷却中的技能按就绪时间排在一个堆里，就绪的技能按优先级排在另一个堆里，
+    取下一个技能为 O(log n)；
+    传入时间轮时冷却改为时间轮定时器，到期回调把技能移入就绪堆
+    """
+
+    def __init__(self, skills, clock=time.perf_counter, wheel=None):
+        """
+        :param skills: Skill 列表
+        :param clock: 时钟函数（测试时可注入假时钟）
+        :param wheel: 共享的 TimerWheel，为 None 时使用冷却堆
+        """
+        self.skills = list(skills)
+        self.wheel = wheel
+        self.clock = wheel.clock if wheel else clock
+        self._timers = {}   # 技能 -> 冷却定时器
+        self._seq = itertools.count()
+        self._cooling = []  # (就绪时间, 序号, 技能)
+        self._ready = []    # (-优先级, 序号, 技能)
+        self.reset()
+
+    def reset(self):
+        """全部技能就绪"""
+        self.start_time = self.clock()
+        self._cooling = []
+        if self.wheel:
+            for timer in self._timers.values():
+                self.wheel.cancel(timer)
+            self._timers = {}
+        self._ready = [(-s.priority, next(self._seq), s) for s in self.skills]
+        heapq.heapify(self._ready)
+        for skill in self.skills:
+            skill.casts = 0
+            skill.last_cast = None
+
+    def _promote(self, now):
+        """冷却结束的技能移入就绪堆"""
+        if self.wheel:
+            self.wheel.advance(now)
+            return
+        while self._cooling and self._cooling[0][0] <= now:
+            _, seq, skill = heapq.heappop(self._cooling)
+            heapq.heappush(self._ready, (-skill.priority, seq, skill))
+
+    def pop_ready(self):
+        """取出优先级最高的就绪技能，没有则返回 None"""
+        self._promote(self.clock())
+        if not self._ready:
+            return None
+        return heapq.heappop(self._ready)[2]
+
+    def commit(self, skill):
+        """技能已释放，进入冷却"""
+        now = self.clock()
+        skill.casts += 1
+        skill.last_cast = now
+        if self.wheel:
+            seq = next(self._seq)
+            self._timers[skill] = self.wheel.schedule(
+                skill.cooldown, lambda: self._on_cooldown_end(skill, seq)
+            )
+            return
+        heapq.heappush(self._cooling, (now + skill.cooldown, next(self._seq), skill))
+
+    def defer(self, skill, delay):
+        """条件不满足、未释放的技能延后 delay 秒再尝试（不计入释放次数）"""
+        seq = next(self._seq)
+        if self.wheel:
+            self._timers[skill] = self.wheel.schedule(
+                delay, lambda: self._on_cooldown_end(skill, seq)
+            )
+        else:
+            heapq.heappush(self._cooling, (self.clock() + delay, seq, skill))
+
+    def _on_cooldown_end(self, skill, seq):
+        """时间轮回调：冷却结束"""
+        self._timers.pop(skill, None)
+        heapq.heappush(self._ready, (-skill.priority, seq, skill))
+
+    def next_ready_time(self):
+        """最早就绪时间（已有就绪技能时为当前时间）"""
+        if self._ready:
+            return self.clock()
+        if self.wheel:
+            # 时间轮中可能还有其他功能的定时器，提前唤醒无妨，pop_ready 会再推进
+            return self.wheel.next_deadline()
+        if self._cooling:
+            return self._cooling[0][0]
+        return None
+
+    def utilisation(self, skill):
+        """冷却利用率：技能处于冷却中的时间占比，1.0 表示冷却一结束就释放"""
+        elapsed = self.clock() - self.start_time
+        if elapsed <= 0 or skill.cooldown <= 0:
+            return 0.0
+        busy = skill.casts * skill.cooldown
+        if skill.last_cast is not None:
+            # 最后一次冷却尚未结束的部分不计入
+            busy -= max(skill.last_cast + skill.cooldown - self.clock(), 0.0)
+        return min(busy / elapsed, 1.0)
+
+    def summary(self):
+        return ' '.join(f"{s.key} {self.utilisation(s) * 100:.0f}%" for s in self.skills)
\ No newline at end of file
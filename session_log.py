@@ -0,0 +1,325 @@
+"""
+会话日志 - 每次释放、暂停/继续、轮次切换写入紧凑的二进制记录
+记录在执行线程中打包后入队，由后台线程批量写入缓冲文件；
+读取与分析逐块流式进行，不需要把整个文件载入内存
+
+文件格式（小端）:
+    文件头  magic 'ASLG' | 版本 u16 | 开始时间 f64（time.time）| 释放间隔 f32 | 轮次间隔 f32（秒）
+    记录    类型 u8 | 时间 f64（相对开始，秒）| 点序号 u32 | 屏幕 x i32 | 屏幕 y i32 | 按键 8s
+            | 准备耗时 f32 | 投递耗时 f32（秒）
+"""
+import os
+import time
+import struct
+import itertools
+import threading
+from collections import deque, namedtuple
+
+from core.timing import PeriodHistogram
+
+
+MAGIC = b'ASLG'
+VERSION = 1
+HEADER = struct.Struct('<4sHdff')
+RECORD = struct.Struct('<BdIii8sff')
+
+# 记录类型
+CAST = 1
+PAUSE = 2
+AUTO_PAUSE = 3   # 防误触自动暂停
+RESUME = 4
+ROUND = 5        # 一轮结束，开始轮次间隔等待
+STOP = 6
+
+KIND_NAMES = {
+    CAST: '释放', PAUSE: '暂停', AUTO_PAUSE: '自动暂停',
+    RESUME: '继续', ROUND: '轮次', STOP: '停止',
+}
+
+Header = namedtuple('Header', 'start_time interval round_interval')
+Record = namedtuple('Record', 'kind t index x y key prepare cast')
+
+
+def session_log_path(directory):
+    """按开始时间（精确到毫秒）命名的日志文件路径（目录不存在时创建）"""
+    os.makedirs(directory, exist_ok=True)
+    now = time.time()
+    stamp = time.strftime('%Y%m%d_%H%M%S', time.localtime(now))
+    return os.path.join(directory, f"session_{stamp}_{int(now % 1 * 1000):03d}.aslog")
+
+
+def _create_exclusive(path, buffer_size):
+    """
+    新建文件，不覆盖已有日志：同名文件存在时依次尝试 name_1、name_2 ...
+    :return: (文件对象, 实际路径)
+    """
+    base, ext = os.path.splitext(path)
+    candidate = path
+    for n in itertools.count(1):
+        try:
+            return open(candidate, 'xb', buffering=buffer_size), candidate
+        except FileExistsError:
+            candidate = f"{base}_{n}{ext}"
+
+
+class SessionLog:
+    """会话日志写入器（记录方法可从任意线程调用，不做磁盘 I/O）"""
+
+    def __init__(self, path, interval=0.0, round_interval=0.0,
+                 flush_interval=0.5, buffer_size=64 * 1024):
+        """
+        :param interval: 配置的释放间隔（秒），分析抖动时作为基准
+        :param flush_interval: 后台线程写入间隔（秒）
+        :param buffer_size: 文件缓冲区大小
+        """
+        self.flush_interval = flush_interval
+        self.origin = time.perf_counter()
+        self.count = 0
+
+        # deque 的 append / popleft 为原子操作，执行线程入队无需加锁
+        self._queue = deque()
+        self._stop = threading.Event()
+        # 同一秒内停止又开始（切换配置档）时不能截断上一次仍在写入的日志
+        self._file, self.path = _create_exclusive(path, buffer_size)
+        self._file.write(HEADER.pack(MAGIC, VERSION, time.time(), interval, round_interval))
+        self._thread = threading.Thread(target=self._writer_loop, daemon=True)
+        self._thread.start()
+
+    def cast(self, index, x, y, key, prepare, cast):
+        """
+        记录一次释放
+        :param prepare: 本次节拍开始到投递前的耗时（秒）
+        :param cast: 输入后端投递耗时（秒）
+        """
+        self._queue.append(RECORD.pack(
+            CAST, time.perf_counter() - self.origin, index, int(x), int(y),
+            key.encode('utf-8')[:8], prepare, cast
+        ))
+        self.count += 1
+
+    def event(self, kind, index=0):
+        """记录暂停、继续、轮次等事件"""
+        self._queue.append(RECORD.pack(
+            kind, time.perf_counter() - self.origin, index, 0, 0, b'', 0.0, 0.0
+        ))
+        self.count += 1
+
+    def _writer_loop(self):
+        """后台写入线程"""
+        while not self._stop.wait(self.flush_interval):
+            self._drain()
+            self._file.flush()
+        self._drain()
+
+    def _drain(self):
+        chunks = []
+        queue = self._queue
+        while queue:
+            chunks.append(queue.popleft())
+        if chunks:
+            try:
+                self._file.write(b''.join(chunks))
+            except OSError as e:
+                print(f"写入会话日志失败: {e}")
+
+    def close(self):
+        """写出剩余记录并关闭文件"""
+        if self._thread:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+            self._file.close()
+
+
+# ==================== 读取 ====================
+
+def read_header(f):
+    data = f.read(HEADER.size)
+    if len(data) < HEADER.size:
+        raise ValueError("会话日志文件不完整")
+    magic, version, start_time, interval, round_interval = HEADER.unpack(data)
+    if magic != MAGIC:
+        raise ValueError("不是会话日志文件")
+    if version != VERSION:
+        raise ValueError(f"不支持的会话日志版本: {version}")
+    return Header(start_time, interval, round_interval)
+
+
+def iter_records(path, chunk_records=4096, raw=False):
+    """
+    逐块读取记录（内存占用与文件大小无关）
+    写入中断导致的不完整尾部记录会被忽略
+    :param raw: 直接返回解包的元组（按键为未解码的字节），统计大文件时更快
+    :return: (Header, Record 迭代器)
+    """
+    f = open(path, 'rb')
+    try:
+        header = read_header(f)
+    except ValueError:
+        f.close()
+        raise
+
+    def records():
+        size = RECORD.size
+        with f:
+            while True:
+                data = f.read(size * chunk_records)
+                usable = len(data) - len(data) % size
+                if raw:
+                    yield from RECORD.iter_unpack(data[:usable])
+                else:
+                    for kind, t, index, x, y, key, prepare, cast in RECORD.iter_unpack(data[:usable]):
+                        yield Record(kind, t, index, x, y,
+                                     key.rstrip(b'\0').decode('utf-8', 'replace'), prepare, cast)
+                if usable < size * chunk_records:
+                    return
+
+    return header, records()
+
+
+def replay(path, speed=1.0):
+    """
+    按原始节奏回放记录（speed 为倍速，0 表示不等待）
+    :return: Record 迭代器
+    """
+    _, records = iter_records(path)
+    start = time.perf_counter()
+    for record in records:
+        if speed > 0:
+            delay = record.t / speed - (time.perf_counter() - start)
+            if delay > 0:
+                time.sleep(delay)
+        yield record
+
+
+# ==================== 分析 ====================
+
+class _Running:
+    """流式均值 / 标准差 / 最大值（Welford）"""
+
+    __slots__ = ('count', 'mean', '_m2', 'max')
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.max = 0.0
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        if value > self.max:
+            self.max = value
+
+    @property
+    def std(self):
+        return (self._m2 / (self.count - 1)) ** 0.5 if self.count > 1 else 0.0
+
+
+def analyze(path):
+    """
+    流式统计会话日志
+    :return: {'casts', 'duration', 'throughput', 'interval', 'jitter', 'prepare', 'cast',
+              'pauses', 'auto_pauses', 'paused_time', 'longest_pause', 'rounds', 'header'}
+             其中 prepare / cast 为 (平均, 最大) 秒
+    """
+    header, records = iter_records(path, raw=True)
+    casts = 0
+    first = last = None
+    previous_cast = previous_gap = None
+    interval = _Running()
+    jitter = PeriodHistogram()
+    # 准备 / 投递耗时只需均值与最大值，直接累加（每条记录少两次方法调用）
+    prepare_sum = prepare_max = cast_sum = cast_max = 0.0
+    pauses = auto_pauses = rounds = 0
+    paused_at = None
+    paused_time = longest_pause = 0.0
+
+    for kind, t, _, _, _, _, prepare_time, cast_time in records:
+        if kind == CAST:
+            casts += 1
+            if first is None:
+                first = t
+            last = t
+            if previous_cast is not None:
+                gap = t - previous_cast
+                interval.add(gap)
+                # 抖动：相邻两次释放间隔之差
+                if previous_gap is not None:
+                    jitter.record((gap - previous_gap) * 1000)
+                previous_gap = gap
+            previous_cast = t
+            prepare_sum += prepare_time
+            cast_sum += cast_time
+            if prepare_time > prepare_max:
+                prepare_max = prepare_time
+            if cast_time > cast_max:
+                cast_max = cast_time
+        elif kind in (PAUSE, AUTO_PAUSE):
+            if paused_at is None:
+                paused_at = t
+                pauses += 1
+                auto_pauses += kind == AUTO_PAUSE
+            previous_cast = previous_gap = None
+        elif kind == RESUME:
+            if paused_at is not None:
+                duration = t - paused_at
+                paused_time += duration
+                longest_pause = max(longest_pause, duration)
+                paused_at = None
+        elif kind == ROUND:
+            rounds += 1
+            # 轮次间隔不计入释放间隔
+            previous_cast = previous_gap = None
+        elif kind == STOP and paused_at is not None:
+            duration = t - paused_at
+            paused_time += duration
+            longest_pause = max(longest_pause, duration)
+            paused_at = None
+
+    duration = (last - first) if casts > 1 else 0.0
+    return {
+        'header': header,
+        'casts': casts,
+        'duration': duration,
+        'throughput': (casts - 1) / duration if duration > 0 else 0.0,
+        'interval': interval,
+        'jitter': jitter,
+        'prepare': (prepare_sum / casts if casts else 0.0, prepare_max),
+        'cast': (cast_sum / casts if casts else 0.0, cast_max),
+        'pauses': pauses,
+        'auto_pauses': auto_pauses,
+        'paused_time': paused_time,
+        'longest_pause': longest_pause,
+        'rounds': rounds,
+    }
+
+
+def format_report(stats):
+    """分析结果转为可读文本"""
+    header = stats['header']
+    interval = stats['interval']
+    lines = [
+        f"开始时间: {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(header.start_time))}"
+        f"  配置间隔 {header.interval * 1000:.0f}ms  轮次间隔 {header.round_interval:.2f}s",
+        f"释放: {stats['casts']} 次  持续 {stats['duration']:.1f}s  "
+        f"吞吐 {stats['throughput']:.2f} 次/秒  轮次 {stats['rounds']}",
+        f"释放间隔: 平均 {interval.mean * 1000:.2f}ms  标准差 {interval.std * 1000:.2f}ms  "
+        f"最大 {interval.max * 1000:.2f}ms",
+    ]
+    if stats['jitter'].count:
+        jitter = stats['jitter']
+        lines.append(f"抖动（相邻间隔之差）: p50≤{jitter.percentile(0.5):.2f}ms "
+                     f"p99≤{jitter.percentile(0.99):.2f}ms max {jitter.max:.2f}ms")
+    prepare, cast = stats['prepare'], stats['cast']
+    lines.append(
+        f"耗时: 准备 平均 {prepare[0] * 1000:.2f}ms 最大 {prepare[1] * 1000:.2f}ms"
+        f"  投递 平均 {cast[0] * 1000:.2f}ms 最大 {cast[1] * 1000:.2f}ms"
+    )
+    lines.append(
+        f"暂停: {stats['pauses']} 次（自动 {stats['auto_pauses']}）  "
+        f"共 {stats['paused_time']:.1f}s  最长 {stats['longest_pause']:.1f}s"
+    )
+    return '\n'.join(lines)
\ No newline at end of file
@@ -0,0 +1,471 @@
+"""
+技能执行核心 - 不依赖 Qt，可在图形界面（SkillExecutor）或无界面模式下运行
+"""
+import time
+
+from core.input_backend import create_backend, INPUT_MODE_FOREGROUND
+from core.execution_control import ExecutionControl
+from core.timing import PreciseTimer
+from core.point_store import PointSet
+from core.rotation import RotationScheduler, Skill
+from core.timer_wheel import TimerWheel
+from core.coords import WindowTransform, POINT_ORIGIN_WINDOW
+from core.capture import create_capture_source, FrameCache, parse_probes, probes_region, probes_match
+from core import metrics
+from core.session_log import SessionLog, PAUSE, AUTO_PAUSE, RESUME, ROUND, STOP
+from core.anti_touch import AntiTouchPolicy, AntiTouchEngine, ACTION_SKIP, ACTION_RESUME
+from utils.input_hook import MouseHook, KeyboardHook
+
+
+class Signal:
+    """不依赖 Qt 的简易信号：emit 时在调用线程内依次执行已连接的回调"""
+    
+    __slots__ = ('_slots',)
+    
+    def __init__(self):
+        self._slots = []
+    
+    def connect(self, slot):
+        self._slots.append(slot)
+    
+    def emit(self, *args):
+        for slot in self._slots:
+            slot(*args)
+
+
+class SkillRunner:
+    """技能执行核心 - run() 阻塞执行主循环，pause/resume/stop 可从任意线程调用"""
+    
+    def __init__(self, config, window_manager):
+        # 信号：(执行次数, 坐标, 运行时间, 点序号) / (轮次, 进度, 是否等待, 剩余秒数)
+        self.status_updated = Signal()
+        self.round_updated = Signal()
+        self.mouse_moved_detected = Signal()
+        self.error_occurred = Signal()
+        # 防误触暂停后用户空闲，已自动继续
+        self.auto_resumed = Signal()
+        
+        self.config = config
+        self. window_manager = window_manager
+        
+        # 控制通道：暂停/继续/停止立即唤醒等待
+        self.control = ExecutionControl()
+        
+        # 精确计时：固定频率节拍，粗睡眠 + 自旋
+        self.timer = PreciseTimer(self.control) if config.get('precise_timing', False) else None
+        self. exec_count = 0
+        self.current_pos = (0, 0)
+        self.start_time = 0
+        
+        # 坐标点列表
+        self.points = PointSet.from_points(config.get('points', []))
+        self.points_count = len(self.points)
+        # 界面在运行中修改坐标点时放在这里，由执行线程在下次释放前接管
+        self._pending_points = None
+        
+        # 坐标变换：客户区/窗口坐标点 -> 屏幕坐标，窗口移动、缩放或 DPI 变化时才重新计算
+        self.transform = WindowTransform(
+            config.get('window_handle'),
+            config.get('point_origin', POINT_ORIGIN_WINDOW),
+            config.get('point_dpi'),
+            config.get('point_resolution'),
+        )
+        # 按当前分辨率批量缩放后的坐标点，变换系数变化时整体重建
+        self.plan = None
+        self.plan_version = None
+        
+        # 轮次相关
+        self.current_round = 0
+        self.round_interval = config.get('round_interval', 5.0)
+        self.current_point_index = 0
+        
+        # 时间轮：技能冷却、轮次间隔、倒计时刷新等截止时间统一登记，每次只唤醒一次
+        self.wheel = TimerWheel()
+        
+        # 技能循环（多技能、冷却、优先级），未配置时使用单一 skill_key
+        skills = config.get('skills') or []
+        self.rotation = RotationScheduler(
+            [Skill.from_config(s) for s in skills], wheel=self.wheel
+        ) if skills else None
+        
+        # 输入后端
+        self.backend = create_backend(
+            config.get('input_mode', INPUT_MODE_FOREGROUND), config.get('trajectory', False)
+        )
+        
+        # 防误触（后台模式不移动光标，无需检测）
+        self.anti_touch = config.get('anti_touch', True) and self.backend.moves_cursor
+        
+        # 像素探针：释放前检查画面状态，同一节拍内所有探针共用一次截取
+        self.probes = parse_probes(config.get('probes'))
+        all_probes = self.probes + [p for s in (self.rotation.skills if self.rotation else []) for p in s.probes]
+        templates = config.get('templates') or {}
+        dynamic = bool(templates.get('dynamic') and templates.get('files'))
+        
+        # 画面采集源：探针与模板识别共用同一帧缓冲区，两者都没有时不创建
+        self.capture_source = create_capture_source(
+            print_window=not self.backend.moves_cursor
+        ) if all_probes or dynamic else None
+        self.capture = FrameCache(
+            self.capture_source, config.get('window_handle'), probes_region(all_probes)
+        ) if all_probes else None
+        self.skipped_count = 0
+        
+        # 模板识别：动态模式下每轮开始时按模板重新识别坐标点
+        self.locator = None
+        self.locator_error = None
+        self.points_stale = False
+        if dynamic:
+            try:
+                from core.template_match import TemplateLocator
+                self.locator = TemplateLocator.from_config(templates, self.capture_source)
+            except (ImportError, OSError) as e:
+                self.locator_error = f"模板识别不可用: {e}"
+        
+        # 防误触策略：钩子事件驱动判定，动作为暂停 / 跳过释放 / 空闲后自动继续
+        self.anti_touch_policy = AntiTouchPolicy.from_config(config.get('anti_touch_policy'))
+        self.anti_touch_engine = AntiTouchEngine(self.anti_touch_policy)
+        self.auto_resume = False
+        self.mouse_hook = None
+        self.keyboard_hook = None
+        
+        # 会话日志：每次执行一个文件，run() 开始时创建
+        self.session_log = None
+    
+    @property
+    def running(self):
+        return self.control.running
+    
+    @property
+    def is_paused(self):
+        return self.control.paused
+    
+    def auto_resume_remaining(self):
+        """距离自动继续还剩多少秒，不会自动继续时返回 None（界面倒计时与状态输出用）"""
+        if not (self.auto_resume and self.control.paused):
+            return None
+        return self.anti_touch_engine.idle_remaining()
+    
+    def run(self):
+        """执行主循环"""
+        if self.locator_error:
+            self.error_occurred.emit(self.locator_error)
+            return
+        if not self.points and not self.locator:
+            self.error_occurred.emit("没有设置坐标点！")
+            return
+        
+        self.control.start()
+        self. exec_count = 0
+        self.current_round = 1
+        self.current_point_index = 0
+        self.skipped_count = 0
+        self.points_stale = self.locator is not None
+        self. start_time = time.time()
+        
+        # 防误触：由鼠标、键盘钩子事件驱动，无需轮询光标
+        if self.anti_touch:
+            self.anti_touch_engine.reset()
+            self.auto_resume = False
+            self.mouse_hook = MouseHook(self._on_input_event)
+            self.mouse_hook.start()
+            if self.anti_touch_policy.keyboard:
+                self.keyboard_hook = KeyboardHook(self._on_key_event)
+                self.keyboard_hook.start()
+        
+        if self.timer:
+            self.timer.start()
+        
+        if self.rotation:
+            self.rotation.reset()
+        
+        if self.config.get('session_log'):
+            try:
+                self.session_log = SessionLog(
+                    self.config['session_log'], self.config['interval'] / 1000.0, self.round_interval
+                )
+            except OSError as e:
+                print(f"创建会话日志失败: {e}")
+        
+        try: 
+            while self.running:
+                # 暂停检查：阻塞至继续或停止
+                if self.is_paused:
+                    if not self._wait_while_paused():
+                        break
+                    if self.timer:
+                        self.timer.reset()
+                tick_start = time.perf_counter()
+                
+                if self.capture:
+                    self.capture.next_tick()
+                
+                if self._pending_points is not None:
+                    self._apply_points(*self._pending_points)
+                
+                # 动态坐标点：新一轮开始前重新识别，未找到目标时本次不释放
+                if self.points_stale and not self._refresh_points():
+                    self.skipped_count += 1
+                    self.control.sleep(self.config['interval'] / 1000.0)
+                    continue
+                
+                # 画面条件（全局探针）不满足，本次不释放，技能循环也不取技能
+                if not probes_match(self.probes, self.capture):
+                    self.skipped_count += 1
+                    self.control.sleep(self.config['interval'] / 1000.0)
+                    continue
+                
+                # 技能循环：取优先级最高、条件满足的就绪技能，没有则等到最早就绪
+                skill = None
+                if self.rotation:
+                    skill = self._pop_castable_skill()
+                    if skill is None:
+                        self.control.sleep(self.rotation.next_ready_time() - self.rotation.clock())
+                        continue
+                
+                # 防误触（跳过释放）：用户操作期间不动光标，空闲后自动恢复
+                if (self.anti_touch and self.anti_touch_policy.action == ACTION_SKIP
+                        and self.anti_touch_engine.active()):
+                    if skill:
+                        self.rotation.defer(skill, self.config['interval'] / 1000.0)
+                    self.skipped_count += 1
+                    metrics.anti_touch_skips.inc()
+                    self.control.sleep(self.config['interval'] / 1000.0)
+                    continue
+                uses_main_points = not (skill and skill.points)
+                
+                # 检查窗口有效性
+                if not self. window_manager.is_window_valid(self.config['window_handle']):
+                    metrics.window_errors.inc()
+                    self. error_occurred.emit("目标窗口已关闭！")
+                    break
+                
+                # 窗口位置未变化时沿用已计算的变换
+                if not self.transform.update():
+                    metrics.window_errors.inc()
+                    self.error_occurred. emit("无法获取窗口位置！")
+                    break
+                
+                # 获取当前坐标点并转换为屏幕坐标
+                if uses_main_points:
+                    rel_x, rel_y = self._current_plan()[self.current_point_index]
+                    screen_x, screen_y = self.transform.place(rel_x, rel_y)
+                else:
+                    rel_x, rel_y = skill.next_point()
+                    screen_x, screen_y = self.transform.to_screen(rel_x, rel_y)
+                
+                self.current_pos = (rel_x, rel_y)
+                
+                # 通过输入后端释放技能
+                key = skill.key if skill else self.config['skill_key']
+                cast_start = time.perf_counter()
+                self.backend.cast(self.config['window_handle'], screen_x, screen_y, key)
+                if self.session_log:
+                    self.session_log.cast(
+                        self.current_point_index, screen_x, screen_y, key,
+                        cast_start - tick_start, time.perf_counter() - cast_start
+                    )
+                if skill:
+                    self.rotation.commit(skill)
+                
+                self.exec_count += 1
+                
+                # 计算进度
+                progress = ((self.current_point_index + 1) / self.points_count) * 100
+                
+                # 发送状态更新
+                runtime = time. time() - self.start_time
+                self.status_updated. emit(
+                    self.exec_count, 
+                    self.current_pos, 
+                    runtime,
+                    self. current_point_index + 1
+                )
+                self.round_updated.emit(self.current_round, progress, False, 0)
+                
+                # 移动到下一个点（技能专属坐标点不推进全局轮次）
+                if uses_main_points:
+                    self.current_point_index += 1
+                
+                # 检查是否完成一轮
+                if self.current_point_index >= self.points_count:
+                    if self.session_log:
+                        self.session_log.event(ROUND, self.current_round)
+                    self._wait_between_rounds()
+                    self. current_round += 1
+                    self.current_point_index = 0
+                    self.points_stale = self.locator is not None
+                    if self.timer:
+                        self.timer.reset()
+                
+                # 等待间隔（暂停/停止时立即返回）
+                if self.timer:
+                    self.timer.wait_period(self.config['interval'] / 1000.0)
+                else:
+                    interval = self.config['interval'] / 1000.0
+                    slept_at = time.perf_counter()
+                    if self.control.sleep(interval):
+                        metrics.period_error.observe(abs(time.perf_counter() - slept_at - interval))
+                
+        except Exception as e: 
+            self.error_occurred. emit(f"执行错误: {str(e)}")
+        finally:
+            self.control.stop()
+            if self.timer:
+                self.timer.close()
+            if self.capture_source:
+                self.capture_source.close()
+            if self.mouse_hook:
+                self.mouse_hook.stop()
+                self.mouse_hook = None
+            if self.keyboard_hook:
+                self.keyboard_hook.stop()
+                self.keyboard_hook = None
+            if self.session_log:
+                self.session_log.event(STOP)
+                self.session_log.close()
+    
+    def _refresh_points(self):
+        """按模板识别结果更新坐标点"""
+        points = self.locator.points(self.config['window_handle'])
+        if not points or not self.transform.update():
+            return False
+        # 识别结果为窗口矩形坐标，转换到坐标点所用的原点与缩放
+        self._apply_points(PointSet.from_points(
+            [self.transform.from_window(x, y) for x, y in points]
+        ))
+        self.points_stale = False
+        return True
+    
+    def _apply_points(self, points, basis=None):
+        """
+        切换坐标点（执行线程内）
+        :param basis: (原点, DPI, 参考分辨率)，为 None 时沿用当前设置
+        """
+        self._pending_points = None
+        if basis is not None:
+            self.transform.origin, self.transform.point_dpi, resolution = basis
+            self.transform.point_resolution = tuple(resolution) if resolution else None
+            self.transform.window_rect = None  # 下次 update 时重新计算
+        self.points = points
+        self.points_count = len(points)
+        self.plan_version = None
+        if self.current_point_index >= self.points_count:
+            self.current_point_index = 0
+    
+    def _current_plan(self):
+        """当前分辨率下的坐标点，窗口尺寸或 DPI 变化后整体批量缩放一次"""
+        if self.plan_version != self.transform.version:
+            self.plan = self.points.scaled(self.transform.sx, self.transform.sy)
+            self.plan_version = self.transform.version
+        return self.plan
+    
+    def set_points(self, points, origin, dpi=None, resolution=None):
+        """运行中更新坐标点（任意线程调用），无需重启执行器"""
+        if points:
+            self._pending_points = (PointSet.from_points(points), (origin, dpi, resolution))
+    
+    def _pop_castable_skill(self):
+        """依次取出就绪技能，条件不满足的延后一个释放间隔再试"""
+        while True:
+            skill = self.rotation.pop_ready()
+            if skill is None or probes_match(skill.probes, self.capture):
+                return skill
+            self.skipped_count += 1
+            self.rotation.defer(skill, self.config['interval'] / 1000.0)
+    
+    def _on_input_event(self, event):
+        """鼠标钩子回调（钩子线程）- 暂停期间也持续判定，用于空闲计时"""
+        if self.anti_touch_engine.feed_mouse(event):
+            self._on_touch()
+    
+    def _on_key_event(self, event):
+        """键盘钩子回调（钩子线程）"""
+        if self.anti_touch_engine.feed_key(event):
+            self._on_touch()
+    
+    def _on_touch(self):
+        """检测到手动操作（钩子线程）- 按策略立即暂停；跳过释放由主循环处理"""
+        if self.is_paused or not self.running or self.anti_touch_policy.action == ACTION_SKIP:
+            return
+        self.auto_resume = self.anti_touch_policy.action == ACTION_RESUME
+        self.control.pause()
+        metrics.anti_touch_pauses.inc()
+        self._log_event(AUTO_PAUSE)
+        self.mouse_moved_detected.emit()
+    
+    def _wait_while_paused(self):
+        """
+        暂停期间阻塞，返回是否仍在运行
+        防误触暂停且策略为空闲后继续时，等到最后一次手动操作之后 idle 秒自动继续；
+        期间的新操作只会推后截止时间，等待本身不轮询
+        """
+        control = self.control
+        while self.auto_resume and control.paused and control.running:
+            remaining = self.anti_touch_engine.idle_remaining()
+            if remaining <= 0:
+                self.resume()
+                metrics.anti_touch_auto_resumes.inc()
+                self.auto_resumed.emit()
+                break
+            control.wait_while_paused(remaining)
+        return control.wait_while_paused()
+    
+    def _wait_between_rounds(self):
+        """轮次之间等待（轮次结束与倒计时刷新均登记在时间轮中）"""
+        if self.round_interval <= 0:
+            return
+        
+        deadline = self.wheel.clock() + self.round_interval
+        done = []
+        refresh = None
+        
+        def on_refresh():
+            nonlocal refresh
+            remaining = deadline - self.wheel.clock()
+            if remaining > 0:
+                self.round_updated.emit(self.current_round, 100, True, remaining)
+                refresh = self.wheel.schedule(min(remaining, 0.1), on_refresh)
+        
+        round_end = self.wheel.schedule(self.round_interval, lambda: done.append(True))
+        on_refresh()
+        
+        try:
+            while self.running and not done:
+                # 被暂停打断时等待继续
+                if not self._sleep_until_deadline():
+                    self._wait_while_paused()
+                self.wheel.advance()
+        finally:
+            self.wheel.cancel(round_end)
+            if refresh:
+                self.wheel.cancel(refresh)
+    
+    def _sleep_until_deadline(self):
+        """睡眠到时间轮中最近的截止时间（暂停/停止时立即返回 False）"""
+        next_deadline = self.wheel.next_deadline()
+        if next_deadline is None:
+            return True
+        return self.control.sleep(next_deadline - self.wheel.clock())
+    
+    def _log_event(self, kind):
+        session_log = self.session_log
+        if session_log and self.running:
+            session_log.event(kind)
+    
+    def pause(self):
+        """暂停执行（手动暂停不会自动继续）"""
+        self.auto_resume = False
+        self.control.pause()
+        self._log_event(PAUSE)
+    
+    def resume(self):
+        """继续执行"""
+        self.auto_resume = False
+        self.anti_touch_engine.reset()
+        self.control.resume()
+        self._log_event(RESUME)
+    
+    def stop(self):
+        """停止执行（主循环在当前等待处立即退出）"""
+        self.control.stop()
\ No newline at end of file
@@ -0,0 +1,336 @@
+"""
+模板匹配 - 在窗口画面中查找目标，生成技能坐标点
+FFT 归一化互相关（NCC），多尺度 + 区域限定 + 上一帧命中位置缓存
+依赖 numpy（可选依赖，只有使用模板识别时才导入本模块）
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from core.capture import ImageFileSource
+
+
+class Match(namedtuple('Match', 'name x y w h score scale')):
+    """一个命中（x, y 为窗口坐标中的左上角）"""
+
+    __slots__ = ()
+
+    @property
+    def center(self):
+        return (self.x + self.w // 2, self.y + self.h // 2)
+
+
+def frame_to_gray(frame):
+    """BGRA 画面转为灰度 float32 数组（零拷贝读取原缓冲区）"""
+    pixels = np.frombuffer(frame.data, dtype=np.uint8)[:frame.height * frame.stride]
+    pixels = pixels.reshape(frame.height, frame.stride // 4, 4)[:, :frame.width]
+    return (pixels[..., 0] * np.float32(0.114)
+            + pixels[..., 1] * np.float32(0.587)
+            + pixels[..., 2] * np.float32(0.299))
+
+
+def load_template(path):
+    """读取模板图片为灰度数组（Pillow 为可选依赖）"""
+    from PIL import Image
+
+    with Image.open(path) as image:
+        return np.asarray(image.convert('L'), dtype=np.float32)
+
+
+def resize(array, scale):
+    """双线性缩放"""
+    if scale == 1.0:
+        return array
+    h, w = array.shape
+    new_h, new_w = max(int(round(h * scale)), 1), max(int(round(w * scale)), 1)
+    ys = np.linspace(0, h - 1, new_h)
+    xs = np.linspace(0, w - 1, new_w)
+    y0 = np.floor(ys).astype(int)
+    x0 = np.floor(xs).astype(int)
+    y1 = np.minimum(y0 + 1, h - 1)
+    x1 = np.minimum(x0 + 1, w - 1)
+    wy = (ys - y0)[:, None]
+    wx = (xs - x0)[None, :]
+    top = array[y0][:, x0] * (1 - wx) + array[y0][:, x1] * wx
+    bottom = array[y1][:, x0] * (1 - wx) + array[y1][:, x1] * wx
+    return (top * (1 - wy) + bottom * wy).astype(np.float32)
+
+
+def _fft_size(n):
+    """不小于 n 的 2^a * 3^b * 5^c，FFT 较快"""
+    while True:
+        m = n
+        for p in (2, 3, 5):
+            while m % p == 0:
+                m //= p
+        if m == 1:
+            return n
+        n += 1
+
+
+def _window_sums(array, h, w):
+    """所有 h x w 窗口的和（积分图）"""
+    integral = np.zeros((array.shape[0] + 1, array.shape[1] + 1), dtype=np.float64)
+    integral[1:, 1:] = array.cumsum(0).cumsum(1)
+    return integral[h:, w:] - integral[:-h, w:] - integral[h:, :-w] + integral[:-h, :-w]
+
+
+class _ScaledTemplate:
+    """预处理的单尺度模板：去均值、范数、FFT 结果按图像尺寸缓存"""
+
+    def __init__(self, name, array, scale):
+        self.name = name
+        self.scale = scale
+        self.array = resize(array, scale)
+        self.h, self.w = self.array.shape
+        zero_mean = self.array - self.array.mean()
+        self.norm = float(np.sqrt((zero_mean ** 2).sum()))
+        # 相关 = 与翻转模板卷积
+        self.kernel = zero_mean[::-1, ::-1]
+        self._spectra = {}
+
+    def spectrum(self, shape):
+        spectrum = self._spectra.get(shape)
+        if spectrum is None:
+            spectrum = np.fft.rfft2(self.kernel, shape)
+            self._spectra = {shape: spectrum}
+        return spectrum
+
+
+def ncc(image, template, image_spectrum=None, shape=None):
+    """
+    归一化互相关，返回 (H-h+1, W-w+1) 的得分图，范围 [-1, 1]
+    :param image_spectrum: 同一图像匹配多个模板时复用的图像频谱
+    """
+    H, W = image.shape
+    h, w = template.h, template.w
+    if h > H or w > W or template.norm == 0:
+        return None
+
+    if shape is None:
+        shape = (_fft_size(H), _fft_size(W))
+    if image_spectrum is None:
+        image_spectrum = np.fft.rfft2(image, shape)
+    product = np.fft.irfft2(image_spectrum * template.spectrum(shape), shape)
+    numerator = product[h - 1:H, w - 1:W]
+
+    n = h * w
+    sums = _window_sums(image, h, w)
+    sums_sq = _window_sums(image.astype(np.float64) ** 2, h, w)
+    variance = np.maximum(sums_sq - sums * sums / n, 0)
+    denominator = np.sqrt(variance) * template.norm
+
+    scores = np.zeros_like(numerator)
+    valid = denominator > 1e-6 * template.norm
+    scores[valid] = numerator[valid] / denominator[valid]
+    return scores
+
+
+class TemplateMatcher:
+    """模板匹配器"""
+
+    def __init__(self, templates, scales=(1.0,), threshold=0.8, roi=None,
+                 max_hits=16, search_margin=24, full_search_every=30):
+        """
+        :param templates: {名称: 灰度数组}
+        :param scales: 模板缩放比例列表
+        :param threshold: NCC 得分阈值
+        :param roi: 搜索区域 (x, y, w, h)，窗口坐标，为 None 时全画面
+        :param max_hits: 每个模板最多命中数
+        :param search_margin: 在上一帧命中位置附近复查的范围（像素）
+        :param full_search_every: 复查连续命中时每隔多少帧仍做一次全区域搜索，发现后出现的目标
+        """
+        self.templates = [
+            _ScaledTemplate(name, np.asarray(array, dtype=np.float32), scale)
+            for name, array in templates.items() for scale in scales
+        ]
+        self.threshold = threshold
+        self.roi = roi
+        self.max_hits = max_hits
+        self.search_margin = search_margin
+        self.full_search_every = full_search_every
+
+        # 上一帧命中缓存 {名称: [Match, ...]}，以及距上次全区域搜索的帧数
+        self._last = {}
+        self._since_full = {}
+        self.full_searches = 0
+        self.cached_searches = 0
+
+    @classmethod
+    def from_files(cls, paths, **kwargs):
+        """从模板图片文件创建（名称为文件路径）"""
+        return cls({path: load_template(path) for path in paths}, **kwargs)
+
+    def reset(self):
+        self._last = {}
+        self._since_full = {}
+
+    def match(self, gray, origin=(0, 0)):
+        """
+        在灰度画面中查找所有模板
+        :param origin: 画面左上角的窗口坐标
+        :return: 按得分降序的 Match 列表
+        """
+        image, offset = self._crop(gray, origin, self.roi)
+        if image is None:
+            return []
+
+        names = {t.name for t in self.templates}
+        hits = []
+        spectrum = {}  # 全区域搜索时各模板共用同一图像频谱
+        for name in names:
+            since_full = self._since_full.get(name, 0) + 1
+            cached = None
+            if since_full < self.full_search_every:
+                cached = self._recheck(name, gray, origin)
+            if cached is not None:
+                self.cached_searches += 1
+                self._since_full[name] = since_full
+                hits.extend(cached)
+            else:
+                self.full_searches += 1
+                found = self._search(name, image, offset, spectrum)
+                self._last[name] = found
+                self._since_full[name] = 0
+                hits.extend(found)
+        return sorted(hits, key=lambda m: -m.score)
+
+    def match_frame(self, frame):
+        return self.match(frame_to_gray(frame), frame.origin)
+
+    def _crop(self, gray, origin, region):
+        """按区域裁剪（视图，不复制），返回 (数组, 数组左上角窗口坐标)"""
+        if region is None:
+            return gray, origin
+        x, y, w, h = region
+        left = max(x - origin[0], 0)
+        top = max(y - origin[1], 0)
+        right = min(x + w - origin[0], gray.shape[1])
+        bottom = min(y + h - origin[1], gray.shape[0])
+        if right <= left or bottom <= top:
+            return None, None
+        return gray[top:bottom, left:right], (origin[0] + left, origin[1] + top)
+
+    def _search(self, name, image, offset, cache):
+        """全区域搜索一个模板的所有尺度"""
+        if not cache:
+            shape = (_fft_size(image.shape[0]), _fft_size(image.shape[1]))
+            cache['shape'] = shape
+            cache['spectrum'] = np.fft.rfft2(image, shape)
+        shape, spectrum = cache['shape'], cache['spectrum']
+        hits = []
+        for template in self.templates:
+            if template.name != name:
+                continue
+            scores = ncc(image, template, spectrum, shape)
+            if scores is not None:
+                hits.extend(self._peaks(scores, template, offset))
+        return self._suppress(hits)
+
+    def _recheck(self, name, gray, origin):
+        """在上一帧命中位置附近复查，全部仍命中时返回新位置，否则返回 None"""
+        last = self._last.get(name)
+        if not last:
+            return None
+
+        hits = []
+        margin = self.search_margin
+        for previous in last:
+            region = (previous.x - margin, previous.y - margin,
+                      previous.w + 2 * margin, previous.h + 2 * margin)
+            image, offset = self._crop(gray, origin, region)
+            template = next((t for t in self.templates
+                             if t.name == name and t.scale == previous.scale), None)
+            if image is None or template is None:
+                return None
+            scores = ncc(image, template)
+            if scores is None:
+                return None
+            index = np.unravel_index(np.argmax(scores), scores.shape)
+            score = float(scores[index])
+            if score < self.threshold:
+                return None
+            hits.append(Match(name, offset[0] + int(index[1]), offset[1] + int(index[0]),
+                              template.w, template.h, score, template.scale))
+        self._last[name] = hits
+        return hits
+
+    def _peaks(self, scores, template, offset):
+        """取阈值以上的局部最大值，命中周围一个模板大小内不再取点"""
+        scores = scores.copy()
+        hits = []
+        while len(hits) < self.max_hits:
+            index = np.unravel_index(np.argmax(scores), scores.shape)
+            score = float(scores[index])
+            if score < self.threshold:
+                break
+            y, x = int(index[0]), int(index[1])
+            hits.append(Match(template.name, offset[0] + x, offset[1] + y,
+                              template.w, template.h, score, template.scale))
+            scores[max(y - template.h // 2, 0):y + template.h // 2 + 1,
+                   max(x - template.w // 2, 0):x + template.w // 2 + 1] = -1
+        return hits
+
+    def _suppress(self, hits):
+        """不同尺度的重叠命中只保留得分最高的"""
+        kept = []
+        for hit in sorted(hits, key=lambda m: -m.score):
+            cx, cy = hit.center
+            if all(abs(cx - k.center[0]) > k.w // 2 or abs(cy - k.center[1]) > k.h // 2
+                   for k in kept):
+                kept.append(hit)
+            if len(kept) >= self.max_hits:
+                break
+        return kept
+
+
+class TemplateLocator:
+    """动态坐标点：截取窗口画面并匹配，命中中心作为坐标点"""
+
+    def __init__(self, matcher, source):
+        self.matcher = matcher
+        self.source = source
+        # 变化跟踪采集源：搜索区域未变化时沿用上次结果，灰度图只更新变化图块
+        self.incremental = hasattr(source, 'changed_since')
+        self._points = None
+        self._frame_id = -1
+
+    def points(self, hwnd):
+        """:return: [(x, y), ...]，按从上到下、从左到右排列"""
+        frame = self.source.grab(hwnd, self.matcher.roi)
+        if frame is None:
+            return []
+        if self.incremental:
+            if self._points is not None and not self.source.changed_since(
+                    self._frame_id, self.matcher.roi):
+                return self._points
+            hits = self.matcher.match(self.source.gray(), frame.origin)
+            self._frame_id = self.source.frame_id
+        else:
+            hits = self.matcher.match_frame(frame)
+        self._points = sorted((m.center for m in hits), key=lambda p: (p[1], p[0]))
+        return self._points
+
+    @classmethod
+    def from_config(cls, config, source):
+        """
+        :param config: {'files': [...], 'scales': [...], 'threshold', 'roi', 'full_search_every'}
+        """
+        matcher = TemplateMatcher.from_files(
+            config['files'],
+            scales=config.get('scales', (1.0,)),
+            threshold=config.get('threshold', 0.8),
+            roi=tuple(config['roi']) if config.get('roi') else None,
+            full_search_every=config.get('full_search_every', 30),
+        )
+        return cls(matcher, source)
+
+
+def match_files(template_paths, screenshot_paths, **kwargs):
+    """
+    离线匹配：对保存的截图逐张识别（依次复用上一张的命中缓存）
+    :return: [(截图路径, [Match, ...]), ...]
+    """
+    matcher = TemplateMatcher.from_files(template_paths, **kwargs)
+    source = ImageFileSource(screenshot_paths, loop=False)
+    return [(path, matcher.match_frame(source.grab(None))) for path in screenshot_paths]
\ No newline at end of file
@@ -0,0 +1,208 @@
+"""
+防误触判定 - 用录制格式（core.macro）的输入轨迹驱动 evaluate_trace
+"""
+import math
+import random
+import time
+
+import pytest
+
+from core.anti_touch import AntiTouchPolicy, AntiTouchEngine, evaluate_trace
+from core.macro import HEADER, EVENT, MAGIC, VERSION, MOVE, BUTTON_DOWN, BUTTON_UP, KEY_DOWN, KEY_UP
+from utils.input_hook import InputEvent, KeyEvent, EVENT_MOVE, EVENT_BUTTON
+
+VK_A = 0x41
+VK_F6 = 0x75
+RATE = 1000  # 鼠标回报率（Hz）
+
+
+@pytest.fixture
+def trace(tmp_path):
+    """写入一条输入轨迹 [(时间, 类型, 参数, x, y), ...]，返回文件路径"""
+    def write(events, name='trace.amcr'):
+        path = tmp_path / name
+        with open(path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, 0, time.time()))
+            for t, kind, code, x, y in events:
+                f.write(EVENT.pack(t, kind, code, x, y))
+        return str(path)
+    return write
+
+
+def rest(x, y, start, seconds):
+    return [(start + i / RATE, MOVE, 0, x, y) for i in range(int(seconds * RATE))]
+
+
+def jitter(x, y, start, seconds, amplitude=3, seed=0):
+    """桌面震动：光标在 (x, y) 周围 ±amplitude 像素内随机跳动"""
+    rng = random.Random(seed)
+    return [(start + i / RATE, MOVE, 0,
+             x + rng.randint(-amplitude, amplitude), y + rng.randint(-amplitude, amplitude))
+            for i in range(int(seconds * RATE))]
+
+
+def line(x0, y0, x1, y1, start, seconds):
+    n = int(seconds * RATE)
+    return [(start + (i + 1) / RATE, MOVE, 0,
+             round(x0 + (x1 - x0) * (i + 1) / n), round(y0 + (y1 - y0) * (i + 1) / n))
+            for i in range(n)]
+
+
+def touch_times(path, policy=None):
+    return [t for t, _ in evaluate_trace(path, policy)['touches']]
+
+
+def test_jitter_is_not_a_touch(trace):
+    path = trace(jitter(500, 500, 0.0, 10.0))
+    result = evaluate_trace(path)
+    assert result['events'] == 10 * RATE
+    assert result['touches'] == []
+    assert result['engine'].touch_count == 0
+
+
+def test_fast_move(trace):
+    # 静止 1 秒后 0.1 秒内移动 200 像素
+    path = trace(rest(100, 100, 0.0, 1.0) + line(100, 100, 300, 100, 1.0, 0.1))
+    times = touch_times(path)
+    assert len(times) == 1
+    assert 1.0 < times[0] < 1.05
+
+
+def test_fast_move_through_jitter(trace):
+    # 震动中的真实移动仍能识别
+    path = trace(jitter(100, 100, 0.0, 2.0) + line(100, 100, 400, 250, 2.0, 0.15))
+    times = touch_times(path)
+    assert len(times) == 1
+    assert 2.0 < times[0] < 2.1
+
+
+def test_slow_drift(trace):
+    # 每秒 10 像素的缓慢移动：速度低于快速移动阈值，累计 40 像素后判定
+    events = [(i / 100, MOVE, 0, 100 + i // 10, 100) for i in range(600)]
+    times = touch_times(trace(events))
+    assert len(times) == 1
+    assert times[0] == pytest.approx(4.0, abs=0.05)
+
+
+def test_slow_drift_reanchors_after_dwell(trace):
+    # 每次挪动 10 像素后静止超过 dwell，锚点重新选取，不会累计成手动操作
+    events = []
+    x = 100
+    for step in range(10):
+        t = step * 1.5
+        events.append((t, MOVE, 0, x, 100))
+        x += 10
+        events.append((t + 0.2, MOVE, 0, x, 100))
+    policy = AntiTouchPolicy(distance=20)
+    assert touch_times(trace(events), policy) == []
+
+
+@pytest.mark.parametrize('kind, code, expected', [
+    (BUTTON_DOWN, 1, 1),
+    (KEY_DOWN, VK_A, 1),
+    (KEY_DOWN, VK_F6, 0),   # 热键不算手动操作
+    (KEY_UP, VK_A, 0),      # 只有按下计入
+])
+def test_press(trace, kind, code, expected):
+    events = rest(100, 100, 0.0, 0.5) + [(0.5, kind, code, 100, 100)]
+    assert len(touch_times(trace(events))) == expected
+
+
+def test_button_release_within_idle_is_one_touch(trace):
+    events = [(0.0, BUTTON_DOWN, 1, 100, 100), (0.1, BUTTON_UP, 1, 100, 100),
+              (0.2, BUTTON_DOWN, 1, 100, 100), (10.0, BUTTON_DOWN, 1, 100, 100)]
+    # 间隔小于 idle 的连续操作只记录一次
+    assert touch_times(trace(events)) == [0.0, 10.0]
+
+
+def test_keyboard_disabled(trace):
+    events = [(0.0, KEY_DOWN, VK_A, 0, 0)]
+    assert touch_times(trace(events), AntiTouchPolicy(keyboard=False)) == []
+
+
+def test_injected_input_is_ignored():
+    engine = AntiTouchEngine()
+    t = 0.0
+    for i in range(200):
+        t = i / RATE
+        assert not engine.feed_mouse(InputEvent(EVENT_MOVE, i * 5, 0, True, 0), t)
+    assert not engine.feed_mouse(InputEvent(EVENT_BUTTON, 0, 0, True, 0), t)
+    assert not engine.feed_key(KeyEvent(VK_A, True, True, False, 0), t)
+    assert engine.injected_count == 202
+    assert engine.physical_count == 0
+    assert engine.last_touch is None
+
+
+def test_idle_remaining():
+    engine = AntiTouchEngine(AntiTouchPolicy(idle=2.0))
+    assert engine.idle_remaining(0.0) == 0.0
+    assert engine.feed_mouse(InputEvent(EVENT_BUTTON, 0, 0, False, 0), 1.0)
+    assert engine.idle_remaining(1.5) == pytest.approx(1.5)
+    assert engine.active(2.9)
+    assert not engine.active(3.0)
+
+
+def test_window_eviction_is_bounded():
+    """每个样本只进出窗口一次：窗口大小不随输入时长增长，增量路径长度与重新求和一致"""
+    policy = AntiTouchPolicy()
+    engine = AntiTouchEngine(policy)
+    rng = random.Random(1)
+    limit = int(policy.window * RATE) + 2
+    for i in range(60 * RATE):
+        x, y = 500 + rng.randint(-3, 3), 500 + rng.randint(-3, 3)
+        engine.feed_mouse(InputEvent(EVENT_MOVE, x, y, False, 0), i / RATE)
+        assert len(engine._samples) <= limit
+
+    samples = list(engine._samples)
+    assert samples[-1][0] - samples[0][0] <= policy.window + 1e-9
+    assert engine._path == pytest.approx(sum(s[3] for s in samples), abs=1e-6)
+    expected = sum(math.hypot(b[1] - a[1], b[2] - a[2]) for a, b in zip(samples, samples[1:]))
+    assert engine._path - samples[0][3] == pytest.approx(expected, abs=1e-6)
+
+
+def test_reset_is_applied_by_the_feeding_thread():
+    engine = AntiTouchEngine()
+    for i in range(50):
+        engine.feed_mouse(InputEvent(EVENT_MOVE, 100 + i // 2, 100, False, 0), i / RATE)
+    # 其他线程调用 reset() 只设置标志，不改动钩子线程正在使用的窗口
+    engine.reset()
+    assert engine._samples
+    engine.feed_mouse(InputEvent(EVENT_MOVE, 200, 100, False, 0), 0.1)
+    assert len(engine._samples) == 1
+    assert engine._anchor == (200, 100)
+
+
+def slow_after_click():
+    """点击后以低于阈值的速度持续挪动鼠标 3 秒（每 0.2 秒 1 像素）"""
+    engine_events = [(0.0, InputEvent(EVENT_BUTTON, 100, 100, False, 0))]
+    for i in range(1, 16):
+        engine_events.append((i * 0.2, InputEvent(EVENT_MOVE, 100 + i, 100, False, 0)))
+    return engine_events
+
+
+def test_idle_counts_any_physical_input():
+    engine = AntiTouchEngine(AntiTouchPolicy(idle=2.0))
+    for t, event in slow_after_click():
+        engine.feed_mouse(event, t)
+    assert engine.touch_count == 1
+    # 最后一次移动在 3.0s，空闲从这里算起
+    assert engine.last_physical == pytest.approx(3.0)
+    assert engine.idle_remaining(4.0) == pytest.approx(1.0)
+    assert engine.active(4.9)
+    assert not engine.active(5.0)
+
+
+def test_idle_ignores_jitter_counts_touches_only():
+    engine = AntiTouchEngine(AntiTouchPolicy(idle=2.0, idle_ignores_jitter=True))
+    for t, event in slow_after_click():
+        engine.feed_mouse(event, t)
+    assert engine.idle_remaining(3.0) == 0.0
+
+
+def test_key_release_and_injected_input_for_idle():
+    engine = AntiTouchEngine(AntiTouchPolicy(idle=2.0))
+    engine.feed_key(KeyEvent(VK_A, True, False, False, 0), 0.0)
+    engine.feed_key(KeyEvent(VK_A, False, False, False, 0), 1.0)
+    engine.feed_mouse(InputEvent(EVENT_MOVE, 0, 0, True, 0), 2.0)
+    # 抬起也是物理输入；程序注入不算
+    assert engine.idle_remaining(2.0) == pytest.approx(1.0)
\ No newline at end of file
@@ -0,0 +1,94 @@
+"""
+执行控制通道 - 各状态切换唤醒等待线程的延迟
+"""
+import time
+import threading
+import statistics
+
+from core.execution_control import ExecutionControl
+
+
+# 目标 1 ms，另加线程调度的余量
+LATENCY_LIMIT = 0.001 + 0.01
+REPEAT = 5
+
+
+def measure(control, wait, transition):
+    """
+    在工作线程中阻塞于 wait(control)，主线程调用 transition(control)
+    :return: (等待返回值, 从切换到线程返回的秒数)
+    """
+    blocked = threading.Event()
+    result = {}
+
+    def worker():
+        blocked.set()
+        result['value'] = wait(control)
+        result['woke'] = time.perf_counter()
+
+    thread = threading.Thread(target=worker, daemon=True)
+    thread.start()
+    blocked.wait()
+    # 确保工作线程已进入条件变量等待
+    time.sleep(0.02)
+    start = time.perf_counter()
+    transition(control)
+    thread.join(1.0)
+    assert not thread.is_alive(), "切换后等待线程未被唤醒"
+    return result['value'], result['woke'] - start
+
+
+def median_latency(make_control, wait, transition, expected):
+    latencies = []
+    for _ in range(REPEAT):
+        value, latency = measure(make_control(), wait, transition)
+        assert value == expected
+        latencies.append(latency)
+    return statistics.median(latencies)
+
+
+def running_control():
+    control = ExecutionControl()
+    control.start()
+    return control
+
+
+def paused_control():
+    control = running_control()
+    control.pause()
+    return control
+
+
+def test_pause_wakes_sleep():
+    latency = median_latency(running_control, lambda c: c.sleep(10), ExecutionControl.pause, False)
+    assert latency < LATENCY_LIMIT
+
+
+def test_stop_wakes_sleep():
+    latency = median_latency(running_control, lambda c: c.sleep(10), ExecutionControl.stop, False)
+    assert latency < LATENCY_LIMIT
+
+
+def test_resume_wakes_wait_while_paused():
+    latency = median_latency(paused_control, ExecutionControl.wait_while_paused,
+                             ExecutionControl.resume, True)
+    assert latency < LATENCY_LIMIT
+
+
+def test_stop_wakes_wait_while_paused():
+    latency = median_latency(paused_control, ExecutionControl.wait_while_paused,
+                             ExecutionControl.stop, False)
+    assert latency < LATENCY_LIMIT
+
+
+def test_sleep_completes_without_transition():
+    control = running_control()
+    start = time.perf_counter()
+    assert control.sleep(0.05)
+    assert time.perf_counter() - start >= 0.05
+
+
+def test_wait_while_paused_timeout_keeps_paused():
+    control = paused_control()
+    assert control.wait_while_paused(0.02)
+    assert control.paused
\ No newline at end of file
@@ -0,0 +1,46 @@
+"""
+多边形区域 - 向量化的 polygon_mask 与逐点 point_in_polygon 结果一致
+"""
+import random
+
+import pytest
+
+from core.mouse_patterns import point_in_polygon, polygon_mask
+
+# polygon_mask 依赖 numpy（可选依赖）
+np = pytest.importorskip('numpy')
+
+
+POLYGONS = {
+    'triangle': [(10, 10), (90, 20), (40, 80)],
+    # 凹多边形，含水平边与竖直边
+    'concave': [(0, 0), (60, 0), (60, 60), (30, 30), (0, 60)],
+    'star': [(50, 0), (61, 35), (98, 35), (68, 57), (79, 91),
+             (50, 70), (21, 91), (32, 57), (2, 35), (39, 35)],
+    # 自相交
+    'bowtie': [(0, 0), (80, 80), (80, 0), (0, 80)],
+}
+
+
+def expected(xs, ys, polygon):
+    return np.array([point_in_polygon((x, y), polygon) for x, y in zip(xs.ravel(), ys.ravel())]
+                    ).reshape(xs.shape)
+
+
+@pytest.mark.parametrize('name', sorted(POLYGONS))
+def test_integer_grid(name):
+    # 整数网格覆盖顶点与边上的点
+    polygon = POLYGONS[name]
+    ys, xs = np.mgrid[-5:106, -5:106]
+    mask = polygon_mask(xs, ys, polygon)
+    assert mask.any()
+    assert np.array_equal(mask, expected(xs, ys, polygon))
+
+
+@pytest.mark.parametrize('name', sorted(POLYGONS))
+def test_random_points(name):
+    polygon = POLYGONS[name]
+    rng = random.Random(0)
+    xs = np.array([rng.uniform(-10, 110) for _ in range(2000)])
+    ys = np.array([rng.uniform(-10, 110) for _ in range(2000)])
+    assert np.array_equal(polygon_mask(xs, ys, polygon), expected(xs, ys, polygon))
\ No newline at end of file
@@ -0,0 +1,49 @@
+"""
+配置档仓库 - 点集文件换代与崩溃时的索引一致性
+"""
+import os
+
+from utils.profiles import ProfileStore
+from core.point_store import PointSet
+
+
+def points_files(directory):
+    return sorted(f for f in os.listdir(directory) if f.endswith('.pts'))
+
+
+def test_old_points_survive_until_index_is_written(tmp_path):
+    store = ProfileStore(str(tmp_path))
+    store.save('a', {'skill_key': '1', 'skill_points': [(1, 2)]})
+    store.close()
+
+    # 重新保存坐标点，后台尚未写出索引（此时进程退出）
+    store = ProfileStore(str(tmp_path))
+    store.save('a', {'skill_key': '1', 'skill_points': [(3, 4), (5, 6)]})
+    assert points_files(tmp_path) == ['profile_1.1.pts', 'profile_1.2.pts']
+
+    # 磁盘上的旧索引仍能读到旧坐标点
+    reopened = ProfileStore(str(tmp_path), read_only=True)
+    assert list(reopened.get('a')['skill_points']) == [(1, 2)]
+    reopened.close()
+
+    store.close()
+    reopened = ProfileStore(str(tmp_path), read_only=True)
+    assert list(reopened.get('a')['skill_points']) == [(3, 4), (5, 6)]
+    reopened.close()
+
+
+def test_stale_generations_removed_on_next_start(tmp_path):
+    store = ProfileStore(str(tmp_path))
+    store.save('a', {'skill_points': [(1, 2)]})
+    store.save('a', {'skill_points': PointSet.from_points([(3, 4)])})
+    store.close()
+    assert points_files(tmp_path) == ['profile_1.1.pts', 'profile_1.2.pts']
+
+    # 只读打开不清理
+    ProfileStore(str(tmp_path), read_only=True).close()
+    assert points_files(tmp_path) == ['profile_1.1.pts', 'profile_1.2.pts']
+
+    store = ProfileStore(str(tmp_path))
+    assert points_files(tmp_path) == ['profile_1.2.pts']
+    assert list(store.get('a')['skill_points']) == [(3, 4)]
+    store.close()
\ No newline at end of file
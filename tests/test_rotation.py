@@ -0,0 +1,111 @@
+"""
+技能循环调度 - 假时钟下的释放顺序、延后与冷却利用率
+"""
+import pytest
+
+from core.rotation import RotationScheduler, Skill, parse_skills, format_skills
+from core.timer_wheel import TimerWheel
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_skills():
+    return [Skill('q', 1.0, 1), Skill('w', 3.0, 3), Skill('e', 0.5, 0)]
+
+
+def make_scheduler(skills, clock, use_wheel):
+    if use_wheel:
+        return RotationScheduler(skills, wheel=TimerWheel(clock=clock))
+    return RotationScheduler(skills, clock=clock)
+
+
+def run(scheduler, clock, ticks, step=0.5):
+    """每 step 秒取一次就绪技能并释放，返回 [(时间, 按键), ...]"""
+    order = []
+    for i in range(ticks):
+        clock.now = i * step
+        skill = scheduler.pop_ready()
+        if skill:
+            scheduler.commit(skill)
+            order.append((clock.now, skill.key))
+    return order
+
+
+@pytest.mark.parametrize('use_wheel', [False, True])
+def test_cast_order(use_wheel):
+    clock = FakeClock()
+    scheduler = make_scheduler(make_skills(), clock, use_wheel)
+    assert run(scheduler, clock, 13) == [
+        (0.0, 'w'), (0.5, 'q'), (1.0, 'e'), (1.5, 'q'), (2.0, 'e'), (2.5, 'q'), (3.0, 'w'),
+        (3.5, 'q'), (4.0, 'e'), (4.5, 'q'), (5.0, 'e'), (5.5, 'q'), (6.0, 'w'),
+    ]
+
+
+@pytest.mark.parametrize('use_wheel', [False, True])
+def test_utilisation(use_wheel):
+    clock = FakeClock()
+    skills = make_skills()
+    scheduler = make_scheduler(skills, clock, use_wheel)
+    run(scheduler, clock, 13)
+    q, w, e = skills
+    assert [s.casts for s in skills] == [6, 3, 4]
+    # q 最后一次冷却还剩 0.5s 不计入: (6 * 1.0 - 0.5) / 6
+    assert scheduler.utilisation(q) == pytest.approx(5.5 / 6)
+    assert scheduler.utilisation(w) == pytest.approx(1.0)
+    assert scheduler.utilisation(e) == pytest.approx(2.0 / 6)
+    assert scheduler.summary() == "q 92% w 100% e 33%"
+
+
+@pytest.mark.parametrize('use_wheel', [False, True])
+def test_defer(use_wheel):
+    clock = FakeClock()
+    skills = make_skills()
+    scheduler = make_scheduler(skills, clock, use_wheel)
+    q, w, e = skills
+
+    # 条件不满足的 w 延后 0.25s，期间按优先级轮到 q、e
+    assert scheduler.pop_ready() is w
+    scheduler.defer(w, 0.25)
+    assert scheduler.pop_ready() is q
+    scheduler.commit(q)
+    clock.now = 0.1
+    assert scheduler.pop_ready() is e
+    scheduler.commit(e)
+    assert scheduler.pop_ready() is None
+    assert scheduler.next_ready_time() <= 0.25
+
+    clock.now = 0.25
+    assert scheduler.pop_ready() is w
+    scheduler.commit(w)
+    # 延后不计入释放次数
+    assert w.casts == 1
+    assert w.last_cast == 0.25
+
+
+def test_reset():
+    clock = FakeClock()
+    skills = make_skills()
+    scheduler = make_scheduler(skills, clock, False)
+    run(scheduler, clock, 4)
+    clock.now = 10.0
+    scheduler.reset()
+    assert all(s.casts == 0 and s.last_cast is None for s in skills)
+    assert [scheduler.pop_ready().key for _ in skills] == ['w', 'q', 'e']
+
+
+def test_parse_format_roundtrip():
+    skills = parse_skills("q:1000:1， w:5000:3, e")
+    assert skills == [
+        {'key': 'q', 'cooldown': 1000, 'priority': 1},
+        {'key': 'w', 'cooldown': 5000, 'priority': 3},
+        {'key': 'e', 'cooldown': 0, 'priority': 0},
+    ]
+    assert parse_skills(format_skills(skills)) == skills
+    with pytest.raises(ValueError):
+        parse_skills("q:abc")
\ No newline at end of file
@@ -0,0 +1,130 @@
+"""
+分层时间轮 - 假时钟下的多层下放、取消与超出最高层的定时器
+"""
+import random
+
+import pytest
+
+from core.timer_wheel import TimerWheel
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def wheel(clock):
+    # 每层 4 格、每格 1 秒：第 0 层 4 格，第 1 层覆盖 16 格，第 2 层覆盖 64 格
+    return TimerWheel(tick=1.0, bits=(2, 2, 2), clock=clock)
+
+
+def schedule_all(wheel, delays):
+    """按延迟登记定时器，回调记录 (延迟, 到期格)"""
+    fired = []
+    timers = {}
+    for delay in delays:
+        timers[delay] = wheel.schedule(delay, lambda d=delay: fired.append((d, wheel.current - 1)))
+    return fired, timers
+
+
+def level_of(wheel, timer):
+    for level, slots in enumerate(wheel.levels):
+        if any(timer.slot is slot for slot in slots):
+            return level
+    return None
+
+
+def run_ticks(wheel, clock, until):
+    """每格推进一次"""
+    while clock.now < until:
+        clock.now += 1
+        wheel.advance()
+
+
+def run_deadlines(wheel, clock):
+    """只在 next_deadline() 唤醒，直到定时器全部到期"""
+    while wheel.count:
+        clock.now = wheel.next_deadline()
+        wheel.advance()
+
+
+# 依次落在第 0 层、第 1 层、第 2 层及各层边界
+DELAYS = [1, 3, 4, 5, 15, 16, 17, 47, 48, 62, 63]
+
+
+def test_multi_level_cascade(wheel, clock):
+    fired, timers = schedule_all(wheel, DELAYS)
+    assert [level_of(wheel, timers[d]) for d in (3, 4, 15, 16, 63)] == [0, 1, 1, 2, 2]
+    run_ticks(wheel, clock, 63)
+    assert fired == [(d, d) for d in DELAYS]
+    assert wheel.count == 0
+
+
+def test_cascade_from_unaligned_position(wheel, clock):
+    # 时间轮已转到非整圈位置（第 0、1 层都不在 0 格）再登记
+    run_ticks(wheel, clock, 37)
+    fired, _ = schedule_all(wheel, DELAYS)
+    run_deadlines(wheel, clock)
+    assert fired == [(d, 37 + d) for d in DELAYS]
+
+
+def test_cancel(wheel, clock):
+    fired, timers = schedule_all(wheel, DELAYS)
+    # 上层格子中尚未下放的定时器
+    assert wheel.cancel(timers[48])
+    run_ticks(wheel, clock, 20)
+    # 已下放到第 0 层的定时器
+    assert wheel.cancel(timers[47])
+    assert wheel.count == 2
+    run_deadlines(wheel, clock)
+    assert [d for d, _ in fired] == [d for d in DELAYS if d not in (47, 48)]
+
+    # 已到期或重复取消
+    assert not timers[1].active
+    assert not wheel.cancel(timers[1])
+    assert not wheel.cancel(timers[48])
+    assert wheel.count == 0
+
+
+def test_beyond_top_level(wheel, clock):
+    assert wheel._max_span == 63
+    delays = [64, 100, 200, 1000]
+    fired, _ = schedule_all(wheel, delays)
+    # 超出最高层的定时器先放在最远的格子，转到时重新登记
+    run_ticks(wheel, clock, 1000)
+    assert fired == [(d, d) for d in delays]
+
+
+def test_beyond_top_level_cancel(wheel, clock):
+    fired, timers = schedule_all(wheel, [100, 200])
+    run_ticks(wheel, clock, 150)
+    assert wheel.cancel(timers[200])
+    run_deadlines(wheel, clock)
+    assert fired == [(100, 100)]
+
+
+def test_random_matches_sorted(clock):
+    wheel = TimerWheel(tick=0.01, bits=(3, 3, 3), clock=clock)
+    rng = random.Random(0)
+    delays = [round(rng.uniform(0, 80), 2) for _ in range(500)]
+    fired = []
+    timers = [wheel.schedule(d, lambda d=d: fired.append((d, clock.now))) for d in delays]
+    cancelled = set(rng.sample(range(len(timers)), 100))
+    for i in cancelled:
+        assert wheel.cancel(timers[i])
+    run_deadlines(wheel, clock)
+
+    expected = sorted(d for i, d in enumerate(delays) if i not in cancelled)
+    assert sorted(d for d, _ in fired) == expected
+    # 不早于到期时间，也不晚于一格
+    for delay, at in fired:
+        assert delay - 1e-9 <= at <= delay + 0.01 + 1e-9
\ No newline at end of file
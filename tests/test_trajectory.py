@@ -0,0 +1,63 @@
+"""
+拟人光标轨迹 - 终点精确、缓存命中与淘汰、分批投递
+"""
+import pytest
+
+from core.trajectory import TrajectoryCache
+
+
+@pytest.mark.parametrize('dx, dy', [(300, 0), (-120, 45), (7, -400), (1, 9)])
+def test_endpoint_is_exact(dx, dy):
+    cache = TrajectoryCache(seed=0)
+    offsets = cache.offsets(dx, dy)
+    assert offsets[-1] == (dx, dy)
+    # 相邻两点不重复
+    assert all(a != b for a, b in zip(offsets, offsets[1:]))
+
+    path = cache.path(100, 200, 100 + dx, 200 + dy)
+    assert path[-1] == (100 + dx, 200 + dy)
+
+
+def test_short_move_is_direct():
+    cache = TrajectoryCache(min_distance=8, seed=0)
+    assert cache.path(0, 0, 5, 5) == [(5, 5)]
+    assert cache.misses == 0
+
+
+def test_cache_hit_returns_same_path():
+    cache = TrajectoryCache(seed=0)
+    first = cache.offsets(250, -80)
+    assert cache.offsets(250, -80) is first
+    assert (cache.hits, cache.misses) == (1, 1)
+    # 只与位移有关：窗口平移后沿用同一形状
+    moved = cache.path(1000, 1000, 1250, 920)
+    assert moved == [(1000 + x, 1000 + y) for x, y in first]
+    assert cache.hits == 2
+
+
+def test_lru_eviction():
+    cache = TrajectoryCache(max_pairs=2, seed=0)
+    a = cache.offsets(100, 0)
+    cache.offsets(0, 100)
+    cache.offsets(100, 0)           # a 变为最近使用
+    cache.offsets(50, 50)           # 淘汰 (0, 100)
+    assert len(cache._paths) == 2
+    assert cache.offsets(100, 0) is a
+    misses = cache.misses
+    cache.offsets(0, 100)
+    assert cache.misses == misses + 1
+
+
+def test_batches_split_path_evenly():
+    cache = TrajectoryCache(batch_count=4, duration=0.03, seed=0)
+    path = cache.path(0, 0, 400, 300)
+    batches = cache.batches(path)
+    assert len(batches) == 4
+    assert [p for batch in batches for p in batch] == path
+    assert max(map(len, batches)) - min(map(len, batches)) <= 1
+    assert cache.pause(batches) == pytest.approx(0.01)
+
+    # 直接移动只有一批，不等待
+    single = cache.batches([(5, 5)])
+    assert single == [[(5, 5)]]
+    assert cache.pause(single) == 0.0
\ No newline at end of file
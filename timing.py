@@ -0,0 +1,151 @@
+"""
+高精度计时 - 粗睡眠 + 自旋，自动校准自旋预算
+"""
+import time
+import ctypes
+
+from core import metrics
+
+
+# Windows 多媒体计时器（提高系统计时器分辨率到 1ms）
+winmm = ctypes.windll.winmm
+
+
+class PeriodHistogram:
+    """周期误差直方图（毫秒，按绝对误差分桶）"""
+
+    BOUNDS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 20.0, float('inf'))
+
+    __slots__ = ('counts', 'count', 'total', 'max')
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.counts = [0] * len(self.BOUNDS)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, error_ms):
+        error_ms = abs(error_ms)
+        for i, bound in enumerate(self.BOUNDS):
+            if error_ms <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.total += error_ms
+        if error_ms > self.max:
+            self.max = error_ms
+
+    def percentile(self, q):
+        """返回 q 分位所在桶的上界（毫秒）"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for bound, n in zip(self.BOUNDS, self.counts):
+            seen += n
+            if seen >= target:
+                return min(bound, self.max)
+        return self.max
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def buckets(self):
+        """[(上界, 次数), ...]"""
+        return list(zip(self.BOUNDS, self.counts))
+
+    def summary(self):
+        return (f"周期误差 p50≤{self.percentile(0.5):.2f}ms "
+                f"p99≤{self.percentile(0.99):.2f}ms max {self.max:.2f}ms")
+
+
+class PreciseTimer:
+    """固定频率高精度定时器"""
+
+    def __init__(self, control, max_spin=0.002, max_cpu=0.25):
+        """
+        :param control: ExecutionControl，粗睡眠阶段可被暂停/停止打断
+        :param max_spin: 单次自旋上限（秒）
+        :param max_cpu: 自旋时间占周期的上限比例，限制 CPU 占用
+        """
+        self.control = control
+        self.max_spin = max_spin
+        self.max_cpu = max_cpu
+        self.spin = 0.001
+        self.overshoot = 0.0
+        self.histogram = PeriodHistogram()
+        self.next_deadline = None
+        self.last_wake = None
+        self._period_set = False
+
+    def start(self):
+        """进入高精度模式"""
+        if not self._period_set:
+            winmm.timeBeginPeriod(1)
+            self._period_set = True
+        self.histogram.reset()
+        self.reset()
+
+    def close(self):
+        if self._period_set:
+            winmm.timeEndPeriod(1)
+            self._period_set = False
+
+    def reset(self):
+        """重新对齐节拍（暂停恢复、轮次等待之后调用，避免补发）"""
+        self.next_deadline = None
+        self.last_wake = None
+
+    def wait_period(self, period):
+        """
+        等待到下一个节拍
+        :return: 是否按时到达（被暂停或停止打断返回 False）
+        """
+        now = time.perf_counter()
+        if self.next_deadline is None:
+            self.next_deadline = now
+        self.next_deadline += period
+        if self.next_deadline < now:
+            # 已落后一整个周期以上，丢弃积压节拍
+            self.next_deadline = now
+
+        if not self._sleep_until(self.next_deadline, period):
+            self.reset()
+            return False
+
+        wake = time.perf_counter()
+        if self.last_wake is not None:
+            error = wake - self.last_wake - period
+            self.histogram.record(error * 1000)
+            metrics.period_error.observe(abs(error))
+        self.last_wake = wake
+        return True
+
+    def sleep_until(self, deadline, period):
+        """
+        等待到指定时间点（perf_counter 秒），不记录周期误差
+        :param period: 与上一个时间点的间隔，用于限制自旋占比
+        :return: 是否按时到达（被暂停或停止打断返回 False）
+        """
+        return self._sleep_until(deadline, period)
+
+    def _sleep_until(self, deadline, period):
+        spin = min(self.spin, self.max_spin, period * self.max_cpu)
+        coarse = deadline - spin - time.perf_counter()
+        if coarse > 0:
+            if not self.control.sleep(coarse):
+                return False
+            self._tune(time.perf_counter() - (deadline - spin))
+
+        while time.perf_counter() < deadline:
+            pass
+        return True
+
+    def _tune(self, overshoot):
+        """根据粗睡眠的实测超时调整自旋预算"""
+        self.overshoot += (max(overshoot, 0.0) - self.overshoot) * 0.1
+        self.spin = min(self.overshoot * 1.5 + 0.0002, self.max_spin)
\ No newline at end of file
@@ -0,0 +1,105 @@
+"""
+拟人光标轨迹 - 两点之间沿弯曲、先加速后减速的路径移动，代替一次瞬移
+轨迹形状在单位坐标系中预先计算（三次 Bézier 弯曲 + 最小加加速度缓动），
+每对坐标点按位移缩放、旋转一次后缓存；之后每轮同一对点只需平移
+投递时分成几批、批间等待，光标按缓动的时间分布到达而不是一次跳完
+"""
+import random
+from collections import OrderedDict
+
+
+def min_jerk(t):
+    """最小加加速度缓动：位置 10t³ - 15t⁴ + 6t⁵，起止速度与加速度均为 0"""
+    return t * t * t * (10 + t * (-15 + 6 * t))
+
+
+def bezier(p1, p2, s):
+    """起点 (0, 0)、终点 (1, 0) 的三次 Bézier 曲线在参数 s 处的坐标"""
+    r = 1 - s
+    a = 3 * r * r * s
+    b = 3 * r * s * s
+    c = s * s * s
+    return (a * p1[0] + b * p2[0] + c, a * p1[1] + b * p2[1])
+
+
+def make_shape(rng, steps, bend):
+    """
+    单位坐标系中的一条轨迹：u 沿位移方向（0 -> 1），v 为垂直方向偏移（按位移长度计）
+    :return: ((u, v), ...)，不含起点，最后一个为 (1, 0)
+    """
+    # 两个控制点偏向同一侧，形成一条平滑的弧线
+    side = rng.choice((-1, 1))
+    p1 = (rng.uniform(0.15, 0.4), side * rng.uniform(0.3, 1.0) * bend)
+    p2 = (rng.uniform(0.6, 0.85), side * rng.uniform(0.0, 1.0) * bend)
+    shape = [bezier(p1, p2, min_jerk(i / steps)) for i in range(1, steps)]
+    shape.append((1.0, 0.0))
+    return tuple(shape)
+
+
+class TrajectoryCache:
+    """轨迹缓存：少量预计算的单位形状，按位移缩放后以 (dx, dy) 为键缓存像素偏移"""
+
+    def __init__(self, steps=24, bend=0.15, variants=8, max_pairs=1024,
+                 min_distance=8, duration=0.03, batch_count=4, seed=None):
+        """
+        :param steps: 每条轨迹的移动次数
+        :param bend: 最大弯曲程度（垂直偏移占位移长度的比例）
+        :param variants: 预计算的形状数，每对点固定使用其中一个
+        :param max_pairs: 最多缓存的点对数，超出时淘汰最久未用的
+        :param min_distance: 位移小于该值（像素）时直接移动，不走轨迹
+        :param duration: 整条轨迹的投递时长（秒）
+        :param batch_count: 投递批数，批内的移动一次投递、没有间隔
+        """
+        rng = random.Random(seed)
+        self.shapes = [make_shape(rng, steps, bend) for _ in range(variants)]
+        self.duration = duration
+        self.batch_count = batch_count
+        self.max_pairs = max_pairs
+        self.min_distance = min_distance
+        self.hits = 0
+        self.misses = 0
+        self._paths = OrderedDict()
+
+    def offsets(self, dx, dy):
+        """位移 (dx, dy) 对应的轨迹像素偏移（相对起点）"""
+        key = (dx, dy)
+        path = self._paths.get(key)
+        if path is not None:
+            self._paths.move_to_end(key)
+            self.hits += 1
+            return path
+
+        self.misses += 1
+        # 只与位移有关，窗口平移后仍可复用；同一对点每轮走同一条轨迹
+        shape = self.shapes[hash(key) % len(self.shapes)]
+        path = []
+        last = (0, 0)
+        for u, v in shape:
+            point = (int(round(u * dx - v * dy)), int(round(u * dy + v * dx)))
+            if point != last:
+                path.append(point)
+                last = point
+        path = tuple(path)
+        self._paths[key] = path
+        if len(self._paths) > self.max_pairs:
+            self._paths.popitem(last=False)
+        return path
+
+    def path(self, x0, y0, x1, y1):
+        """从 (x0, y0) 到 (x1, y1) 的屏幕坐标序列（不含起点，终点精确为目标）"""
+        dx, dy = x1 - x0, y1 - y0
+        if dx * dx + dy * dy <= self.min_distance * self.min_distance:
+            return [(x1, y1)]
+        return [(x0 + ox, y0 + oy) for ox, oy in self.offsets(dx, dy)]
+
+    def batches(self, path):
+        """
+        把轨迹分成 batch_count 批，批间等待 pause() 秒
+        形状按等时间间隔采样，每批点数相同即每批耗时相同
+        """
+        n = max(1, min(self.batch_count, len(path)))
+        return [path[len(path) * i // n:len(path) * (i + 1) // n] for i in range(n)]
+
+    def pause(self, batches):
+        """批间等待（秒）"""
+        return self.duration / (len(batches) - 1) if len(batches) > 1 else 0.0
\ No newline at end of file